@@ -1,6 +1,6 @@
 import pandas as pd
 
-df = pd.read_csv("railway_track_simulated_dataset_final.csv")
+from dataset_store import load
 
 features = [
     "wear_level",
@@ -10,6 +10,9 @@ features = [
     "load_cycles"
 ]
 
+# Only the columns used, memory-mapped from the columnar store
+df = load(features + ["fault_label"])
+
 X = df[features]
 y = df["fault_label"]
 
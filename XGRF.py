@@ -4,8 +4,10 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
 import xgboost as xgb
 
-# Load dataset
-df = pd.read_csv("railway_track_simulated_dataset_final.csv")
+from dataset_store import load
+
+# Load dataset (compact dtypes, from the columnar store)
+df = load()
 
 # Split into X and y
 X = df.drop("fault_label", axis=1)
@@ -2,17 +2,39 @@ import joblib
 import numpy as np
 import os
 import pandas as pd
+import time
+
+from ..services.model_cascade import ModelCascade
+from ..services.shadow_evaluator import ShadowEvaluator
 
 class PredictionAgent:
+    feature_names = [
+        "wear_level",
+        "alignment_deviation",
+        "vibration_index",
+        "environment_factor",
+        "load_cycles"
+    ]
+    # Typical healthy / worn / severe segments, for warming up a new model
+    warmup_inputs = [
+        [0.10, 0.5, 10.0, 1.0, 300],
+        [0.45, 3.0, 55.0, 1.0, 700],
+        [0.80, 7.5, 85.0, 1.2, 950]
+    ]
+    # ShadowEvaluator copying sampled batches to a candidate model, or None
+    shadow = None
+    # ModelCascade answering confident rows with a cheap model, or None
+    cascade = None
+
     def __init__(self, model_path=None):
         """
         Loads the trained Random Forest model.
         """
 
-        # Default path: backend/models/rf_fault_predictor.pkl
+        # Default path: RF_MODEL_PATH, else backend/models/rf_fault_predictor.pkl
         if model_path is None:
             base_dir = os.path.dirname(os.path.dirname(__file__))
-            model_path = os.path.join(
+            model_path = os.getenv("RF_MODEL_PATH") or os.path.join(
                 base_dir, "models", "rf_fault_predictor.pkl"
             )
 
@@ -32,17 +54,102 @@ class PredictionAgent:
         confidence (float)
         """
 
-        feature_names = [
-            "wear_level",
-            "alignment_deviation",
-            "vibration_index",
-            "environment_factor",
-            "load_cycles"
-        ]
+        X = pd.DataFrame([features], columns=self.feature_names)
 
-        X = pd.DataFrame([features], columns=feature_names)
+        # One reference per call: a hot swap cannot mix two models
+        model = self.model
+        # One predict_proba call; the label is its argmax, as in predict()
+        start = time.perf_counter()
+        probabilities = self._predict_proba(model, X)[0]
+        latency_ms = 1e3 * (time.perf_counter() - start)
+        best = int(np.argmax(probabilities))
+        fault_label = model.classes_[best]
+        confidence = float(probabilities[best])
 
-        fault_label = self.model.predict(X)[0]
-        confidence = float(self.model.predict_proba(X).max())
+        shadow = self.shadow
+        if shadow is not None:
+            shadow.offer(X, [fault_label], [confidence], latency_ms)
 
         return fault_label, round(confidence, 3)
+
+    def predict_proba_batch(self, features_list):
+        """
+        Class probabilities for many segments in one model call.
+
+        Returns:
+        classes (list of str): column order
+        probabilities (array): shape (n_segments, n_classes)
+        """
+
+        X = pd.DataFrame(features_list, columns=self.feature_names)
+        model = self.model
+        start = time.perf_counter()
+        probabilities = self._predict_proba(model, X)
+        latency_ms = 1e3 * (time.perf_counter() - start)
+
+        shadow = self.shadow
+        if shadow is not None and len(X):
+            best = np.argmax(probabilities, axis=1)
+            shadow.offer(X, model.classes_[best], probabilities[np.arange(len(X)), best], latency_ms)
+
+        return list(model.classes_), probabilities
+
+    def _predict_proba(self, model, X):
+        """Through the cascade when one is enabled; columns follow model.classes_."""
+        cascade = self.cascade
+        if cascade is None:
+            return model.predict_proba(X)
+        return cascade.predict_proba(model, X)
+
+    def enable_cascade(self, fast_model, threshold, fast_version=None):
+        """
+        Answer rows the fast model is at least threshold-confident about
+        with it, and only the rest with the full model. Returns stats().
+        """
+        classes = {str(c) for c in self.model.classes_}
+        if {str(c) for c in fast_model.classes_} != classes:
+            raise ValueError(f"Fast model classes {list(fast_model.classes_)} differ from {sorted(classes)}")
+        self.cascade = ModelCascade(fast_model, threshold, fast_version)
+        return self.cascade.stats()
+
+    def disable_cascade(self):
+        """Back to the full model for every row; returns the final stats() or None."""
+        cascade, self.cascade = self.cascade, None
+        return None if cascade is None else cascade.stats()
+
+    def enable_shadow(self, candidate, sample_rate=0.1, candidate_version=None):
+        """
+        Start copying a sample of inference batches to candidate (evaluated
+        on a background thread); replaces any running shadow.
+        Returns the new evaluator's stats().
+        """
+        evaluator = ShadowEvaluator(
+            candidate, self.model.classes_, sample_rate=sample_rate,
+            candidate_version=candidate_version
+        )
+        previous, self.shadow = self.shadow, evaluator
+        if previous is not None:
+            previous.stop()
+        return evaluator.stats()
+
+    def disable_shadow(self):
+        """Stop shadowing; returns the final stats() or None."""
+        shadow, self.shadow = self.shadow, None
+        if shadow is None:
+            return None
+        shadow.stop()
+        return shadow.stats()
+
+    @classmethod
+    def warm_up(cls, model, samples=None):
+        """
+        Run sample predictions on a candidate model (first-call costs are
+        paid before it serves) and check the output; raises ValueError.
+        """
+        X = pd.DataFrame(samples or cls.warmup_inputs, columns=cls.feature_names)
+        probabilities = np.asarray(model.predict_proba(X))
+        if probabilities.shape != (len(X), len(model.classes_)):
+            raise ValueError(f"predict_proba returned shape {probabilities.shape}")
+        if not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3):
+            raise ValueError("predict_proba rows do not sum to 1")
+        model.predict(X)
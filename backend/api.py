@@ -1,7 +1,10 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import os
+import secrets
+import joblib
 from pathlib import Path
 
 # Optional imports for APU model
@@ -16,6 +19,14 @@ except ImportError:
     print("⚠ Keras not available. APU prediction endpoint will be disabled.")
 
 from .services.maintenance_service import MaintenanceService
+from .services.model_registry import ModelSlot
+from .services.apu_hybrid import HybridAPUEstimator
+from .agents.prediction_agent import PredictionAgent
+from .http_cache import cached_json_response
+from .http_metrics import RequestTimer
+from .services import metrics
+from .services.tracing import TRACE_FILE, Tracer
+from .services.profiler import PROFILE_DIR, Profiler
 from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
@@ -36,32 +47,116 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request tracing (off unless TRACE_SAMPLE_RATE > 0 or TRACE_SLOW_MS is set)
+tracer = Tracer(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+    slow_ms=float(os.environ["TRACE_SLOW_MS"]) if os.getenv("TRACE_SLOW_MS") else None,
+    path=os.getenv("TRACE_FILE", TRACE_FILE)
+)
+# On-demand profiling (POST /admin/profile); idle until a session starts
+profiler = Profiler(os.getenv("PROFILE_DIR", PROFILE_DIR))
+app.add_middleware(RequestTimer, tracer=tracer, profiler=profiler)
 
 # Initialize services
 service = MaintenanceService()
 
 # ---------------- LOAD APU MODEL ----------------
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-apu_model = None
-apu_scaler = None
 SEQUENCE_LENGTH = 180
-N_FEATURES = None
 FEATURE_NAMES = [
     'Unnamed: 0', 'TP2', 'TP3', 'H1', 'DV_pressure', 'Reservoirs',
     'Oil_temperature', 'Motor_current', 'COMP', 'DV_eletric', 'Towers',
     'MPG', 'LPS', 'Pressure_switch', 'Oil_level'
 ]
 
+
+def load_apu(paths):
+    """GRU model + scaler; the window width comes from the model."""
+    model = keras.models.load_model(paths["model"])
+    with open(paths["scaler"], "rb") as f:
+        scaler = pickle.load(f)
+    return {"model": model, "scaler": scaler, "n_features": model.input_shape[-1]}
+
+
+def warm_up_apu(apu, metadata):
+    """One prediction on a sample (or mid-range) window before serving."""
+    n_features = apu["n_features"]
+    window = (metadata or {}).get("sample_inputs") or [[0.5] * n_features] * SEQUENCE_LENGTH
+    X_df = pd.DataFrame(window, columns=FEATURE_NAMES[:n_features])
+    X_scaled = apu["scaler"].transform(X_df).reshape(1, SEQUENCE_LENGTH, n_features)
+    apu["model"].predict(X_scaled, verbose=0)
+
+
+apu_slot = ModelSlot("apu_gru", loader=load_apu, warmup=warm_up_apu)
+
 if KERAS_AVAILABLE:
     try:
-        apu_model = keras.models.load_model(os.path.join(MODEL_DIR, "gru_model.keras"))
-        with open(os.path.join(MODEL_DIR, "scaler.pkl"), "rb") as f:
-            apu_scaler = pickle.load(f)
-        N_FEATURES = apu_model.input_shape[-1]
-        print(f"✓ APU GRU model loaded successfully. Expected features: {N_FEATURES}")
+        apu_slot.set(load_apu({
+            "model": os.path.join(MODEL_DIR, "gru_model.keras"),
+            "scaler": os.path.join(MODEL_DIR, "scaler.pkl")
+        }), None)
+        print(f"✓ APU GRU model loaded successfully. Expected features: {apu_slot.current()[0]['n_features']}")
     except Exception as e:
         print(f"⚠ APU model not loaded: {e}")
 
+# ---------------- MODEL REGISTRY ----------------
+# Published versions (backend/models/registry) replace the startup models
+# without a restart: POST /admin/models/{name}/reload, or set
+# MODEL_WATCH_INTERVAL (seconds) to pick up new versions automatically.
+rf_slot = ModelSlot(
+    "rf_fault_predictor",
+    loader=lambda paths: joblib.load(paths["model"]),
+    feature_names=PredictionAgent.feature_names,
+    warmup=lambda model, metadata: PredictionAgent.warm_up(model, metadata.get("sample_inputs")),
+    on_swap=lambda model, metadata: setattr(service.predictor, "model", model)
+)
+rf_slot.set(service.predictor.model, None)
+
+# Cheap first stage of the Random Forest cascade (e.g. a compressed or
+# distilled variant from compress_model.py). Publishing a version turns
+# the cascade on; rows below CASCADE_THRESHOLD confidence go to the full RF.
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+
+
+def warm_up_fast(model, metadata):
+    PredictionAgent.warm_up(model, metadata.get("sample_inputs"))
+    expected = sorted(str(c) for c in service.predictor.model.classes_)
+    if sorted(str(c) for c in model.classes_) != expected:
+        raise ValueError(f"Fast model classes {list(model.classes_)} differ from {expected}")
+
+
+fast_slot = ModelSlot(
+    "rf_fault_fast",
+    loader=lambda paths: joblib.load(paths["model"]),
+    feature_names=PredictionAgent.feature_names,
+    warmup=warm_up_fast,
+    on_swap=lambda model, metadata: service.predictor.enable_cascade(
+        model, CASCADE_THRESHOLD, (metadata or {}).get("version")
+    )
+)
+model_slots = {slot.name: slot for slot in (rf_slot, fast_slot, apu_slot)}
+
+for slot in model_slots.values():
+    if slot.versions():
+        try:
+            slot.load()
+        except ValueError:
+            pass  # keep the startup model; the error shows in /admin/models
+
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+if MODEL_WATCH_INTERVAL > 0:
+    for slot in model_slots.values():
+        slot.watch(MODEL_WATCH_INTERVAL)
+
+
+def require_admin(token):
+    """Admin endpoints need X-Admin-Token equal to the ADMIN_TOKEN env var."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if token is None or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
 
 # -----------------------------
 # Request Models
@@ -77,6 +172,85 @@ class BatchRequest(BaseModel):
 
 class NetworkRequest(BaseModel):
     segments: List[SegmentInput]
+
+
+class ChainageReadings(BaseModel):
+    # One entry per reading in every list (columnar, for large uploads)
+    line: List[str]
+    km: List[float]
+    wear_level: List[float]
+    alignment_deviation: List[float]
+    vibration_index: List[float]
+    environment_factor: List[float]
+    load_cycles: List[float]
+
+
+class ODWeight(BaseModel):
+    origin: str
+    destination: str
+    weight: float
+
+
+class DelayMatrixRequest(BaseModel):
+    blocked_segment_ids: List[int]
+    od_weights: Optional[List[ODWeight]] = None
+    include_matrix: bool = True
+
+
+class TrainDemand(BaseModel):
+    train_id: str
+    origin: str
+    destination: str
+
+
+class BulkRerouteRequest(BaseModel):
+    trains: List[TrainDemand]
+    blocked_segment_ids: List[int]
+    window_hours: float = 1.0
+
+
+class SegmentClosureRequest(BaseModel):
+    segment_ids: List[int]
+
+
+class SegmentTimeRequest(BaseModel):
+    time_min: Optional[float] = None
+
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[int] = None   # default: latest published
+    wait: bool = False              # load in the request instead of the background
+
+
+class CascadeRequest(BaseModel):
+    threshold: float                # escalate rows below this fast-model confidence
+    version: Optional[int] = None   # load this rf_fault_fast version first
+
+
+class ShadowRequest(BaseModel):
+    version: Optional[int] = None   # candidate; default: latest published
+    sample_rate: float = 0.1        # share of inference batches copied
+
+
+class TracingRequest(BaseModel):
+    sample_rate: Optional[float] = None   # share of requests traced
+    slow_ms: Optional[float] = None       # also keep every request this slow
+    clear_slow: bool = False              # turn slow-request tracing off
+
+
+class ProfileRequest(BaseModel):
+    route: Optional[str] = None       # e.g. "/assess/network"; default: every non-admin route
+    requests: Optional[int] = None    # stop after this many requests to route
+    seconds: Optional[float] = None   # ... or after this long
+    interval_ms: float = 5.0          # CPU sampling interval
+    memory: bool = True               # tracemalloc snapshots (slows every request)
+
+
+class DisruptionRequest(BaseModel):
+    segments: List[SegmentInput]
+    od_weights: Optional[List[ODWeight]] = None
+    n_scenarios: int = 2000
+    seed: int = 42
 # -----------------------------
 # Static feature importance
 # (from trained RF model)
@@ -135,8 +309,180 @@ def assess_network(request: NetworkRequest):
     return result
 
 
+@app.post("/assess/chainage")
+def assess_chainage(request: ChainageReadings):
+    """
+    Batch assessment from readings located by line and kilometre post.
+
+    Readings are bucketed to segments with the topology's linear-referencing
+    index and aggregated per segment (worst wear/alignment/vibration/load
+    reading, mean environment factor) before prediction.
+    """
+    features = list(zip(
+        request.wear_level,
+        request.alignment_deviation,
+        request.vibration_index,
+        request.environment_factor,
+        request.load_cycles
+    ))
+    if len({len(request.line), len(request.km), len(request.wear_level), len(request.alignment_deviation),
+            len(request.vibration_index), len(request.environment_factor), len(request.load_cycles)}) != 1:
+        raise HTTPException(status_code=400, detail="All reading lists must have the same length")
+    try:
+        return service.assess_chainage_readings(request.line, request.km, features, FEATURE_IMPORTANCE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/network/topology")
+def get_network_topology(request: Request):
+    """
+    Get the railway network topology (nodes + edges).
+
+    Diversion plans and network paths only carry `graph_data.topology_version`;
+    clients fetch the full topology here once per version. Supports
+    If-None-Match, returning 304 when the client copy is current.
+    """
+    topology = service.diversion_service.get_topology()
+    return cached_json_response(request, topology["body"], topology["etag"])
+
+
+@app.get("/network/viewport")
+def get_network_viewport(bbox: str, zoom: int = 0):
+    """
+    Nodes and edges inside a map viewport, for large networks.
+
+    bbox: "xmin,ymin,xmax,ymax" in topology coordinates. At low zoom,
+    chains of intermediate stations are collapsed into single edges and,
+    further out, nearby stations are merged into clusters (`level` in the
+    response says which).
+    """
+    try:
+        box = [float(v) for v in bbox.split(",")]
+        if len(box) != 4:
+            raise ValueError("bbox must be xmin,ymin,xmax,ymax")
+        return service.diversion_service.get_viewport(box, zoom)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/network/state")
+def get_network_state():
+    """
+    Live network state: revision, topology_version, closed segments and
+    running-time overrides.
+    """
+    return service.diversion_service.get_network_state()
+
+
+@app.post("/network/segments/block")
+def block_segments(request: SegmentClosureRequest):
+    """
+    Close segments for all later routing. Publishes a new topology snapshot
+    (new topology_version); requests already running keep their snapshot.
+    """
+    try:
+        return service.diversion_service.block_segments(request.segment_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/network/segments/unblock")
+def unblock_segments(request: SegmentClosureRequest):
+    """Reopen closed segments."""
+    try:
+        return service.diversion_service.unblock_segments(request.segment_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.put("/network/segments/{segment_id}/time")
+def set_segment_time(segment_id: int, request: SegmentTimeRequest):
+    """
+    Set a segment's running time in minutes (e.g. a speed restriction);
+    time_min null restores the loaded time.
+    """
+    try:
+        return service.diversion_service.set_segment_time(segment_id, request.time_min)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/network/delay-matrix")
+def get_delay_matrix(request: DelayMatrixRequest):
+    """
+    Baseline vs blocked travel times between every station pair.
+
+    Returns the delta matrix (minutes, null = disconnected) in `stations`
+    order, plus aggregates; with od_weights, also passenger-weighted delay.
+    """
+    od_weights = (
+        [od.model_dump() for od in request.od_weights]
+        if request.od_weights else None
+    )
+    try:
+        return service.diversion_service.get_delay_matrix(
+            request.blocked_segment_ids,
+            od_weights=od_weights,
+            include_matrix=request.include_matrix
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/network/bulk-reroute")
+def bulk_reroute(request: BulkRerouteRequest):
+    """
+    Assign many trains to detours around blocked segments without
+    exceeding segment capacity (trains/hour over window_hours).
+
+    Trains that cannot fit on any detour are returned as "held".
+    """
+    if request.window_hours <= 0:
+        raise HTTPException(status_code=400, detail="window_hours must be positive")
+    try:
+        return service.diversion_service.reroute_trains(
+            [t.model_dump() for t in request.trains],
+            request.blocked_segment_ids,
+            window_hours=request.window_hours
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/simulate/disruption")
+def simulate_disruption(request: DisruptionRequest):
+    """
+    Monte Carlo disruption estimate from predicted fault probabilities.
+
+    Samples n_scenarios failure scenarios (seeded, reproducible), reroutes
+    each one and returns the network delay distribution plus segments
+    ranked by expected disruption (minutes).
+    """
+    segments = [
+        {
+            "segment_id": s.segment_id,
+            "features": s.features
+        }
+        for s in request.segments
+    ]
+    od_weights = (
+        [od.model_dump() for od in request.od_weights]
+        if request.od_weights else None
+    )
+    try:
+        return service.simulate_disruption(
+            segments,
+            od_weights=od_weights,
+            n_scenarios=request.n_scenarios,
+            seed=request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/case-study/mumbai")
-def get_mumbai_case_study():
+def get_mumbai_case_study(request: Request):
     """
     Get comprehensive Mumbai Local Rail Fracture case study data.
     
@@ -146,8 +492,17 @@ def get_mumbai_case_study():
     - Blocked segment details (Vikhroli-Kanjurmarg)
     - Emergency diversion path
     - Impact metrics and predictive timeline
+
+    The payload is static: it is built and encoded (plain + gzip) once, and
+    served with an ETag so repeat loads get 304 Not Modified.
     """
-    return service.diversion_service.get_mumbai_case_study()
+    case_study = service.diversion_service.get_mumbai_case_study_payload()
+    return cached_json_response(
+        request,
+        case_study["body"],
+        case_study["etag"],
+        gzip_body=case_study["gzip_body"]
+    )
 
 
 
@@ -230,6 +585,29 @@ def calculate_rul_from_sensors(sensor_window):
     return max(10, min(300, rul))  # Clamp between 10 and 300 hours
 
 
+def predict_apu_batch(apu, windows):
+    """GRU RUL for a stack of windows, shape (n, SEQUENCE_LENGTH, n_features)."""
+    n, timesteps, n_features = windows.shape
+    # DataFrame with feature names to avoid sklearn warning
+    X_df = pd.DataFrame(windows.reshape(-1, n_features), columns=FEATURE_NAMES[:n_features])
+    X_scaled = apu["scaler"].transform(X_df).reshape(n, timesteps, n_features)
+    return apu["model"].predict(X_scaled, verbose=0)[:, 0]
+
+
+# APU_MODE=hybrid sends windows within APU_BOUNDARY_MARGIN hours of the
+# 60 h / 120 h boundaries to the GRU; everything else stays rule-based.
+APU_MODE = os.getenv("APU_MODE", "rule")
+apu_hybrid = None
+if KERAS_AVAILABLE and APU_MODE == "hybrid":
+    apu_hybrid = HybridAPUEstimator(
+        calculate_rul_from_sensors,
+        predict_apu_batch,
+        margin=float(os.getenv("APU_BOUNDARY_MARGIN", "10")),
+        max_batch=int(os.getenv("APU_MAX_BATCH", "16")),
+        max_wait_ms=float(os.getenv("APU_BATCH_WAIT_MS", "5"))
+    )
+
+
 # -----------------------------
 # APU Prediction Endpoint
 # -----------------------------
@@ -250,11 +628,14 @@ def predict_apu(payload: APUPredictRequest):
             detail="APU prediction service not available (Keras not loaded)"
         )
     
-    if apu_model is None or apu_scaler is None:
+    # One snapshot for the whole request (the slot may be hot-swapped)
+    apu, _ = apu_slot.current()
+    if apu is None:
         raise HTTPException(
             status_code=503,
             detail="APU prediction model not available"
         )
+    n_features = apu["n_features"]
     
     sensor_window = payload.sensor_window
     car_id = payload.car_id
@@ -267,23 +648,20 @@ def predict_apu(payload: APUPredictRequest):
 
     X = np.array(sensor_window)
 
-    if X.shape[1] != N_FEATURES:
+    if X.shape[1] != n_features:
         raise HTTPException(
             status_code=400,
-            detail=f"Expected {N_FEATURES} features per timestep, got {X.shape[1]}"
+            detail=f"Expected {n_features} features per timestep, got {X.shape[1]}"
         )
 
-    # Convert to DataFrame with feature names to avoid sklearn warning
-    X_df = pd.DataFrame(X, columns=FEATURE_NAMES[:N_FEATURES])
-    
-    # Calculate RUL from sensor analysis (rule-based logic)
-    rul = calculate_rul_from_sensors(X)
-    
-    # Optionally, you can still use the model but blend it with rule-based
-    # X_scaled = apu_scaler.transform(X_df)
-    # X_scaled = X_scaled.reshape(1, SEQUENCE_LENGTH, N_FEATURES)
-    # model_rul = float(apu_model.predict(X_scaled)[0][0])
-    # rul = (rul * 0.7) + (model_rul * 0.3)  # 70% rule-based, 30% model
+    # Calculate RUL from sensor analysis (rule-based logic). In hybrid
+    # mode, windows near a severity boundary are blended with the GRU
+    # (70% rule-based, 30% model), batched with concurrent requests.
+    with metrics.timed("apu_inference"):
+        if apu_hybrid is not None:
+            rul, rul_source = apu_hybrid.estimate(apu, X)
+        else:
+            rul, rul_source = calculate_rul_from_sensors(X), "rule"
 
     # Determine severity and confidence
     priority, severity = severity_from_rul(rul)
@@ -300,6 +678,7 @@ def predict_apu(payload: APUPredictRequest):
 
     return {
         "rul_hours": round(rul, 2),
+        "rul_source": rul_source,
         "priority": priority,
         "severity": severity,
         "confidence": confidence,
@@ -308,3 +687,198 @@ def predict_apu(payload: APUPredictRequest):
         "explanation": apu_assessment["explanation"],
         "alert_sent": priority >= 2
     }
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Prometheus text format: per-stage and per-route latency histograms,
+    segments processed, cache hits and alerts.
+    """
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# -----------------------------
+# Admin: model registry
+# -----------------------------
+
+@app.get("/admin/models")
+def get_models(x_admin_token: Optional[str] = Header(None)):
+    """Active version, load state and published versions of every model."""
+    require_admin(x_admin_token)
+    return {name: slot.status() for name, slot in model_slots.items()}
+
+
+@app.post("/admin/models/{name}/reload")
+def reload_model(name: str, request: ModelReloadRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load a published version (default: latest), warm it up and swap it in.
+    In-flight requests finish on the previous model. Without wait the load
+    runs in the background; poll GET /admin/models for the outcome.
+    """
+    require_admin(x_admin_token)
+    slot = model_slots.get(name)
+    if slot is None:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    try:
+        if request.wait:
+            return slot.load(request.version)
+        return slot.reload(request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/admin/shadow")
+def start_shadow(request: ShadowRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Shadow a published Random Forest version on live /assess traffic.
+    The candidate is verified and warmed up here, then runs on a background
+    thread; responses keep coming from the active model.
+    """
+    require_admin(x_admin_token)
+    try:
+        candidate, metadata = rf_slot.candidate(request.version)
+        return service.predictor.enable_shadow(candidate, request.sample_rate, metadata["version"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/admin/shadow")
+def get_shadow(x_admin_token: Optional[str] = Header(None)):
+    """Agreement, confidence deltas and latency of the running shadow."""
+    require_admin(x_admin_token)
+    shadow = service.predictor.shadow
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="No shadow evaluation running")
+    return shadow.stats()
+
+
+@app.delete("/admin/shadow")
+def stop_shadow(x_admin_token: Optional[str] = Header(None)):
+    """Stop shadowing; returns the final stats."""
+    require_admin(x_admin_token)
+    stats = service.predictor.disable_shadow()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No shadow evaluation running")
+    return stats
+
+
+@app.get("/admin/cascade")
+def get_cascade(x_admin_token: Optional[str] = Header(None)):
+    """Threshold and share of rows escalated to the full Random Forest."""
+    require_admin(x_admin_token)
+    cascade = service.predictor.cascade
+    if cascade is None:
+        raise HTTPException(status_code=404, detail="Cascade not enabled")
+    return cascade.stats()
+
+
+@app.put("/admin/cascade")
+def set_cascade(request: CascadeRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Tune the threshold, loading a published rf_fault_fast version first if
+    one is given (or none is active yet).
+    """
+    global CASCADE_THRESHOLD
+    require_admin(x_admin_token)
+    try:
+        if not 0 <= request.threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        if request.version is not None or service.predictor.cascade is None:
+            # The swap enables the cascade with the current threshold
+            fast_slot.load(request.version)
+        service.predictor.cascade.set_threshold(request.threshold)
+        # Only once the load succeeded: later swaps keep this threshold
+        CASCADE_THRESHOLD = request.threshold
+        return service.predictor.cascade.stats()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/admin/cascade")
+def stop_cascade(x_admin_token: Optional[str] = Header(None)):
+    """Serve every row from the full Random Forest again; returns the final stats."""
+    require_admin(x_admin_token)
+    stats = service.predictor.disable_cascade()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Cascade not enabled")
+    return stats
+
+
+@app.get("/admin/apu")
+def get_apu_inference(x_admin_token: Optional[str] = Header(None)):
+    """APU inference mode; in hybrid mode, escalation rate and added latency."""
+    require_admin(x_admin_token)
+    return {
+        "mode": "hybrid" if apu_hybrid is not None else "rule",
+        "model_version": apu_slot.status()["active_version"],
+        "hybrid": apu_hybrid.stats() if apu_hybrid is not None else None
+    }
+
+
+@app.get("/admin/tracing")
+def get_tracing(x_admin_token: Optional[str] = Header(None)):
+    """Trace sampling settings and exporter counts."""
+    require_admin(x_admin_token)
+    return tracer.stats()
+
+
+@app.put("/admin/tracing")
+def set_tracing(request: TracingRequest, x_admin_token: Optional[str] = Header(None)):
+    """Change trace sampling without a restart."""
+    require_admin(x_admin_token)
+    try:
+        tracer.configure(request.sample_rate, request.slow_ms, request.clear_slow)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return tracer.stats()
+
+
+@app.post("/admin/profile")
+def start_profile(request: ProfileRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Profile the next `requests` requests to `route`, or the next `seconds`.
+    Results are written under PROFILE_DIR; GET /admin/profile shows where.
+    """
+    require_admin(x_admin_token)
+    routes = [
+        r for r in app.routes
+        if isinstance(r, APIRoute) and not r.path.startswith("/admin")
+        and (request.route is None or r.path == request.route)
+    ]
+    if not routes:
+        raise HTTPException(status_code=400, detail=f"Unknown route {request.route}")
+    try:
+        return profiler.start(
+            [r.endpoint.__code__ for r in routes],
+            route=request.route,
+            requests=request.requests,
+            seconds=request.seconds,
+            interval_ms=request.interval_ms,
+            memory=request.memory
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profile")
+def get_profile(x_admin_token: Optional[str] = Header(None)):
+    """The running profile session and the last finished one."""
+    require_admin(x_admin_token)
+    return profiler.status()
+
+
+@app.delete("/admin/profile")
+def stop_profile(x_admin_token: Optional[str] = Header(None)):
+    """End the running session now and write its results."""
+    require_admin(x_admin_token)
+    status = profiler.stop()
+    if status is None:
+        raise HTTPException(status_code=404, detail="No profile session running")
+    return status
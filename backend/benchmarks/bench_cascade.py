@@ -0,0 +1,89 @@
+"""
+Confidence-gated cascade: share of rows escalated to the full Random
+Forest, accuracy and throughput per threshold, for two cheap first stages
+(a distilled depth-6 tree and a 10-tree depth-6 uint8 CompactForest).
+
+The full model is RF.py's forest (200 trees, depth 12) on RF.py's split of
+the simulated dataset. "rows/s" is one predict_proba_batch call over the
+test rows; "single ms" is PredictionAgent.predict per row, as
+/assess/batch does it. "agree" is agreement with the full RF's labels.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_cascade
+"""
+
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.agents.prediction_agent import PredictionAgent
+from backend.services.compact_forest import CompactForest
+from dataset_store import load
+
+THRESHOLDS = [0.5, 0.7, 0.8, 0.9, 0.95, 0.99]
+SINGLE_ROWS = 300
+
+
+def _agent(model):
+    agent = PredictionAgent.__new__(PredictionAgent)
+    agent.model = model
+    return agent
+
+
+def _run(agent, X_test, y_test, full_labels):
+    start = time.perf_counter()
+    classes, probabilities = agent.predict_proba_batch(X_test.values.tolist())
+    batch_s = time.perf_counter() - start
+    labels = np.asarray(classes)[np.argmax(probabilities, axis=1)]
+
+    rows = X_test.values[:SINGLE_ROWS].tolist()
+    start = time.perf_counter()
+    for row in rows:
+        agent.predict(row)
+    single_ms = 1e3 * (time.perf_counter() - start) / len(rows)
+
+    return {
+        "accuracy": float(np.mean(labels == y_test)),
+        "agreement": float(np.mean(labels == full_labels)),
+        "rows_per_s": len(X_test) / batch_s,
+        "single_ms": single_ms
+    }
+
+
+def main():
+    features = PredictionAgent.feature_names
+    df = load(features + ["fault_label"])
+    X, y = df[features], df["fault_label"].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.25, random_state=42, stratify=y
+    )
+    y_test = y_test.to_numpy()
+
+    full = RandomForestClassifier(n_estimators=200, max_depth=12, random_state=42, n_jobs=-1).fit(X_train, y_train)
+    full_labels = full.predict(X_test)
+    fast_models = {
+        "tree depth6": DecisionTreeClassifier(max_depth=6, random_state=42).fit(X_train, full.predict(X_train)),
+        "forest 10x6 uint8": CompactForest(full, trees=range(10), max_depth=6, precision="uint8"),
+    }
+
+    agent = _agent(full)
+    baseline = _run(agent, X_test, y_test, full_labels)
+    print(f"{'first stage':<18} {'threshold':>9} {'escalated':>9} {'accuracy':>8} "
+          f"{'agree':>6} {'rows/s':>9} {'single ms':>9}")
+    print(f"{'(full RF only)':<18} {'-':>9} {1.0:>9.3f} {baseline['accuracy']:>8.4f} "
+          f"{baseline['agreement']:>6.3f} {baseline['rows_per_s']:>9.0f} {baseline['single_ms']:>9.2f}")
+
+    for name, fast in fast_models.items():
+        for threshold in THRESHOLDS:
+            agent.enable_cascade(fast, threshold)
+            result = _run(agent, X_test, y_test, full_labels)
+            escalated = agent.disable_cascade()["escalated_fraction"]
+            print(f"{name:<18} {threshold:>9.2f} {escalated:>9.3f} {result['accuracy']:>8.4f} "
+                  f"{result['agreement']:>6.3f} {result['rows_per_s']:>9.0f} {result['single_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput benchmark for the /case-study/mumbai endpoint.
+
+Compares the original handler (rebuild the dict and let FastAPI encode it on
+every hit) against the memoized one (pre-encoded bytes, gzip, ETag / 304).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_case_study
+"""
+
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.http_cache import cached_json_response
+from backend.services.diversion_service import DiversionService
+
+N_REQUESTS = 2000
+
+
+def build_app():
+    diversion_service = DiversionService()
+    app = FastAPI()
+
+    @app.get("/before")
+    def before():
+        return diversion_service.get_mumbai_case_study()
+
+    @app.get("/after")
+    def after(request: Request):
+        case_study = diversion_service.get_mumbai_case_study_payload()
+        return cached_json_response(
+            request,
+            case_study["body"],
+            case_study["etag"],
+            gzip_body=case_study["gzip_body"]
+        )
+
+    return app
+
+
+def run(client, path, headers):
+    client.get(path, headers=headers)  # warm-up
+    start = time.perf_counter()
+    for _ in range(N_REQUESTS):
+        response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - start
+    size = len(response.content) if response.status_code == 200 else 0
+    wire = int(response.headers.get("content-length", size))
+    return N_REQUESTS / elapsed, response.status_code, wire
+
+
+def main():
+    client = TestClient(build_app())
+    etag = client.get("/after").headers["etag"]
+
+    cases = [
+        ("before (rebuild + encode)", "/before", {"Accept-Encoding": "identity"}),
+        ("after  (cached, identity)", "/after", {"Accept-Encoding": "identity"}),
+        ("after  (cached, gzip)", "/after", {"Accept-Encoding": "gzip"}),
+        ("after  (If-None-Match)", "/after", {"If-None-Match": etag}),
+    ]
+
+    print(f"{'case':<28}{'req/s':>10}{'status':>8}{'bytes':>10}")
+    for name, path, headers in cases:
+        rps, status, wire = run(client, path, headers)
+        print(f"{name:<28}{rps:>10.0f}{status:>8}{wire:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Point-to-point routing: networkx vs CSR Dijkstra vs contraction hierarchy.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_contraction_hierarchy
+"""
+
+import time
+
+import networkx as nx
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.contraction_hierarchy import ContractionHierarchy
+from backend.services.routing import shortest_path
+
+N_QUERIES = 200
+N_BLOCKED = 5
+
+
+def to_networkx(topology):
+    graph = nx.Graph()
+    for u, v, t in zip(topology.edge_u.tolist(), topology.edge_v.tolist(), topology.time_min.tolist()):
+        graph.add_edge(topology.stations[u], topology.stations[v], time_min=t)
+    return graph
+
+
+def timed(fn, pairs):
+    start = time.perf_counter()
+    for source, target in pairs:
+        fn(source, target)
+    return (time.perf_counter() - start) / len(pairs) * 1e3
+
+
+def main():
+    topology = grid_network(100, 100, seed=1)
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments")
+
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy(topology)
+    print(f"hierarchy build: {time.perf_counter() - start:.1f} s, "
+          f"{hierarchy.num_shortcuts} shortcuts, {hierarchy.nbytes() / 1e6:.1f} MB")
+
+    rng = np.random.default_rng(0)
+    pairs = [tuple(topology.stations[i] for i in rng.integers(0, topology.num_stations, 2))
+             for _ in range(N_QUERIES)]
+    graph = to_networkx(topology)
+
+    print("mean ms/query, unblocked:")
+    print(f"  networkx      {timed(lambda s, t: nx.shortest_path(graph, s, t, weight='time_min'), pairs):8.3f}")
+    print(f"  CSR dijkstra  {timed(lambda s, t: shortest_path(topology, s, t), pairs):8.3f}")
+    print(f"  hierarchy     {timed(hierarchy.shortest_path, pairs):8.3f}")
+
+    blocked = rng.choice(topology.num_segments, size=N_BLOCKED, replace=False).tolist()
+
+    def networkx_blocked(s, t):
+        view = nx.restricted_view(graph, [], [topology.edge_endpoints(e) for e in blocked])
+        nx.shortest_path(view, s, t, weight="time_min")
+
+    hierarchy.stats["fallbacks"] = 0
+    print(f"mean ms/query, {N_BLOCKED} random segments blocked:")
+    print(f"  networkx      {timed(networkx_blocked, pairs):8.3f}")
+    print(f"  CSR dijkstra  {timed(lambda s, t: shortest_path(topology, s, t, blocked), pairs):8.3f}")
+    print(f"  hierarchy     {timed(lambda s, t: hierarchy.shortest_path(s, t, blocked), pairs):8.3f}"
+          f"  ({hierarchy.stats['fallbacks']}/{N_QUERIES} fell back to Dijkstra)")
+
+
+if __name__ == "__main__":
+    main()
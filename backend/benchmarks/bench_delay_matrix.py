@@ -0,0 +1,53 @@
+"""
+All-pairs delay matrix on networks of a few thousand stations.
+
+The 2916-station grid is under ALL_PAIRS_LIMIT, so its baseline matrix is
+cached on load; the 4900-station one computes and caches it on the first
+request.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_delay_matrix
+"""
+
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+
+
+def run(side):
+    start = time.perf_counter()
+    service = DiversionService(topology=grid_network(side, side, seed=1))
+    topology = service.topology
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments")
+    print(f"load incl. baseline all-pairs matrix: {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(0)
+    stations = topology.stations
+    od_weights = [
+        {"origin": stations[o], "destination": stations[d], "weight": float(w)}
+        for o, d, w in zip(rng.integers(0, len(stations), 5000),
+                           rng.integers(0, len(stations), 5000),
+                           rng.integers(100, 5000, 5000))
+    ]
+
+    for k in (1, 10, 50):
+        blocked = rng.choice(topology.segment_ids, size=k, replace=False).tolist()
+        for include_matrix in (False, True):
+            start = time.perf_counter()
+            result = service.get_delay_matrix(blocked, od_weights=od_weights, include_matrix=include_matrix)
+            elapsed = time.perf_counter() - start
+            print(f"blocked={k:<3} matrix={str(include_matrix):<5} {elapsed:6.2f} s  "
+                  f"recomputed {result['recomputed_sources']} sources, "
+                  f"{result['aggregates']['pairs_delayed']} pairs delayed")
+
+
+def main():
+    run(54)
+    run(70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Monte Carlo disruption simulation: rerouting every sampled scenario with
+get_network_path versus simulate_disruption (deduplicated scenarios, only
+scenarios touching the baseline route are rerouted, process pool).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_disruption
+"""
+
+import os
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+
+
+def main(n_scenarios=2000):
+    service = DiversionService(topology=grid_network(40, 40, seed=1))
+    topology = service.topology
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments, "
+          f"{n_scenarios} scenarios, {os.cpu_count()} CPUs")
+    rng = np.random.default_rng(0)
+
+    print(f"{'segments':>9}{'naive s':>9}{'simulator s':>13}{'routed':>8}{'speedup':>9}")
+    for k in (20, 100, 400):
+        segment_ids = rng.choice(topology.segment_ids, size=k, replace=False).tolist()
+        probs = rng.uniform(0.0, 0.05, size=k)
+
+        start = time.perf_counter()
+        failed = np.random.default_rng(42).random((n_scenarios, k)) < probs
+        ids = np.asarray(segment_ids)
+        for row in failed:
+            service.get_network_path(ids[row].tolist())
+        t_naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = service.simulate_disruption(segment_ids, probs, n_scenarios=n_scenarios, seed=42)
+        t_sim = time.perf_counter() - start
+
+        print(f"{k:>9}{t_naive:>9.2f}{t_sim:>13.2f}{result['routed_scenarios']:>8}{t_naive / t_sim:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
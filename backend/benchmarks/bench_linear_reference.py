@@ -0,0 +1,58 @@
+"""
+Bucketing chainage readings to segments: per-reading bisect with Python
+aggregation versus LinearReference.aggregate_features (one searchsorted
+over all lines, sort + reduceat aggregation).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_linear_reference
+"""
+
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.linear_reference import LinearReference
+
+
+def naive(reference, lines, km, features):
+    buckets = {}
+    for line, k, row in zip(lines.tolist(), km.tolist(), features.tolist()):
+        sid = reference.locate(line, k)
+        if sid is not None:
+            buckets.setdefault(sid, []).append(row)
+    return {
+        sid: [max(r[0] for r in rows), max(r[1] for r in rows), max(r[2] for r in rows),
+              sum(r[3] for r in rows) / len(rows), max(r[4] for r in rows)]
+        for sid, rows in buckets.items()
+    }
+
+
+def main():
+    topology = grid_network(100, 100, seed=1)
+    start = time.perf_counter()
+    reference = LinearReference(topology)
+    print(f"network: {topology.num_segments} segments on {len(reference.lines)} lines, "
+          f"index built in {time.perf_counter() - start:.3f} s")
+
+    rng = np.random.default_rng(0)
+    print(f"{'readings':>10}{'naive s':>10}{'bulk s':>9}{'speedup':>9}")
+    for n in (100_000, 1_000_000):
+        lines = np.array(reference.lines)[rng.integers(0, len(reference.lines), n)]
+        km = rng.uniform(0, reference.line_length.max(), n)
+        features = rng.uniform(0, 1, (n, 5))
+
+        start = time.perf_counter()
+        expected = naive(reference, lines, km, features)
+        t_naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = reference.aggregate_features(lines, km, features)
+        t_bulk = time.perf_counter() - start
+
+        assert len(expected) == len(result["segment_ids"])
+        print(f"{n:>10}{t_naive:>10.2f}{t_bulk:>9.2f}{t_naive / t_bulk:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
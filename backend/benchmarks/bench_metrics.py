@@ -0,0 +1,111 @@
+"""
+Cost of the per-stage metrics relative to /assess/network request time.
+
+Runs MaintenanceService.assess_network (Random Forest as in RF.py, the
+default topology, logged alerts, fallback LLM summary) for a few network
+sizes. Counts the metric updates each call makes, and prices them with
+the measured cost of one timed() block and one counter increment (plus
+the request-level histogram the middleware adds). Also times a /metrics
+render.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_metrics
+"""
+
+import contextlib
+import io
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.agents.decision_agent import DecisionAgent
+from backend.agents.explanation_agent import ExplanationAgent
+from backend.agents.prediction_agent import PredictionAgent
+from backend.agents.summary_agent import SummaryAgent
+from backend.services import metrics
+from backend.services.diversion_service import DiversionService
+from backend.services.llm_service import LLMService
+from backend.services.maintenance_service import MaintenanceService
+from backend.services.notification_service import NotificationService
+from dataset_store import load
+
+FEATURE_IMPORTANCE = dict(zip(PredictionAgent.feature_names, [0.35, 0.25, 0.2, 0.1, 0.1]))
+REPEATS = 5
+LOOP = 200_000
+
+
+def _service(model):
+    service = MaintenanceService.__new__(MaintenanceService)
+    service.predictor = PredictionAgent.__new__(PredictionAgent)
+    service.predictor.model = model
+    service.decision = DecisionAgent()
+    service.explainer = ExplanationAgent()
+    service.summary_agent = SummaryAgent()
+    service.llm = LLMService()
+    service.notifier = NotificationService()
+    service.diversion_service = DiversionService()
+    return service
+
+
+def _updates():
+    stage = sum(sum(child.counts) for _, child in metrics.STAGE_SECONDS._series())
+    return stage, metrics.SEGMENTS_PROCESSED._default.value
+
+
+def _unit_costs():
+    start = time.perf_counter()
+    for _ in range(LOOP):
+        with metrics.timed("bench"):
+            pass
+    timer_s = (time.perf_counter() - start) / LOOP
+
+    start = time.perf_counter()
+    for _ in range(LOOP):
+        metrics.SEGMENTS_PROCESSED.inc()
+    counter_s = (time.perf_counter() - start) / LOOP
+    return timer_s, counter_s
+
+
+def main():
+    features = PredictionAgent.feature_names
+    df = load(features + ["fault_label"])
+    model = RandomForestClassifier(n_estimators=200, max_depth=12, random_state=42, n_jobs=-1)
+    model.fit(df[features], df["fault_label"].astype(str))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = _service(model)
+    segment_ids = service.diversion_service.topology.segment_ids
+    rows = df[features].to_numpy().tolist()
+
+    timer_s, counter_s = _unit_costs()
+    print(f"timed() block {timer_s * 1e6:.2f} us, counter inc {counter_s * 1e6:.2f} us")
+
+    print(f"{'segments':>9}{'request ms':>12}{'updates':>9}{'metrics us':>12}{'overhead':>10}")
+    for n in (1, 10, 50):
+        # The default topology has 10 segments; larger batches repeat them
+        segments = [{"segment_id": segment_ids[i % len(segment_ids)], "features": rows[i]} for i in range(n)]
+        times = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            service.assess_network(segments, FEATURE_IMPORTANCE)  # warm-up
+            for _ in range(REPEATS):
+                stage_before, segments_before = _updates()
+                start = time.perf_counter()
+                service.assess_network(segments, FEATURE_IMPORTANCE)
+                times.append(time.perf_counter() - start)
+                stage_after, segments_after = _updates()
+        request_s = float(np.median(times))
+        # + 1 for the request histogram observed by the middleware
+        stage_updates = stage_after - stage_before + 1
+        counter_updates = segments_after - segments_before
+        cost_s = stage_updates * timer_s + counter_updates * counter_s
+        print(f"{n:>9}{request_s * 1e3:>12.2f}{stage_updates + counter_updates:>9.0f}"
+              f"{cost_s * 1e6:>12.1f}{100 * cost_s / request_s:>9.3f}%")
+
+    start = time.perf_counter()
+    text = metrics.REGISTRY.render()
+    print(f"/metrics render: {len(text.splitlines())} lines in {1e3 * (time.perf_counter() - start):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Multi-failure diversion planning: per-segment calls (get_diversion_plan for
+each critical segment, then get_network_path) versus one shared pass
+(plan_network_diversions).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_multi_failure
+"""
+
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+
+
+def main():
+    service = DiversionService(topology=grid_network(100, 100, seed=1))
+    topology = service.topology
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments")
+    rng = np.random.default_rng(0)
+
+    print(f"{'critical':>9}{'per-segment ms':>16}{'shared ms':>12}{'speedup':>9}")
+    for k in (1, 4, 16, 64, 256):
+        segment_ids = rng.choice(topology.segment_ids, size=k, replace=False).tolist()
+
+        start = time.perf_counter()
+        for sid in segment_ids:
+            service.get_diversion_plan(sid)
+        service.get_network_path(segment_ids)
+        t_before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        service.plan_network_diversions(segment_ids)
+        t_after = time.perf_counter() - start
+
+        print(f"{k:>9}{t_before * 1e3:>16.1f}{t_after * 1e3:>12.1f}{t_before / t_after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
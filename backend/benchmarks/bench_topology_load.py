@@ -0,0 +1,68 @@
+"""
+Load time and memory of the array-backed topology on a 50k-edge network,
+compared with the equivalent networkx graph.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_topology_load
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import pandas as pd
+
+from backend.benchmarks.synthetic_network import write_grid_csv
+from backend.services.routing import shortest_path
+from backend.services.topology import load_topology
+
+ROWS, COLS = 158, 159  # ~25k stations, ~50k segments
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        edges_csv = os.path.join(tmp, "edges.csv")
+        stations_csv = os.path.join(tmp, "stations.csv")
+        n, m = write_grid_csv(edges_csv, stations_csv, ROWS, COLS)
+        print(f"network: {n} stations, {m} segments")
+
+        topology, t_load, held, peak = measure(
+            lambda: load_topology(edges_csv, stations_path=stations_csv)
+        )
+        print(f"topology load (CSV -> CSR, baseline row): {t_load:.2f} s")
+        print(f"  retained {held / 1e6:.1f} MB (arrays {topology.nbytes() / 1e6:.1f} MB), peak {peak / 1e6:.1f} MB")
+
+        def build_networkx():
+            df = pd.read_csv(edges_csv)
+            return nx.from_pandas_edgelist(df, "source", "target", edge_attr=True)
+
+        graph, t_nx, nx_held, _ = measure(build_networkx)
+        print(f"networkx load: {t_nx:.2f} s, retained {nx_held / 1e6:.1f} MB")
+
+    source, target = topology.stations[0], topology.stations[-1]
+    start = time.perf_counter()
+    route = shortest_path(topology, source, target)
+    t_csr = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nx.shortest_path_length(graph, source, target, weight="time_min")
+    t_nxq = time.perf_counter() - start
+
+    print(f"{source} -> {target}: {route['time_min']:.1f} min")
+    print(f"  CSR dijkstra {t_csr * 1e3:.1f} ms, networkx {t_nxq * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Live topology updates: publishing a snapshot with Topology.evolve
+(copy-on-write, baseline rows recomputed only for affected sources) versus
+building a fresh Topology with the same closures / running times.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_topology_updates
+"""
+
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.topology import Topology
+from backend.services.topology_store import TopologyStore
+
+
+def rebuild(topology, time_min, closed):
+    return Topology(
+        topology.stations, topology.edge_u, topology.edge_v, topology.segment_ids,
+        topology.length_km, time_min, positions=topology.positions, lines=topology.lines,
+        origin=topology.origin, destination=topology.destination,
+        capacity_tph=topology.capacity_tph, closed=closed
+    )
+
+
+def main(side=50):
+    topology = grid_network(side, side, seed=1)
+    store = TopologyStore(topology)
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments")
+    rng = np.random.default_rng(0)
+    segments = rng.choice(topology.segment_ids, size=20, replace=False).tolist()
+
+    print(f"{'update':<22}{'rebuild s':>10}{'evolve s':>10}{'speedup':>9}")
+    for label, apply in (
+        ("block 1", lambda sid: store.block([sid])),
+        ("unblock 1", lambda sid: store.unblock([sid])),
+        ("slow down 1 (x2)", lambda sid: store.set_time(sid, 2 * float(topology.time_min[topology.edge_for_segment(sid)]))),
+        ("restore time", lambda sid: store.set_time(sid)),
+    ):
+        t_rebuild = t_evolve = 0.0
+        for sid in segments[:5]:
+            start = time.perf_counter()
+            apply(sid)
+            t_evolve += time.perf_counter() - start
+
+            current = store.current()
+            start = time.perf_counter()
+            fresh = rebuild(current, current.time_min, current.closed)
+            t_rebuild += time.perf_counter() - start
+            assert np.allclose(fresh.baseline_matrix(), current.baseline_matrix(), rtol=1e-5)
+        print(f"{label:<22}{t_rebuild / 5:>10.3f}{t_evolve / 5:>10.3f}{t_rebuild / t_evolve:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
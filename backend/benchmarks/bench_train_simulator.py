@@ -0,0 +1,48 @@
+"""
+Train cascade simulator: a full service day of random trains on a grid
+network, with and without blocked segments.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_train_simulator
+"""
+
+import time
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.train_simulator import simulate_trains, summarize_simulation, timetable_from_records
+
+
+def main():
+    topology = grid_network(30, 30, seed=1)
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments, 20 h service day")
+    rng = np.random.default_rng(0)
+    blocked = rng.choice(topology.num_segments, size=30, replace=False).tolist()
+
+    print(f"{'trains':>7}{'blocked':>9}{'sim s':>8}{'iterations':>12}{'diverted':>10}{'mean delay':>12}")
+    for n in (1000, 3000, 10000):
+        origins = rng.integers(0, topology.num_stations, n)
+        destinations = rng.integers(0, topology.num_stations, n)
+        records = [
+            {
+                "origin": topology.stations[o],
+                "destination": topology.stations[d],
+                "departure_min": float(rng.uniform(0, 1200)),
+                "speed": float(rng.uniform(0.8, 1.2))
+            }
+            for o, d in zip(origins, destinations)
+        ]
+        timetable = timetable_from_records(topology, records)
+
+        for closed in ([], blocked):
+            start = time.perf_counter()
+            result = simulate_trains(topology, timetable, blocked_edges=closed, block_start_min=300)
+            elapsed = time.perf_counter() - start
+            summary = summarize_simulation(result)
+            print(f"{n:>7}{len(closed):>9}{elapsed:>8.2f}{result['iterations']:>12}"
+                  f"{summary['diverted']:>10}{summary['mean_delay_min']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
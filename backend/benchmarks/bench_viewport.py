@@ -0,0 +1,46 @@
+"""
+Map viewport queries on a ~18k-station network (30 x 30 junction grid, 10
+intermediate stations per link): full topology payload versus
+/network/viewport at several zoom levels.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_viewport
+"""
+
+import json
+import time
+
+from backend.benchmarks.synthetic_network import line_grid_network
+from backend.services.diversion_service import DiversionService
+
+
+def main():
+    service = DiversionService(topology=line_grid_network(30, 30, 10, seed=1))
+    topology = service.topology
+    print(f"network: {topology.num_stations} stations, {topology.num_segments} segments")
+
+    start = time.perf_counter()
+    body = service.get_topology()["body"]
+    print(f"full topology payload: {len(body) / 1e6:.2f} MB, {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    service.get_viewport((0, 0, 1, 1), 0)
+    print(f"spatial index build: {time.perf_counter() - start:.3f} s")
+
+    # Viewport sized to the screen: a 1024-px wide view at each zoom
+    center = topology.positions.mean(axis=0)
+    print(f"{'zoom':>5}{'level':>11}{'nodes':>8}{'edges':>8}{'KB':>8}{'ms':>8}")
+    for zoom in range(0, 7):
+        half = service._viewport.pixel_size(zoom) * 512
+        bbox = (center[0] - half, center[1] - half, center[0] + half, center[1] + half)
+        start = time.perf_counter()
+        for _ in range(10):
+            result = service.get_viewport(bbox, zoom)
+        elapsed = (time.perf_counter() - start) / 10
+        size = len(json.dumps(result, separators=(",", ":")))
+        print(f"{zoom:>5}{result['level']:>11}{len(result['nodes']):>8}{len(result['edges']):>8}"
+              f"{size / 1e3:>8.1f}{elapsed * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Synthetic rail networks for benchmarks.
+
+A jittered grid: every station links to its right and lower neighbour, so a
+rows x cols grid has about 2 * rows * cols segments. Each grid row is a line.
+"""
+
+import numpy as np
+
+from backend.services.topology import Topology
+
+
+def grid_network_arrays(rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    n = rows * cols
+    ids = np.arange(n).reshape(rows, cols)
+
+    right_u, right_v = ids[:, :-1].ravel(), ids[:, 1:].ravel()
+    down_u, down_v = ids[:-1, :].ravel(), ids[1:, :].ravel()
+    edge_u = np.concatenate([right_u, down_u])
+    edge_v = np.concatenate([right_v, down_v])
+    m = len(edge_u)
+
+    length_km = rng.uniform(1.0, 6.0, m).astype(np.float32)
+    time_min = (length_km * rng.uniform(0.8, 1.6, m)).astype(np.float32)
+
+    yy, xx = np.divmod(np.arange(n), cols)
+    positions = np.stack([xx * 100.0, yy * 100.0], axis=1) + rng.normal(0, 10, (n, 2))
+
+    lines = [f"Row_{r}" for r in (edge_u // cols)[: len(right_u)]]
+    lines += [f"Col_{c}" for c in (edge_u % cols)[len(right_u):]]
+
+    return {
+        "stations": [f"S{i}" for i in range(n)],
+        "edge_u": edge_u,
+        "edge_v": edge_v,
+        "segment_ids": np.arange(1, m + 1),
+        "length_km": length_km,
+        "time_min": time_min,
+        "positions": positions.astype(np.float32),
+        "lines": lines,
+    }
+
+
+def grid_network(rows, cols, seed=0):
+    arrays = grid_network_arrays(rows, cols, seed)
+    return Topology(
+        arrays["stations"], arrays["edge_u"], arrays["edge_v"], arrays["segment_ids"],
+        arrays["length_km"], arrays["time_min"],
+        positions=arrays["positions"], lines=arrays["lines"]
+    )
+
+
+def line_grid_network(rows, cols, stations_per_link, seed=0):
+    """
+    Grid of junctions whose links each pass through stations_per_link
+    intermediate stations, like lines with many local stops.
+    """
+    arrays = grid_network_arrays(rows, cols, seed)
+    rng = np.random.default_rng(seed + 1)
+    junctions = rows * cols
+    k = stations_per_link
+    m = len(arrays["edge_u"])
+
+    # Intermediate stations interpolated along each link
+    t = np.arange(1, k + 1) / (k + 1)
+    a = arrays["positions"][arrays["edge_u"]]
+    b = arrays["positions"][arrays["edge_v"]]
+    middle = (a[:, None, :] + (b - a)[:, None, :] * t[None, :, None]).reshape(-1, 2)
+    positions = np.vstack([arrays["positions"], middle + rng.normal(0, 2, middle.shape)])
+
+    # Link i becomes the chain u -> junctions + i*k ... -> v
+    inner = junctions + np.arange(m * k).reshape(m, k)
+    chain = np.column_stack([arrays["edge_u"], inner, arrays["edge_v"]])
+    edge_u, edge_v = chain[:, :-1].ravel(), chain[:, 1:].ravel()
+    length_km = rng.uniform(0.5, 2.0, len(edge_u)).astype(np.float32)
+
+    return Topology(
+        [f"S{i}" for i in range(len(positions))], edge_u, edge_v, np.arange(1, len(edge_u) + 1),
+        length_km, length_km * 1.5, positions=positions.astype(np.float32),
+        lines=np.repeat(arrays["lines"], k + 1).tolist()
+    )
+
+
+def write_grid_csv(path, stations_path, rows, cols, seed=0):
+    import pandas as pd
+
+    arrays = grid_network_arrays(rows, cols, seed)
+    names = np.array(arrays["stations"])
+    pd.DataFrame({
+        "source": names[arrays["edge_u"]],
+        "target": names[arrays["edge_v"]],
+        "segment_id": arrays["segment_ids"],
+        "length_km": arrays["length_km"],
+        "time_min": arrays["time_min"],
+        "line": arrays["lines"],
+    }).to_csv(path, index=False)
+    pd.DataFrame({
+        "station_id": names,
+        "x": arrays["positions"][:, 0],
+        "y": arrays["positions"][:, 1],
+    }).to_csv(stations_path, index=False)
+    return len(names), len(arrays["edge_u"])
@@ -0,0 +1,64 @@
+"""
+Helpers for serving pre-encoded JSON payloads with HTTP caching
+(ETag / If-None-Match) and optional pre-compressed gzip bodies.
+"""
+
+from fastapi import Request, Response
+
+from .services.metrics import CACHE_HITS
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against the current ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _quality(params: str) -> float:
+    """q value of an Accept-Encoding entry's parameters (1 if absent)."""
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_gzip(request: Request) -> bool:
+    """True if the client advertises gzip in Accept-Encoding with q > 0."""
+    header = request.headers.get("accept-encoding", "")
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "gzip":
+            return _quality(params) > 0
+    return False
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, gzip_body: bytes = None) -> Response:
+    """
+    Serve pre-encoded JSON with ETag / 304 support.
+
+    If gzip_body is given and the client accepts gzip, the pre-compressed
+    bytes are sent as-is with Content-Encoding: gzip.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=0, must-revalidate"
+    }
+    if gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+
+    if etag_matches(request, etag):
+        CACHE_HITS.labels("http_etag").inc()
+        return Response(status_code=304, headers=headers)
+
+    if gzip_body is not None and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gzip_body, media_type="application/json", headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
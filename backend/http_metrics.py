@@ -0,0 +1,55 @@
+"""
+ASGI middleware timing every HTTP request into pm_request_duration_seconds,
+labelled by route template (/segments/{segment_id}, not the raw path) so
+the number of series stays fixed.
+
+With a Tracer it also opens the request's root span (named
+"METHOD /route") and returns the trace id of recorded requests in the
+X-Trace-Id response header. A client-supplied X-Trace-Id is reused.
+With a Profiler, completed requests are counted towards the running
+profile session, if any.
+"""
+
+import time
+
+from .services.metrics import REQUEST_SECONDS
+
+
+class RequestTimer:
+    def __init__(self, app, tracer=None, profiler=None):
+        self.app = app
+        self.tracer = tracer
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.tracer is None or not self.tracer.enabled:
+            await self._timed(scope, receive, send, None)
+            return
+
+        trace_id = dict(scope["headers"]).get(b"x-trace-id")
+        with self.tracer.trace(scope["path"], trace_id and trace_id.decode("latin-1")[:64]) as root:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start" and root.trace is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", root.trace.trace_id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self._timed(scope, receive, send_with_trace_id, root)
+
+    async def _timed(self, scope, receive, send, root):
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router records the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(route, scope["method"]).observe(time.perf_counter() - start)
+            session = self.profiler.session if self.profiler is not None else None
+            if session is not None:
+                session.request_finished(route)
+            if root is not None:
+                root.name = f"{scope['method']} {route}"
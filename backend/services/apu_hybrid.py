@@ -0,0 +1,197 @@
+"""
+Rule-first APU RUL estimation that runs the GRU only near severity
+boundaries.
+
+The rule-based estimate is cheap and decides the severity on its own when
+it is clearly inside a band. Only windows whose rule RUL is within margin
+hours of a boundary (60 h CRITICAL/WARNING, 120 h WARNING/NORMAL) are
+escalated to the GRU, where a few hours either way changes the alert.
+
+Escalated windows from concurrent requests are micro-batched: a worker
+thread takes the first pending window, waits up to max_wait_ms for more
+(at most max_batch) and runs one model call for all of them. Each request
+blocks only for its own result. If the model call fails or times out, the
+request falls back to the rule estimate.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .metrics import LatencyHistogram
+
+SEVERITY_BOUNDARIES = (60.0, 120.0)
+MARGIN_HOURS = 10.0
+# Blend of the model RUL into the rule RUL for escalated windows
+GRU_WEIGHT = 0.3
+MAX_BATCH = 16
+MAX_WAIT_MS = 5.0
+RESULT_TIMEOUT_S = 10.0
+
+
+class _Pending:
+    __slots__ = ("model", "window", "submitted", "done", "result", "error")
+
+    def __init__(self, model, window):
+        self.model = model
+        self.window = window
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class HybridAPUEstimator:
+    def __init__(self, rule, predict_batch, margin=MARGIN_HOURS, gru_weight=GRU_WEIGHT,
+                 max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        """
+        rule: window (timesteps x features array) -> RUL hours
+        predict_batch: (model, windows array of shape (n, timesteps, features))
+                       -> n RUL hours
+        margin: hours either side of a severity boundary that escalate
+        """
+        if margin < 0:
+            raise ValueError("margin must be >= 0")
+        if not 0 <= gru_weight <= 1:
+            raise ValueError("gru_weight must be between 0 and 1")
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.rule = rule
+        self.predict_batch = predict_batch
+        self.margin = float(margin)
+        self.gru_weight = float(gru_weight)
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1e3
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = self.escalated = self.fallbacks = 0
+        self.batches = self.batched_windows = 0
+        self._added_latency = LatencyHistogram()
+        self._model_latency = LatencyHistogram()
+        self.last_error = None
+
+        self._worker = threading.Thread(target=self._run, name="apu-hybrid", daemon=True)
+        self._worker.start()
+
+    def near_boundary(self, rul):
+        return any(abs(rul - boundary) <= self.margin for boundary in SEVERITY_BOUNDARIES)
+
+    def estimate(self, model, window):
+        """
+        RUL for one window: the rule estimate, blended with the model's
+        when it falls near a boundary.
+
+        Returns:
+        rul (float), source ("rule" | "hybrid" | "rule_fallback")
+        """
+        rule_rul = float(self.rule(window))
+        if model is None or not self.near_boundary(rule_rul):
+            with self._lock:
+                self.requests += 1
+            return rule_rul, "rule"
+
+        pending = _Pending(model, np.asarray(window, dtype=np.float32))
+        self._queue.put(pending)
+        finished = pending.done.wait(RESULT_TIMEOUT_S)
+        added_ms = 1e3 * (time.perf_counter() - pending.submitted)
+
+        with self._lock:
+            self.requests += 1
+            self.escalated += 1
+            self._added_latency.add(added_ms)
+            if not finished or pending.error is not None:
+                self.fallbacks += 1
+                self.last_error = pending.error or "timed out waiting for the model"
+                return rule_rul, "rule_fallback"
+
+        rul = (1 - self.gru_weight) * rule_rul + self.gru_weight * pending.result
+        return rul, "hybrid"
+
+    def _take_batch(self, first):
+        batch = [first]
+        deadline = first.submitted + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(pending)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._take_batch(first)
+
+            # A hot swap can leave windows for two models in one batch
+            groups = {}
+            for pending in batch:
+                groups.setdefault(id(pending.model), []).append(pending)
+
+            for group in groups.values():
+                start = time.perf_counter()
+                try:
+                    ruls = np.asarray(
+                        self.predict_batch(group[0].model, np.stack([p.window for p in group])),
+                        dtype=np.float64
+                    ).reshape(-1)
+                    if len(ruls) != len(group):
+                        raise ValueError(f"model returned {len(ruls)} values for {len(group)} windows")
+                    for pending, rul in zip(group, ruls):
+                        pending.result = float(rul)
+                except Exception as e:
+                    for pending in group:
+                        pending.error = f"{type(e).__name__}: {e}"
+                model_ms = 1e3 * (time.perf_counter() - start)
+
+                with self._lock:
+                    self.batches += 1
+                    self.batched_windows += len(group)
+                    self._model_latency.add(model_ms)
+                for pending in group:
+                    pending.done.set()
+
+    def stop(self):
+        self._queue.put(None)
+        self._worker.join(timeout=RESULT_TIMEOUT_S)
+
+    def stats(self):
+        """
+        Returns:
+        {
+            "margin_hours": float,
+            "gru_weight": float,
+            "requests": int,
+            "escalated": int,
+            "escalation_rate": float or None,
+            "fallbacks": int,
+            "batches": int,
+            "mean_batch_size": float or None,
+            "added_latency_ms": {"count", "mean", "p50", "p95", "p99"},
+            "model_latency_ms": {"count", "mean", "p50", "p95", "p99"},
+            "last_error": str or None
+        }
+        """
+        with self._lock:
+            return {
+                "margin_hours": self.margin,
+                "gru_weight": self.gru_weight,
+                "requests": self.requests,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.requests if self.requests else None,
+                "fallbacks": self.fallbacks,
+                "batches": self.batches,
+                "mean_batch_size": self.batched_windows / self.batches if self.batches else None,
+                "added_latency_ms": self._added_latency.summary(),
+                "model_latency_ms": self._model_latency.summary(),
+                "last_error": self.last_error
+            }
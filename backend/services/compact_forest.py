@@ -0,0 +1,183 @@
+"""
+Compact array form of a fitted RandomForestClassifier, for serving.
+
+All trees are flattened into one set of node arrays. A child index >= 0 is
+another split node and a negative one is ~leaf. Only leaves carry class
+probabilities, and trees can be cut to a maximum depth while flattening:
+a split node at the cut depth becomes a leaf holding that node's class
+distribution, as sklearn stores it.
+
+Thresholds and leaf probabilities are stored at the chosen precision:
+
+- "float32": thresholds rounded down to float32; inputs are float32 as in
+             sklearn, so predictions match it
+- "float16": half-precision thresholds and probabilities
+- "uint8":   thresholds become per-feature bin codes and inputs are binned
+             with np.searchsorted before traversal. This is exact while a
+             feature uses at most 255 distinct thresholds; beyond that the
+             thresholds snap to 255 quantile edges. Probabilities are stored
+             as uint8 (1/255 steps).
+
+Prediction walks every row through every tree at once, one level per numpy
+step. The class offers predict / predict_proba / classes_, like the sklearn
+model, so PredictionAgent can load it with joblib as a drop-in.
+"""
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "uint8")
+MAX_BINS = 255
+# Rows per traversal step; bounds the (rows x trees) index arrays
+BLOCK_ROWS = 4096
+
+
+def _round_down(threshold, dtype):
+    """
+    threshold in dtype, rounded towards -inf so that x <= result keeps the
+    fitted decision x <= threshold for any x representable in dtype.
+    """
+    rounded = threshold.astype(dtype)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], dtype(-np.inf))
+    return rounded
+
+
+class CompactForest:
+    def __init__(self, forest, trees=None, max_depth=None, precision="float32"):
+        """
+        forest: fitted RandomForestClassifier
+        trees: indices of the estimators to keep (default: all)
+        max_depth: cut every tree at this depth (default: as fitted)
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}")
+
+        estimators = forest.estimators_
+        if trees is not None:
+            estimators = [estimators[i] for i in trees]
+        if not estimators:
+            raise ValueError("at least one tree is required")
+
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.precision = precision
+
+        feature, threshold, left, right, roots, values = [], [], [], [], [], []
+        n_split = 0
+        depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            # Per-node class distribution (normalise: older sklearn stores counts)
+            value = tree.value[:, 0, :]
+            value = value / value.sum(axis=1, keepdims=True)
+
+            # Number this tree's kept nodes: splits and leaves separately
+            ids = {}
+            stack = [(0, 0)]
+            order = []
+            while stack:
+                node, d = stack.pop()
+                is_leaf = tree.children_left[node] < 0 or (max_depth is not None and d >= max_depth)
+                if is_leaf:
+                    ids[node] = ~len(values)
+                    values.append(value[node])
+                else:
+                    ids[node] = n_split + len(order)
+                    order.append(node)
+                    stack.append((tree.children_right[node], d + 1))
+                    stack.append((tree.children_left[node], d + 1))
+                depth = max(depth, d)
+            roots.append(ids[0])
+
+            for node in order:
+                feature.append(tree.feature[node])
+                threshold.append(tree.threshold[node])
+                left.append(ids[tree.children_left[node]])
+                right.append(ids[tree.children_right[node]])
+            n_split += len(order)
+
+        self.n_trees = len(estimators)
+        self.max_depth = depth
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.feature = np.asarray(feature, dtype=np.int8)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self._set_thresholds(np.asarray(threshold, dtype=np.float64))
+        self._set_values(np.asarray(values, dtype=np.float64).reshape(-1, len(self.classes_)))
+
+    def _set_thresholds(self, threshold):
+        if self.precision != "uint8":
+            self.threshold = _round_down(threshold, np.dtype(self.precision).type)
+            self.bin_edges = None
+            return
+
+        # Per feature: sorted edges, and each node's threshold as an edge index
+        self.bin_edges = []
+        codes = np.zeros(len(threshold), dtype=np.uint8)
+        for f in range(self.n_features_in_):
+            mask = self.feature == f
+            exact = _round_down(threshold[mask], np.float32)
+            edges = np.unique(exact)
+            if len(edges) > MAX_BINS:
+                edges = np.unique(np.quantile(edges, np.linspace(0, 1, MAX_BINS)).astype(np.float32))
+            if mask.any():
+                # Exact edges map to themselves; otherwise the next edge up
+                snapped = np.searchsorted(edges, exact)
+                codes[mask] = np.minimum(snapped, len(edges) - 1)
+            self.bin_edges.append(edges)
+        self.threshold = codes
+
+    def _set_values(self, values):
+        if self.precision == "uint8":
+            self.values = np.round(values * 255).astype(np.uint8)
+        else:
+            self.values = values.astype(self.precision)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature) + len(self.values)
+
+    @property
+    def nbytes(self):
+        arrays = [self.roots, self.feature, self.threshold, self.left, self.right, self.values]
+        arrays += self.bin_edges or []
+        return sum(a.nbytes for a in arrays)
+
+    def _inputs(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected {self.n_features_in_} features")
+        if self.bin_edges is None:
+            return X
+        # x <= edge[j]  <=>  (number of edges below x) <= j
+        return np.stack(
+            [np.searchsorted(edges, X[:, f], side="left") for f, edges in enumerate(self.bin_edges)],
+            axis=1
+        )
+
+    def _leaves(self, X):
+        """(rows, trees) leaf index for every row in every tree."""
+        flat = np.ascontiguousarray(X).ravel()
+        row_base = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            split = node >= 0
+            if not split.any():
+                break
+            i = np.maximum(node, 0)
+            go_left = flat.take(row_base + self.feature.take(i)) <= self.threshold.take(i)
+            node = np.where(split, np.where(go_left, self.left.take(i), self.right.take(i)), node)
+        return ~node
+
+    def predict_proba(self, X):
+        X = self._inputs(X)
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaves = self._leaves(X[start:start + BLOCK_ROWS])
+            proba[start:start + BLOCK_ROWS] = self.values[leaves].mean(axis=1, dtype=np.float64)
+        if self.precision == "uint8":
+            proba /= 255
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
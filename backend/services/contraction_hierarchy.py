@@ -0,0 +1,305 @@
+"""
+Contraction-hierarchy routing engine for large rail networks.
+
+Preprocessing contracts stations one at a time (least important first),
+adding shortcut segments that preserve shortest travel times between the
+remaining stations. A point-to-point query is then a bidirectional search
+that only climbs to more important stations, touching a few hundred
+stations instead of the whole network.
+
+Blocked segments: closing segments can only make routes slower, so if the
+unblocked optimum avoids every blocked segment it is still optimal. Otherwise
+the query falls back to Dijkstra on the blocked CSR adjacency. The same
+argument lets one hierarchy serve later snapshots of the network
+(Topology.evolve) in which segments were only closed or slowed down: those
+segments are treated as blocked and the actual snapshot is routed.
+"""
+
+import heapq
+import math
+import threading
+
+import numpy as np
+
+from .routing import shortest_path
+
+# Witness searches give up after settling this many stations; a shortcut is
+# then added conservatively (never wrong, just slightly larger hierarchy).
+WITNESS_SETTLE_LIMIT = 60
+
+
+class ContractionHierarchy:
+    """
+    Built once per Topology; read-only afterwards, safe to share between
+    request threads.
+    """
+
+    def __init__(self, topology):
+        self.topology = topology
+        self.stats = {"queries": 0, "fallbacks": 0}
+        self._stats_lock = threading.Lock()
+        # (snapshot, degraded edges) for the last snapshot checked
+        self._degraded = (topology, frozenset())
+        self._build()
+
+    # ------------------------------------------------------------------
+    # Preprocessing
+    # ------------------------------------------------------------------
+
+    def _build(self):
+        topology = self.topology
+        n = topology.num_stations
+        adjacency = topology.adjacency()
+
+        # Working graph among uncontracted stations: adj[u][v] = time
+        adj = [dict() for _ in range(n)]
+        # arc (a, b) with a < b -> (middle station or -1, original edge or -1)
+        arc_info = {}
+        indptr = adjacency.indptr.tolist()
+        indices = adjacency.indices.tolist()
+        weights = adjacency.weights.astype(float).tolist()
+        edge_ids = adjacency.edge_ids.tolist()
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                if u != v:
+                    adj[u][v] = weights[k]
+                    arc_info[(min(u, v), max(u, v))] = (-1, edge_ids[k])
+
+        contracted = bytearray(n)
+        deleted_neighbors = [0] * n
+        rank = [0] * n
+        upward = [[] for _ in range(n)]
+
+        def witness_distances(source, excluded, max_dist):
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            while heap and settled < WITNESS_SETTLE_LIMIT:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > max_dist:
+                    break
+                settled += 1
+                for y, w in adj[x].items():
+                    if y == excluded:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(y, math.inf):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def needed_shortcuts(v):
+            neighbors = list(adj[v].items())
+            shortcuts = []
+            for i, (u, wu) in enumerate(neighbors):
+                others = neighbors[i + 1:]
+                if not others:
+                    continue
+                max_dist = wu + max(ww for _, ww in others)
+                dist = witness_distances(u, v, max_dist)
+                for w, ww in others:
+                    via = wu + ww
+                    if dist.get(w, math.inf) > via:
+                        shortcuts.append((u, w, via))
+            return shortcuts
+
+        def priority(v):
+            return 2 * (len(needed_shortcuts(v)) - len(adj[v])) + deleted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        self.num_shortcuts = 0
+        order = 0
+
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+
+            # Lazy update: re-evaluate and defer if no longer the minimum
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            for u, w, via in needed_shortcuts(v):
+                if via < adj[u].get(w, math.inf):
+                    adj[u][w] = via
+                    adj[w][u] = via
+                    arc_info[(min(u, w), max(u, w))] = (v, -1)
+                    self.num_shortcuts += 1
+
+            rank[v] = order
+            order += 1
+            contracted[v] = 1
+
+            # Remaining neighbours are all higher in the hierarchy
+            for u, w in adj[v].items():
+                upward[v].append((u, w))
+                del adj[u][v]
+                deleted_neighbors[u] += 1
+            adj[v] = {}
+
+        self.rank = np.asarray(rank, dtype=np.int32)
+        self._upward = upward
+        self._arc_info = arc_info
+
+        # Compact CSR copy of the upward graph (for size reporting / export)
+        counts = np.fromiter((len(arcs) for arcs in upward), dtype=np.int64, count=n)
+        self.up_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.up_indptr[1:])
+        self.up_targets = np.fromiter((t for arcs in upward for t, _ in arcs), dtype=np.int32)
+        self.up_weights = np.fromiter((w for arcs in upward for _, w in arcs), dtype=np.float32)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _search(self, s, t):
+        """
+        Bidirectional upward search.
+        Returns (time, (station path, edge path)) or None.
+        """
+        if s == t:
+            return 0.0, ([s], [])
+
+        upward = self._upward
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({s: -1}, {t: -1})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        best = math.inf
+        meet = -1
+
+        side = 0
+        while heaps[0] or heaps[1]:
+            if not heaps[side]:
+                side = 1 - side
+            heap = heaps[side]
+            if heap[0][0] >= best:
+                heap.clear()
+                side = 1 - side
+                continue
+
+            d, x = heapq.heappop(heap)
+            mine, other = dist[side], dist[1 - side]
+            if d > mine[x]:
+                continue
+            if x in other and d + other[x] < best:
+                best = d + other[x]
+                meet = x
+
+            # Stall-on-demand: if a higher station already reaches x faster
+            # (arcs are undirected), x cannot lie on a shortest path
+            arcs = upward[x]
+            if any(mine.get(y, math.inf) + w < d for y, w in arcs):
+                side = 1 - side
+                continue
+
+            for y, w in arcs:
+                nd = d + w
+                if nd < mine.get(y, math.inf):
+                    mine[y] = nd
+                    parent[side][y] = x
+                    heapq.heappush(heap, (nd, y))
+            side = 1 - side
+
+        if meet < 0:
+            return None
+
+        forward = []
+        x = meet
+        while x != -1:
+            forward.append(x)
+            x = parent[0][x]
+        forward.reverse()
+        x = parent[1][meet]
+        while x != -1:
+            forward.append(x)
+            x = parent[1][x]
+
+        return best, self._unpack(forward)
+
+    def _unpack(self, node_path):
+        """Expand shortcuts into original stations and edge indices."""
+        path = [node_path[0]]
+        edges = []
+        stack = [(a, b) for a, b in reversed(list(zip(node_path[:-1], node_path[1:])))]
+        while stack:
+            a, b = stack.pop()
+            mid, edge = self._arc_info[(min(a, b), max(a, b))]
+            if mid < 0:
+                path.append(b)
+                edges.append(edge)
+            else:
+                stack.append((mid, b))
+                stack.append((a, mid))
+        return path, edges
+
+    def query_time(self, source, target):
+        """Unblocked optimal travel time between two station names (inf if none)."""
+        found = self._search(self.topology.station_index[source], self.topology.station_index[target])
+        return math.inf if found is None else found[0]
+
+    def degraded_edges(self, topology):
+        """
+        Edge indices closed or slower in topology than in the snapshot the
+        hierarchy was built on, or None if the hierarchy cannot serve it
+        (a different network, or some segment got faster or reopened).
+        """
+        checked, degraded = self._degraded
+        if checked is topology:
+            return degraded
+
+        base = self.topology
+        if topology.edge_u is not base.edge_u or topology.edge_v is not base.edge_v:
+            return None
+        base_times = base.effective_times()
+        times = topology.effective_times()
+        if np.any(times < base_times):
+            return None
+        degraded = frozenset(np.nonzero(times > base_times)[0].tolist())
+        self._degraded = (topology, degraded)
+        return degraded
+
+    def shortest_path(self, source, target, blocked_edges=None, topology=None):
+        """
+        Same contract as routing.shortest_path: fastest route avoiding
+        blocked edge indices, or None.
+
+        topology: snapshot to route on (default: the one the hierarchy was
+        built on); degraded_edges(topology) must not be None.
+        """
+        topology = topology or self.topology
+        degraded = self.degraded_edges(topology)
+        if degraded is None:
+            raise ValueError("Contraction hierarchy cannot serve this topology snapshot")
+        self._count("queries")
+
+        found = self._search(topology.station_index[source], topology.station_index[target])
+        if found is None:
+            return None
+
+        node_path, edges = found[1]
+        edge_array = np.asarray(edges, dtype=np.int64)
+        route = {
+            "stations": [topology.stations[i] for i in node_path],
+            "edges": edges,
+            "time_min": float(topology.time_min[edge_array].sum()) if edges else 0.0,
+            "distance_km": float(topology.length_km[edge_array].sum()) if edges else 0.0
+        }
+        if blocked_edges or degraded:
+            blocked = degraded.union(blocked_edges or ())
+            if any(e in blocked for e in route["edges"]):
+                self._count("fallbacks")
+                return shortest_path(topology, source, target, blocked_edges=blocked_edges)
+        return route
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def nbytes(self):
+        return self.up_indptr.nbytes + self.up_targets.nbytes + self.up_weights.nbytes + self.rank.nbytes
@@ -0,0 +1,142 @@
+"""
+All-pairs delay impact of blocked segments.
+
+The baseline (unblocked) matrix comes from the topology cache. Only sources
+whose shortest-path tree actually uses a blocked segment are re-run: a
+segment (u, v) can lie on a shortest path from i only if
+|d(i, u) - d(i, v)| equals its travel time, which is checked for every
+station at once on the baseline matrix.
+"""
+
+import numpy as np
+
+from .routing import all_pairs_times
+
+# Above this many stations the n x n matrices get too large for a request
+MAX_MATRIX_STATIONS = 5000
+
+
+def changed_sources(baseline, edge_u, edge_v, old_weights, new_weights):
+    """
+    Station indices whose distances may change when segments (u, v) go from
+    old_weights to new_weights (inf = closed).
+
+    Triangle inequality gives |d(i, u) - d(i, v)| <= weight. A slower
+    segment matters only to sources where equality holds (up to float32
+    rounding), i.e. it lies on some shortest path; a faster one only where
+    the new weight beats the gap. Errs on the side of recomputing.
+    """
+    du = baseline[:, edge_u]
+    dv = baseline[:, edge_v]
+    old_weights = np.asarray(old_weights, dtype=np.float64)
+    new_weights = np.asarray(new_weights, dtype=np.float64)
+
+    with np.errstate(invalid="ignore"):
+        gap = np.abs(du - dv)
+        tolerance = 1e-3 + 1e-5 * np.minimum(du, dv)
+        slower = np.isfinite(gap) & (gap >= old_weights - tolerance) & (new_weights > old_weights)
+        faster = (gap > new_weights + tolerance) & (new_weights < old_weights)
+    return np.nonzero((slower | faster).any(axis=1))[0]
+
+
+def affected_sources(topology, baseline, blocked_edges):
+    """Station indices whose distances may change when blocked_edges close."""
+    edges = np.asarray(blocked_edges, dtype=np.int64)
+    return changed_sources(
+        baseline, topology.edge_u[edges], topology.edge_v[edges], topology.time_min[edges], np.inf
+    )
+
+
+def blocked_all_pairs(topology, blocked_edges, baseline=None):
+    """
+    All-pairs times with blocked_edges closed.
+    Returns (matrix, number of recomputed sources).
+    """
+    if baseline is None:
+        baseline = topology.baseline_matrix()
+    if not blocked_edges:
+        return baseline, 0
+
+    sources = affected_sources(topology, baseline, blocked_edges)
+    blocked = baseline.copy()
+    if len(sources):
+        blocked[sources] = all_pairs_times(topology.adjacency(blocked_edges), sources)
+    return blocked, len(sources)
+
+
+def delay_impact(topology, blocked_edges, od_weights=None, top_k=10):
+    """
+    Compare baseline and blocked all-pairs travel times.
+
+    od_weights: optional (origin indices, destination indices, weights)
+    arrays, e.g. daily passengers per origin-destination pair.
+
+    Returns:
+    {
+        "baseline": matrix, "blocked": matrix, "delta": matrix,
+        "aggregates": dict, "most_delayed_pairs": list,
+        "recomputed_sources": int
+    }
+    """
+    n = topology.num_stations
+    if n > MAX_MATRIX_STATIONS:
+        raise ValueError(
+            f"Delay matrix limited to {MAX_MATRIX_STATIONS} stations, network has {n}"
+        )
+
+    # Sized by MAX_MATRIX_STATIONS, so keep it for later requests
+    baseline = topology.baseline_matrix(cache=True)
+    blocked, recomputed = blocked_all_pairs(topology, blocked_edges, baseline)
+
+    with np.errstate(invalid="ignore"):
+        delta = blocked - baseline  # inf: newly disconnected, nan: never connected
+
+    # Each unordered station pair once (matrices are symmetric)
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+    connected = np.isfinite(baseline) & upper
+    disconnected = connected & ~np.isfinite(blocked)
+    delayed = connected & np.isfinite(blocked) & (delta > 1e-3)
+    delays = delta[delayed]
+
+    aggregates = {
+        "station_pairs": int(connected.sum()),
+        "pairs_delayed": int(delayed.sum()),
+        "pairs_disconnected": int(disconnected.sum()),
+        "total_delay_min": round(float(delays.sum()), 2),
+        "mean_delay_min": round(float(delays.mean()), 2) if len(delays) else 0.0,
+        "max_delay_min": round(float(delays.max()), 2) if len(delays) else 0.0
+    }
+
+    if od_weights is not None:
+        origins, destinations, weights = (np.asarray(a) for a in od_weights)
+        od_delta = delta[origins, destinations]
+        od_connected = np.isfinite(baseline[origins, destinations])
+        stranded = od_connected & ~np.isfinite(od_delta)
+        od_delayed = od_connected & np.isfinite(od_delta) & (od_delta > 1e-3)
+        aggregates.update({
+            "passenger_weighted_delay_min": round(float((weights[od_delayed] * od_delta[od_delayed]).sum()), 2),
+            "passengers_delayed": round(float(weights[od_delayed].sum()), 2),
+            "passengers_stranded": round(float(weights[stranded].sum()), 2)
+        })
+
+    rows, cols = np.nonzero(delayed)
+    order = np.argsort(-delays, kind="stable")[:top_k]
+    most_delayed = [
+        {
+            "origin": topology.stations[rows[i]],
+            "destination": topology.stations[cols[i]],
+            "baseline_min": round(float(baseline[rows[i], cols[i]]), 2),
+            "blocked_min": round(float(blocked[rows[i], cols[i]]), 2),
+            "delay_min": round(float(delays[i]), 2)
+        }
+        for i in order
+    ]
+
+    return {
+        "baseline": baseline,
+        "blocked": blocked,
+        "delta": delta,
+        "aggregates": aggregates,
+        "most_delayed_pairs": most_delayed,
+        "recomputed_sources": recomputed
+    }
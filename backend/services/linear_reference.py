@@ -0,0 +1,187 @@
+"""
+Linear referencing: (line, chainage km) positions to segments.
+
+Track-recording cars report readings by line and kilometre post. Each
+line's segments are ordered along the line (from the line's end station
+that comes first in the station list) and their start chainages, built
+from length_km, are stored in one sorted array keyed by
+    line_code * stride + km
+with stride larger than any line, so a single np.searchsorted locates
+millions of readings on every line at once. A reading exactly on a
+segment boundary belongs to the segment that starts there.
+
+Lines that are not a single path (branches, several pieces) have no
+unambiguous chainage and are left out of the index (skipped_lines).
+"""
+
+import bisect
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Feature aggregation per segment, in PredictionAgent.feature_names order:
+# worst reading for condition measures, average for the environment
+FEATURE_AGGREGATIONS = {
+    "wear_level": "max",
+    "alignment_deviation": "max",
+    "vibration_index": "max",
+    "environment_factor": "mean",
+    "load_cycles": "max",
+}
+# Readings this far past the end of a line still map to its last segment
+END_TOLERANCE_KM = 1e-6
+
+
+def _order_line(topology, edges):
+    """
+    Edge indices of one line in order along it, or None if the line is not
+    a single path (or cycle).
+    """
+    incident = defaultdict(list)
+    for e in edges:
+        incident[int(topology.edge_u[e])].append(e)
+        incident[int(topology.edge_v[e])].append(e)
+    if any(len(v) > 2 for v in incident.values()):
+        return None
+
+    ends = sorted(s for s, v in incident.items() if len(v) == 1)
+    if ends:
+        if len(ends) != 2:
+            return None
+        node = ends[0]
+    else:
+        node = min(incident)  # cycle
+
+    ordered = []
+    used = set()
+    while True:
+        step = [e for e in incident[node] if e not in used]
+        if not step:
+            break
+        edge = step[0]
+        used.add(edge)
+        ordered.append(edge)
+        u, v = int(topology.edge_u[edge]), int(topology.edge_v[edge])
+        node = v if node == u else u
+    return ordered if len(ordered) == len(edges) else None
+
+
+class LinearReference:
+    """Chainage index over a topology's lines; read-only once built."""
+
+    def __init__(self, topology):
+        self.segment_ids = topology.segment_ids
+        self.length_km = topology.length_km
+
+        by_line = defaultdict(list)
+        for edge, line in enumerate(topology.lines):
+            if line:
+                by_line[line].append(edge)
+
+        self.lines = []
+        self.skipped_lines = []
+        ordered_edges = []
+        for line, edges in by_line.items():
+            ordered = _order_line(topology, edges)
+            if ordered is None:
+                self.skipped_lines.append(line)
+                continue
+            self.lines.append(line)
+            ordered_edges.append(np.asarray(ordered, dtype=np.int64))
+
+        self.line_code = {line: i for i, line in enumerate(self.lines)}
+        lengths = [topology.length_km[edges].astype(np.float64) for edges in ordered_edges]
+        self.line_length = np.array([l.sum() for l in lengths])
+        self.stride = float(2 ** np.ceil(np.log2(self.line_length.max() + 2))) if len(lengths) else 1.0
+
+        # Start chainage of every segment, all lines in one sorted key array
+        starts = [np.concatenate([[0.0], np.cumsum(l)[:-1]]) for l in lengths]
+        self.chainage = {line: s.tolist() for line, s in zip(self.lines, starts)}
+        self.keys = np.concatenate(
+            [code * self.stride + s for code, s in enumerate(starts)]
+        ) if starts else np.zeros(0)
+        self.edges = np.concatenate(ordered_edges) if ordered_edges else np.zeros(0, dtype=np.int64)
+        self._line_edges = dict(zip(self.lines, ordered_edges))
+
+    def serves(self, topology):
+        """True for any snapshot of the network the index was built from."""
+        return topology.segment_ids is self.segment_ids and topology.length_km is self.length_km
+
+    def locate(self, line, km):
+        """segment_id at chainage km on line, or None."""
+        code = self.line_code.get(line)
+        if code is None or not 0 <= km <= self.line_length[code] + END_TOLERANCE_KM:
+            return None
+        edge = self._line_edges[line][bisect.bisect_right(self.chainage[line], km) - 1]
+        return int(self.segment_ids[edge])
+
+    def locate_many(self, lines, km):
+        """
+        Edge indices for arrays of line names and chainages (-1 where the
+        line is unknown or km is off the line).
+        """
+        km = np.asarray(km, dtype=np.float64)
+        # Hash-based factorize: a handful of line names over millions of rows
+        inverse, names = pd.factorize(np.asarray(lines))
+        codes = np.array([self.line_code.get(str(n), -1) for n in names] + [-1], dtype=np.int64)[inverse]
+
+        known = codes >= 0
+        limit = np.where(known, self.line_length[np.maximum(codes, 0)] if len(self.lines) else 0.0, 0.0)
+        valid = known & (km >= 0) & (km <= limit + END_TOLERANCE_KM)
+
+        result = np.full(len(km), -1, dtype=np.int64)
+        keys = codes[valid] * self.stride + np.minimum(km[valid], limit[valid])
+        result[valid] = self.edges[np.searchsorted(self.keys, keys, side="right") - 1]
+        return result
+
+    def aggregate_features(self, lines, km, features):
+        """
+        Bucket readings to segments and aggregate them into model features.
+
+        features: (n_readings, 5) array in FEATURE_AGGREGATIONS order
+
+        Returns:
+        {
+            "segment_ids": array,        # segments with at least one reading
+            "features": (k, 5) array,
+            "readings": per-segment reading counts,
+            "unmatched": readings that matched no segment
+        }
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or features.shape[1] != len(FEATURE_AGGREGATIONS):
+            raise ValueError(f"features must have {len(FEATURE_AGGREGATIONS)} columns")
+        if len(features) != len(km) or len(lines) != len(km):
+            raise ValueError("lines, km and features must have the same length")
+        if not np.all(np.isfinite(features)):
+            raise ValueError("features must be finite")
+
+        edges = self.locate_many(lines, km)
+        matched = edges >= 0
+        edges, features = edges[matched], features[matched]
+
+        # Order within a segment does not matter for max/mean
+        order = np.argsort(edges)
+        edges, features = edges[order], features[order]
+        if len(edges):
+            starts = np.concatenate([[0], np.nonzero(np.diff(edges))[0] + 1])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        segment_edges = edges[starts]
+        counts = np.diff(np.append(starts, len(edges)))
+
+        aggregated = np.empty((len(segment_edges), features.shape[1]))
+        if len(segment_edges):
+            for j, how in enumerate(FEATURE_AGGREGATIONS.values()):
+                if how == "max":
+                    aggregated[:, j] = np.maximum.reduceat(features[:, j], starts)
+                else:
+                    aggregated[:, j] = np.add.reduceat(features[:, j], starts) / counts
+
+        return {
+            "segment_ids": self.segment_ids[segment_edges],
+            "features": aggregated,
+            "readings": counts,
+            "unmatched": int((~matched).sum())
+        }
@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..agents.prediction_agent import PredictionAgent
 from ..agents.decision_agent import DecisionAgent
 from ..agents.explanation_agent import ExplanationAgent
@@ -5,6 +7,8 @@ from ..agents.summary_agent import SummaryAgent
 from ..services.llm_service import LLMService
 from ..services.notification_service import NotificationService
 from ..services.diversion_service import DiversionService
+from ..services.metrics import SEGMENTS_PROCESSED, timed
+from ..services.tracing import span
 
 class MaintenanceService:
     def __init__(self):
@@ -16,24 +20,40 @@ class MaintenanceService:
         self.notifier = NotificationService()
         self.diversion_service = DiversionService()
 
-    def assess_segment(self, features, feature_importance,segment_id=None):
-        fault, confidence = self.predictor.predict(features)
-        decision = self.decision.decide(fault)
-        explanation = self.explainer.explain(
-            fault, confidence, feature_importance
-        )
+    @staticmethod
+    def _is_critical(fault, priority):
+        return fault == "Severe_Degradation" or priority >= 3
+
+    def assess_segment(self, features, feature_importance, segment_id=None, plan_diversion=True):
+        with span("segment", segment_id=segment_id) as segment_span:
+            return self._assess_segment(features, feature_importance, segment_id, plan_diversion, segment_span)
+
+    def _assess_segment(self, features, feature_importance, segment_id, plan_diversion, segment_span):
+        with timed("inference"):
+            fault, confidence = self.predictor.predict(features)
+        SEGMENTS_PROCESSED.inc()
+        segment_span.set(fault=fault, confidence=confidence)
+        with timed("decision"):
+            decision = self.decision.decide(fault)
+        with timed("explanation"):
+            explanation = self.explainer.explain(
+                fault, confidence, feature_importance
+            )
         print("FAULT:", fault, "PRIORITY:", decision["priority"])
         diversion_plan = None
-        if fault == "Severe_Degradation" or decision["priority"] >= 3:
+        if self._is_critical(fault, decision["priority"]):
             if segment_id is not None:
-                self.notifier.send_alert(
-                    segment_id=segment_id,
-                    fault=fault,
-                    priority=decision["priority"],
-                    confidence=confidence
-                )
+                with timed("notification"):
+                    self.notifier.send_alert(
+                        segment_id=segment_id,
+                        fault=fault,
+                        priority=decision["priority"],
+                        confidence=confidence
+                    )
                 # Calculate diversion plan for critical issues
-                diversion_plan = self.diversion_service.get_diversion_plan(segment_id)
+                if plan_diversion:
+                    with timed("diversion"):
+                        diversion_plan = self.diversion_service.get_diversion_plan(segment_id)
 
         return {
             "fault": fault,
@@ -44,26 +64,22 @@ class MaintenanceService:
             "diversion_plan": diversion_plan
         }
 
-    # ✅ NEW: batch assessment
-    def assess_segments_batch(self, segments, feature_importance):
-        """
-        segments: list of dicts
-        [
-          {
-            "segment_id": 1,
-            "features": [...]
-          },
-          ...
-        ]
+    def _assess_segments(self, segments, feature_importance, network_path=True):
         """
+        Per-segment assessment plus one shared diversion planning pass
+        over every critical segment. network_path=False skips the corridor
+        path; with no critical segment the planner is then not run at all.
 
+        Returns (results, network_path or None).
+        """
         results = []
 
         for segment in segments:
             result = self.assess_segment(
                 segment["features"],
                 feature_importance,
-                segment_id=segment["segment_id"]
+                segment_id=segment["segment_id"],
+                plan_diversion=False
             )
 
             results.append({
@@ -71,7 +87,39 @@ class MaintenanceService:
                 **result
             })
 
+        critical = [r for r in results if self._is_critical(r["fault"], r["priority"])]
+        if not critical and not network_path:
+            return results, None
+
+        critical_segment_ids = list(dict.fromkeys(r["segment_id"] for r in critical))
+        with timed("diversion"):
+            plan = self.diversion_service.plan_network_diversions(
+                critical_segment_ids, network_path=network_path
+            )
+        # Only critical rows get a plan (not a healthy reading of the same segment)
+        for r in critical:
+            r["diversion_plan"] = plan["diversion_plans"][r["segment_id"]]
+
+        return results, plan["network_path"]
+
+    # ✅ NEW: batch assessment
+    def assess_segments_batch(self, segments, feature_importance):
+        """
+        segments: list of dicts
+        [
+          {
+            "segment_id": 1,
+            "features": [...]
+          },
+          ...
+        ]
+
+        Per-segment results only, so the corridor path is not computed.
+        """
+
+        results, _ = self._assess_segments(segments, feature_importance, network_path=False)
         return results
+
     def assess_network(self, segments, feature_importance):
         """
         Full network-level assessment:
@@ -79,23 +127,18 @@ class MaintenanceService:
         - aggregated summary
         """
 
-        segment_results = self.assess_segments_batch(
+        # Detours and the network-wide path (Master Graph) come from one pass
+        segment_results, network_path = self._assess_segments(
             segments,
             feature_importance
         )
-        summary_context = self.summary_agent.build_context(segment_results)
-
-        network_summary_text = self.llm.generate_network_summary(
-            summary_context
-        )
+        with timed("summary"):
+            summary_context = self.summary_agent.build_context(segment_results)
 
-        # Calculate network-wide path (Master Graph)
-        critical_segment_ids = [
-            s["segment_id"] for s in segment_results 
-            if s["priority"] >= 3 or s["fault"] == "Severe_Degradation"
-        ]
-        
-        network_path = self.diversion_service.get_network_path(critical_segment_ids)
+        with timed("llm"):
+            network_summary_text = self.llm.generate_network_summary(
+                summary_context
+            )
 
         return {
             "segments": segment_results,
@@ -106,6 +149,56 @@ class MaintenanceService:
             }
         }
 
+    def assess_chainage_readings(self, lines, km, features, feature_importance):
+        """
+        Batch assessment from track-recording readings located by line and
+        chainage (km) instead of segment_id.
+
+        features: one [wear_level, alignment_deviation, vibration_index,
+        environment_factor, load_cycles] row per reading
+        """
+        mapped = self.diversion_service.aggregate_chainage_readings(lines, km, features)
+        results = self.assess_segments_batch(mapped["segments"], feature_importance) if mapped["segments"] else []
+        for result, segment in zip(results, mapped["segments"]):
+            result["readings"] = segment["readings"]
+
+        return {
+            "count": len(results),
+            "results": results,
+            "unmatched_readings": mapped["unmatched_readings"],
+            "skipped_lines": mapped["skipped_lines"]
+        }
+
+    def simulate_disruption(self, segments, od_weights=None, n_scenarios=None, seed=None, workers=None):
+        """
+        Expected disruption per segment from sampled failure scenarios.
+
+        A segment's failure probability is the predicted probability of any
+        fault class that would make it critical (and so be closed).
+        """
+        if not segments:
+            raise ValueError("No segments to simulate")
+
+        with timed("inference"):
+            classes, probabilities = self.predictor.predict_proba_batch(
+                [segment["features"] for segment in segments]
+            )
+        SEGMENTS_PROCESSED.inc(len(segments))
+        critical = np.array([
+            self._is_critical(label, self.decision.decide(label)["priority"])
+            for label in classes
+        ])
+        failure_probs = probabilities[:, critical].sum(axis=1)
+
+        options = {k: v for k, v in (("n_scenarios", n_scenarios), ("seed", seed)) if v is not None}
+        return self.diversion_service.simulate_disruption(
+            [segment["segment_id"] for segment in segments],
+            failure_probs,
+            od_weights=od_weights,
+            workers=workers,
+            **options
+        )
+
     def assess_apu(self, severity, confidence, car_id=None, rul_hours=None):
         """
         APU-specific assessment with OpenAI summaries and email alerts.
@@ -137,17 +230,19 @@ class MaintenanceService:
             "fault": fault
         }
         
-        detailed_explanation = self.llm.generate_apu_explanation(apu_context)
+        with timed("llm"):
+            detailed_explanation = self.llm.generate_apu_explanation(apu_context)
         
         # Send alert if priority is high
         if priority >= 2:
             if car_id is not None:
-                self.notifier.send_alert(
-                    segment_id=car_id,
-                    fault=fault,
-                    priority=priority,
-                    confidence=confidence
-                )
+                with timed("notification"):
+                    self.notifier.send_alert(
+                        segment_id=car_id,
+                        fault=fault,
+                        priority=priority,
+                        confidence=confidence
+                    )
         
         return {
             "fault": fault,
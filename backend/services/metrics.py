@@ -0,0 +1,245 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are plain Python objects: an observation is a
+perf_counter() pair, a bisect over the bucket bounds and two additions
+under a lock. metric.labels(...) returns the series for a label tuple,
+created on first use. Everything is cumulative since process start, as
+Prometheus expects. Scrape GET /metrics.
+
+Time a stage with:
+    with timed("inference"):
+        ...
+"""
+
+import bisect
+import itertools
+import threading
+import time
+
+from .tracing import span
+
+# Seconds; 0.1 ms .. 10 s, covering a tree lookup up to an SMTP/OpenAI call
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Latency summary bucket upper bounds (ms), log-spaced 10 us .. 10 s
+LATENCY_BUCKETS_MS = tuple(10 ** (-2 + i / 10) for i in range(61))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'le="{extra}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        """The series for these label values (created on first use)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_series())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_series(self):
+        for values, child in self._series():
+            yield f"{self.name}{_label_text(self.labelnames, values)} {child.value:g}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._le = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_series(self):
+        for values, child in self._series():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for le, count in zip(self._le, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {total:.6f}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class LatencyHistogram:
+    """
+    Millisecond latencies in LATENCY_BUCKETS_MS, summarized as count, mean
+    and bucket-resolution p50/p95/p99 for stats endpoints. Not locked:
+    callers serialize add() and summary().
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+
+    def summary(self):
+        n = sum(self.counts)
+        if n == 0:
+            return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None}
+        cumulative = [c / n for c in itertools.accumulate(self.counts)]
+        bounds = LATENCY_BUCKETS_MS + (float("inf"),)
+
+        def quantile(q):
+            # Upper bound of the bucket holding the q-quantile
+            return bounds[bisect.bisect_left(cumulative, q)]
+
+        return {
+            "count": n,
+            "mean": self.total_ms / n,
+            "p50": quantile(0.5),
+            "p95": quantile(0.95),
+            "p99": quantile(0.99)
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "pm_stage_duration_seconds",
+    "Time spent in each assessment stage.",
+    ["stage"]
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "pm_request_duration_seconds",
+    "HTTP request time by route and method.",
+    ["route", "method"]
+))
+SEGMENTS_PROCESSED = REGISTRY.register(Counter(
+    "pm_segments_processed_total",
+    "Track segments run through fault prediction."
+))
+CACHE_HITS = REGISTRY.register(Counter(
+    "pm_cache_hits_total",
+    "Responses served from a cache.",
+    ["cache"]
+))
+ALERTS_SENT = REGISTRY.register(Counter(
+    "pm_alerts_total",
+    "Maintenance alerts by outcome (sent, logged when email is off, failed).",
+    ["outcome"]
+))
+
+
+class timed:
+    """
+    Context manager adding the block's wall time to a stage histogram, and
+    a span of the same name to the request's trace if one is recorded.
+    """
+
+    __slots__ = ("_child", "_span", "_start")
+
+    def __init__(self, stage):
+        self._child = STAGE_SECONDS.labels(stage)
+        self._span = span(stage)
+
+    def __enter__(self):
+        self._span.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return self._span.__exit__(*exc)
@@ -0,0 +1,85 @@
+"""
+Confidence-gated cascade: a cheap model first, the full model only where
+the cheap one is unsure.
+
+Every batch goes through the fast model. Rows whose top-class probability
+is below the threshold are re-predicted by the full model, and their
+probabilities replace the fast ones. With most segments clearly Normal,
+most rows never reach the full forest.
+
+The fast model must predict the same classes as the full model, in any
+order; its columns are re-ordered per call to the full model's classes_.
+If the full model was swapped for one with other classes, the batch goes
+to the full model alone.
+"""
+
+import threading
+
+import numpy as np
+
+
+class ModelCascade:
+    def __init__(self, fast_model, threshold, fast_version=None):
+        """
+        fast_model: anything with predict_proba and classes_
+        threshold: rows with fast confidence < threshold are escalated
+        """
+        self.fast_model = fast_model
+        self.fast_version = fast_version
+        self.set_threshold(threshold)
+        self._fast_index = {str(c): i for i, c in enumerate(fast_model.classes_)}
+        self._lock = threading.Lock()
+        self.batches = self.rows = self.escalated = 0
+
+    def set_threshold(self, threshold):
+        if not 0 <= threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        self.threshold = float(threshold)
+
+    def _columns(self, classes):
+        try:
+            return [self._fast_index[str(c)] for c in classes]
+        except KeyError:
+            return None
+
+    def predict_proba(self, model, X):
+        """Probabilities in model.classes_ order for every row of X."""
+        columns = self._columns(model.classes_)
+        if columns is None or len(columns) != len(self._fast_index):
+            probabilities = model.predict_proba(X)
+            escalated = len(X)
+        else:
+            probabilities = np.asarray(self.fast_model.predict_proba(X), dtype=np.float64)[:, columns]
+            escalate = probabilities.max(axis=1) < self.threshold
+            escalated = int(escalate.sum())
+            if escalated:
+                rows = X[escalate] if hasattr(X, "iloc") else np.asarray(X)[escalate]
+                probabilities[escalate] = model.predict_proba(rows)
+
+        with self._lock:
+            self.batches += 1
+            self.rows += len(X)
+            self.escalated += escalated
+        return probabilities
+
+    def stats(self):
+        """
+        Returns:
+        {
+            "fast_version": int or None,
+            "threshold": float,
+            "batches": int,
+            "rows": int,
+            "escalated": int,
+            "escalated_fraction": float or None
+        }
+        """
+        with self._lock:
+            return {
+                "fast_version": self.fast_version,
+                "threshold": self.threshold,
+                "batches": self.batches,
+                "rows": self.rows,
+                "escalated": self.escalated,
+                "escalated_fraction": self.escalated / self.rows if self.rows else None
+            }
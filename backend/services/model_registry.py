@@ -0,0 +1,306 @@
+"""
+Versioned model registry with hot swapping.
+
+Layout (root defaults to backend/models/registry):
+
+    <root>/<name>/<version>/metadata.json
+    <root>/<name>/<version>/<model files>
+
+Versions are increasing integers. publish() copies the model files in
+under a temporary name and renames the directory into place, so a
+version either exists complete or not at all. metadata.json records each
+file's sha256, the feature order, the classes and optional sample inputs.
+
+A ModelSlot serves one model name. Readers call current() once per
+request and use that (model, metadata) pair throughout. A reload runs in a
+background thread:
+
+    verify hashes -> check feature order -> load -> warm up -> swap
+
+The swap is a single reference assignment, so requests already running
+finish on the model they started with and nothing is dropped. If any step
+fails, the active model stays in place and the error is kept in status().
+A slot can also poll the registry and load new versions as they appear
+(watch()).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "registry")
+METADATA_FILE = "metadata.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_versions(name, root=REGISTRY_DIR):
+    """Published versions of name, ascending."""
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        int(entry) for entry in os.listdir(directory)
+        if entry.isdigit() and os.path.exists(os.path.join(directory, entry, METADATA_FILE))
+    )
+
+
+def version_dir(name, version, root=REGISTRY_DIR):
+    return os.path.join(root, name, str(version))
+
+
+def read_metadata(name, version, root=REGISTRY_DIR):
+    with open(os.path.join(version_dir(name, version, root), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def publish(name, files, feature_names, classes=None, sample_inputs=None, root=REGISTRY_DIR):
+    """
+    Add a new version of a model.
+
+    files: {role: path}, e.g. {"model": "rf.pkl"} or
+           {"model": "gru_model.keras", "scaler": "scaler.pkl"}
+    sample_inputs: rows used to warm the model up before it is swapped in
+
+    Returns the new version's metadata.
+    """
+    if not files:
+        raise ValueError("At least one model file is required")
+    missing = [path for path in files.values() if not os.path.isfile(path)]
+    if missing:
+        raise ValueError(f"Model files not found: {missing}")
+
+    os.makedirs(os.path.join(root, name), exist_ok=True)
+    versions = list_versions(name, root)
+    version = versions[-1] + 1 if versions else 1
+
+    staging = os.path.join(root, name, f".staging-{version}-{os.getpid()}")
+    os.makedirs(staging)
+    try:
+        entries = {}
+        for role, path in files.items():
+            filename = os.path.basename(path)
+            shutil.copy2(path, os.path.join(staging, filename))
+            entries[role] = {"file": filename, "sha256": file_sha256(path)}
+
+        metadata = {
+            "name": name,
+            "version": version,
+            "files": entries,
+            "feature_names": list(feature_names),
+            "classes": None if classes is None else [str(c) for c in classes],
+            "sample_inputs": sample_inputs,
+            "published_at": time.time()
+        }
+        with open(os.path.join(staging, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+        # Fails if another publisher took this version number meanwhile
+        os.rename(staging, version_dir(name, version, root))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return metadata
+
+
+class ModelSlot:
+    def __init__(self, name, loader, feature_names=None, warmup=None, on_swap=None, root=REGISTRY_DIR):
+        """
+        loader(paths) -> model, with paths {role: file path}
+        feature_names: required feature order (a version with another
+                       order is refused)
+        warmup(model, metadata): runs sample predictions and raises if
+                       the output is unusable
+        on_swap(model, metadata): called after each swap (e.g. to hand the
+                       model to an agent)
+        """
+        self.name = name
+        self.root = root
+        self.loader = loader
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.warmup = warmup
+        self.on_swap = on_swap
+
+        self._active = (None, None)
+        self._load_lock = threading.Lock()
+        self._loading = None
+        self._last_error = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def current(self):
+        """(model, metadata) in service; (None, None) before the first load."""
+        return self._active
+
+    def set(self, model, metadata):
+        """Serve a model loaded outside the registry (e.g. the fixed startup path)."""
+        self._swap(model, metadata)
+
+    def _swap(self, model, metadata):
+        self._active = (model, metadata)
+        if self.on_swap is not None:
+            self.on_swap(model, metadata)
+
+    def versions(self):
+        return list_versions(self.name, self.root)
+
+    def _prepare(self, version):
+        """Verify, load and warm one version; returns (model, metadata)."""
+        metadata = read_metadata(self.name, version, self.root)
+        directory = version_dir(self.name, version, self.root)
+
+        paths = {}
+        for role, entry in metadata["files"].items():
+            path = os.path.join(directory, entry["file"])
+            if file_sha256(path) != entry["sha256"]:
+                raise ValueError(f"{self.name} v{version}: {entry['file']} does not match its sha256")
+            paths[role] = path
+
+        if self.feature_names is not None and metadata["feature_names"] != self.feature_names:
+            raise ValueError(
+                f"{self.name} v{version}: feature order {metadata['feature_names']} "
+                f"does not match {self.feature_names}"
+            )
+
+        model = self.loader(paths)
+        model_classes = getattr(model, "classes_", None)
+        if metadata.get("classes") is not None and model_classes is not None:
+            if [str(c) for c in model_classes] != metadata["classes"]:
+                raise ValueError(f"{self.name} v{version}: classes do not match metadata")
+
+        if self.warmup is not None:
+            self.warmup(model, metadata)
+        return model, {**metadata, "loaded_at": time.time()}
+
+    def _resolve(self, version):
+        """version, or the latest one if None; ValueError if not published."""
+        versions = self.versions()
+        if version is None:
+            if not versions:
+                raise ValueError(f"No published versions of {self.name}")
+            return versions[-1]
+        if version not in versions:
+            raise ValueError(f"Unknown version {version} of {self.name}")
+        return version
+
+    def candidate(self, version=None):
+        """
+        Verify, load and warm a version (default: the latest) without
+        swapping it in, e.g. to shadow it. Returns (model, metadata);
+        raises ValueError.
+        """
+        version = self._resolve(version)
+        try:
+            return self._prepare(version)
+        except Exception as e:
+            raise ValueError(str(e)) from e
+
+    def load(self, version=None):
+        """
+        Load a version (default: the latest) and swap it in, in the calling
+        thread. Returns status(); raises ValueError if the version cannot be
+        served, leaving the active model in place.
+        """
+        with self._load_lock:
+            self._load(version)
+        return self.status()
+
+    def _load(self, version):
+        """load() body; the caller holds _load_lock."""
+        version = self._resolve(version)
+
+        self._loading = version
+        try:
+            model, metadata = self._prepare(version)
+        except Exception as e:
+            self._last_error = {"version": version, "error": str(e)}
+            print(f"⚠ {self.name} v{version} not loaded: {e}")
+            raise ValueError(str(e)) from e
+        finally:
+            self._loading = None
+
+        self._swap(model, metadata)
+        self._last_error = None
+        print(f"✓ {self.name} v{version} loaded")
+
+    def reload(self, version=None):
+        """
+        Load in a background thread; returns status() straight away.
+        Raises ValueError if a load is already running.
+        """
+        if version is not None and version not in self.versions():
+            raise ValueError(f"Unknown version {version} of {self.name}")
+        if not self._load_lock.acquire(blocking=False):
+            raise ValueError(f"{self.name} is already loading")
+
+        def run():
+            try:
+                self._load(version)
+            except ValueError:
+                pass  # kept in status()["last_error"]
+            finally:
+                self._load_lock.release()
+
+        self._loading = version if version is not None else "latest"
+        threading.Thread(target=run, name=f"reload-{self.name}", daemon=True).start()
+        return self.status()
+
+    def watch(self, interval):
+        """Poll the registry every interval seconds and load newer versions."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                versions = self.versions()
+                _, metadata = self._active
+                active = (metadata or {}).get("version")
+                failed = (self._last_error or {}).get("version")
+                if not versions or versions[-1] in (active, failed):
+                    continue
+                if self._load_lock.acquire(blocking=False):
+                    try:
+                        self._load(versions[-1])
+                    except ValueError:
+                        pass
+                    finally:
+                        self._load_lock.release()
+
+        self._watcher = threading.Thread(target=run, name=f"watch-{self.name}", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        """
+        Returns:
+        {
+            "name": str,
+            "active_version": int or None,   # None: not from the registry
+            "loaded_at": float or None,
+            "files": {role: {"file", "sha256"}} or None,
+            "loading": version being loaded or None,
+            "last_error": {"version", "error"} or None,
+            "available_versions": [int]
+        }
+        """
+        _, metadata = self._active
+        metadata = metadata or {}
+        return {
+            "name": self.name,
+            "active_version": metadata.get("version"),
+            "loaded_at": metadata.get("loaded_at"),
+            "files": metadata.get("files"),
+            "loading": self._loading,
+            "last_error": self._last_error,
+            "available_versions": self.versions()
+        }
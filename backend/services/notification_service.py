@@ -5,6 +5,8 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+from .metrics import ALERTS_SENT
+
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -43,6 +45,7 @@ Immediate maintenance action is recommended.
         if not self.enabled:
             print(f"\n[ALERT] {subject}")
             print(body)
+            ALERTS_SENT.labels("logged").inc()
             return
 
         msg = MIMEMultipart()
@@ -56,5 +59,7 @@ Immediate maintenance action is recommended.
                 server.login(self.sender_email, self.sender_password)
                 server.send_message(msg)
                 print(f"✅ Alert email sent for Segment {segment_id}")
+            ALERTS_SENT.labels("sent").inc()
         except Exception as e:
             print("❌ Email alert failed:", e)
+            ALERTS_SENT.labels("failed").inc()
@@ -0,0 +1,274 @@
+"""
+On-demand sampling CPU and tracemalloc memory profiling of live requests.
+
+Nothing runs until a session is started. Before that the only cost is the
+request middleware checking one attribute for None. A session:
+- starts a sampler thread that reads every thread's stack
+  (sys._current_frames) each interval_ms. Only stacks inside one of the
+  profiled endpoint functions are kept, so other routes and idle threads
+  are left out.
+- if memory is set, starts tracemalloc and takes a snapshot at the start
+  and at the end. tracemalloc traces every allocation in the process
+  while it is on: expect it to slow all requests, not only profiled ones.
+- ends after `requests` matching requests complete, after `seconds`, or
+  when stopped, whichever is first (and after MAX_SECONDS at most).
+
+Results go to <output_dir>/<started>-<route>/:
+  cpu_folded.txt    collapsed stacks with sample counts (flamegraph.pl,
+                    speedscope)
+  cpu_top.txt       functions by self and inclusive samples
+  memory_top.txt    allocation growth by line, end vs start snapshot
+  memory_start.snapshot, memory_end.snapshot
+                    tracemalloc.Snapshot.load() for offline analysis
+  session.json      settings and counts
+"""
+
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "outputs", "profiles")
+INTERVAL_MS = 5.0
+MAX_SECONDS = 600
+TRACEMALLOC_FRAMES = 16
+TOP_N = 40
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    def __init__(self, endpoints, route=None, requests=None, seconds=None,
+                 interval_ms=INTERVAL_MS, memory=True, output_dir=PROFILE_DIR, on_finish=None):
+        """
+        endpoints: code objects of the endpoint functions to sample
+        route: route template to count requests for (None: any route)
+        requests / seconds: stop after this many matching requests / seconds
+        on_finish: called with the session once results are written
+        """
+        if requests is None and seconds is None:
+            raise ValueError("Give requests and/or seconds")
+        if requests is not None and requests < 1:
+            raise ValueError("requests must be >= 1")
+        if seconds is not None and not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be in (0, {MAX_SECONDS}]")
+        if not 0.5 <= interval_ms <= 1000:
+            raise ValueError("interval_ms must be between 0.5 and 1000")
+        self.endpoints = frozenset(endpoints)
+        self.route = route
+        self.target_requests = requests
+        self.seconds = seconds
+        self.interval_s = interval_ms / 1e3
+        self.memory = memory
+        self.on_finish = on_finish
+
+        self.started_at = time.time()
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route or "all").strip("_") or "root"
+        self.path = os.path.join(output_dir, time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at)) + f"-{slug}")
+
+        self.requests = 0
+        self.samples = self.ticks = 0
+        self._stacks = collections.Counter()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._finished = False
+        self.error = None
+        self._tracemalloc_started = False
+        self._memory_start = None
+
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._tracemalloc_started = True
+            self._memory_start = tracemalloc.take_snapshot()
+
+        self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._sampler.start()
+
+    @property
+    def running(self):
+        return not self._finished
+
+    def request_finished(self, route):
+        """Middleware hook: a request for route (template) completed."""
+        if self.route is not None and route != self.route:
+            return
+        with self._lock:
+            self.requests += 1
+            reached = self.target_requests is not None and self.requests >= self.target_requests
+        if reached:
+            self._done.set()
+
+    def stop(self):
+        """End the session now; returns once results are written."""
+        self._done.set()
+        self._sampler.join(timeout=30)
+
+    def _sample(self, own_id):
+        kept = 0
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            # Keep the stack from the outermost endpoint frame down
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i] in self.endpoints:
+                    self._stacks[tuple(reversed(stack[:i + 1]))] += 1
+                    kept += 1
+                    break
+        return kept
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + (self.seconds or MAX_SECONDS)
+        try:
+            while not self._done.is_set() and time.monotonic() < deadline:
+                kept = self._sample(own_id)
+                with self._lock:
+                    self.ticks += 1
+                    self.samples += kept
+                self._done.wait(self.interval_s)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self._finish()
+
+    def _finish(self):
+        memory_end = None
+        try:
+            if self.memory:
+                memory_end = tracemalloc.take_snapshot()
+        finally:
+            if self._tracemalloc_started:
+                tracemalloc.stop()
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            self._write_cpu()
+            if memory_end is not None:
+                self._write_memory(memory_end)
+            with open(os.path.join(self.path, "session.json"), "w") as f:
+                json.dump(self.status(), f, indent=2)
+            print(f"✓ Profile written to {self.path}")
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"⚠ Profile not written: {e}")
+        self._finished = True
+        if self.on_finish is not None:
+            self.on_finish(self)
+
+    def _write_cpu(self):
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        with open(os.path.join(self.path, "cpu_folded.txt"), "w") as f:
+            for stack, count in self._stacks.most_common():
+                labels = [_frame_label(code) for code in stack]
+                f.write(";".join(labels) + f" {count}\n")
+                self_counts[labels[-1]] += count
+                for label in set(labels):
+                    total_counts[label] += count
+
+        samples = max(1, self.samples)
+        with open(os.path.join(self.path, "cpu_top.txt"), "w") as f:
+            f.write(f"{self.samples} samples every {1e3 * self.interval_s:g} ms\n\n")
+            f.write(f"{'self':>7} {'self%':>6} {'total':>7} {'total%':>6}  function\n")
+            for label, count in self_counts.most_common(TOP_N):
+                total = total_counts[label]
+                f.write(f"{count:>7} {100 * count / samples:>5.1f}% {total:>7} {100 * total / samples:>5.1f}%  {label}\n")
+            f.write("\nBy inclusive samples:\n")
+            for label, total in total_counts.most_common(TOP_N):
+                f.write(f"{total:>7} {100 * total / samples:>5.1f}%  {label}\n")
+
+    def _write_memory(self, memory_end):
+        self._memory_start.dump(os.path.join(self.path, "memory_start.snapshot"))
+        memory_end.dump(os.path.join(self.path, "memory_end.snapshot"))
+        # The profiler's own bookkeeping is not interesting
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        end = memory_end.filter_traces(ignore)
+        diff = end.compare_to(self._memory_start.filter_traces(ignore), "lineno")
+        with open(os.path.join(self.path, "memory_top.txt"), "w") as f:
+            current = sum(stat.size for stat in end.statistics("filename"))
+            f.write(f"traced at end: {current / 1e6:.1f} MB\n\n")
+            f.write("Growth since the start, by line:\n")
+            for stat in diff[:TOP_N]:
+                f.write(f"{stat}\n")
+            f.write("\nLargest at the end, by line:\n")
+            for stat in end.statistics("lineno")[:TOP_N]:
+                f.write(f"{stat}\n")
+
+    def status(self):
+        """
+        Returns:
+        {
+            "route": str or None, "path": str, "running": bool,
+            "started_at": float, "elapsed_s": float,
+            "requests": int, "target_requests": int or None, "seconds": float or None,
+            "interval_ms": float, "memory": bool,
+            "ticks": int, "samples": int, "error": str or None
+        }
+        """
+        with self._lock:
+            return {
+                "route": self.route,
+                "path": self.path,
+                "running": self.running,
+                "started_at": self.started_at,
+                "elapsed_s": round(time.time() - self.started_at, 2),
+                "requests": self.requests,
+                "target_requests": self.target_requests,
+                "seconds": self.seconds,
+                "interval_ms": 1e3 * self.interval_s,
+                "memory": self.memory,
+                "ticks": self.ticks,
+                "samples": self.samples,
+                "error": self.error
+            }
+
+
+class Profiler:
+    """At most one ProfileSession at a time, plus the last one's status."""
+
+    def __init__(self, output_dir=PROFILE_DIR):
+        self.output_dir = output_dir
+        self.session = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def start(self, endpoints, **options):
+        """Start a ProfileSession; RuntimeError if one is running."""
+        with self._lock:
+            if self.session is not None:
+                raise RuntimeError(f"A profile of {self.session.route or 'all routes'} is running")
+            self.session = ProfileSession(
+                endpoints, output_dir=self.output_dir, on_finish=self._finished, **options
+            )
+            return self.session.status()
+
+    def _finished(self, session):
+        with self._lock:
+            self.last = session.status()
+            if self.session is session:
+                self.session = None
+
+    def stop(self):
+        """End the running session early; returns its final status or None."""
+        session = self.session
+        if session is None:
+            return None
+        session.stop()
+        return session.status()
+
+    def status(self):
+        session = self.session
+        return {
+            "running": None if session is None else session.status(),
+            "last": self.last
+        }
@@ -0,0 +1,135 @@
+"""
+Shortest-path routing over an array-backed Topology.
+"""
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+
+def _walk_predecessors(predecessors, source, target):
+    """Station indices from source to target using a predecessor row."""
+    path = [target]
+    node = target
+    while node != source:
+        node = predecessors[node]
+        if node < 0:
+            return None
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def describe_path(topology, adjacency, node_path):
+    """
+    Expand a station-index path into edges and totals:
+    {
+        "stations": [str],
+        "edges": [int],
+        "time_min": float,
+        "distance_km": float
+    }
+    """
+    edges = [adjacency.edge_between(u, v) for u, v in zip(node_path[:-1], node_path[1:])]
+    edge_array = np.asarray(edges, dtype=np.int64)
+    return {
+        "stations": [topology.stations[i] for i in node_path],
+        "edges": edges,
+        "time_min": float(topology.time_min[edge_array].sum()) if edges else 0.0,
+        "distance_km": float(topology.length_km[edge_array].sum()) if edges else 0.0
+    }
+
+
+def shortest_path(topology, source, target, blocked_edges=None, adjacency=None):
+    """
+    Fastest route (by time_min) between two stations, avoiding blocked edges.
+
+    source / target: station names
+    blocked_edges: iterable of edge indices to treat as closed
+    adjacency: optional prebuilt adjacency (e.g. shared blocked view)
+
+    Returns describe_path(...) output, or None if no route exists.
+    """
+    if adjacency is None:
+        adjacency = topology.adjacency(blocked_edges)
+
+    s = topology.station_index[source]
+    t = topology.station_index[target]
+    if s == t:
+        return describe_path(topology, adjacency, [s])
+
+    dist, predecessors = dijkstra(
+        adjacency.matrix, directed=True, indices=s, return_predecessors=True
+    )
+    if not np.isfinite(dist[t]):
+        return None
+
+    return describe_path(topology, adjacency, _walk_predecessors(predecessors, s, t))
+
+
+def all_pairs_times(adjacency, sources=None, chunk_size=256):
+    """
+    Travel-time matrix (float32) from each source to every station.
+
+    sources: station indices (default: all stations). Rows are computed in
+    chunks so the float64 Dijkstra output never exceeds chunk_size rows.
+    """
+    n = adjacency.matrix.shape[0]
+    sources = np.arange(n) if sources is None else np.asarray(sources, dtype=np.int64)
+    times = np.empty((len(sources), n), dtype=np.float32)
+    for start in range(0, len(sources), chunk_size):
+        chunk = sources[start:start + chunk_size]
+        times[start:start + len(chunk)] = dijkstra(adjacency.matrix, directed=True, indices=chunk)
+    return times
+
+
+def shortest_path_trees(adjacency, sources, limit=np.inf):
+    """
+    Shortest-path trees from several sources in one pass.
+
+    limit: stop growing each tree beyond this many minutes; stations further
+    away are reported as unreachable (inf).
+
+    Returns (dist, predecessors), each shaped (len(sources), n_stations).
+    """
+    dist, predecessors = dijkstra(
+        adjacency.matrix, directed=True, indices=list(sources),
+        return_predecessors=True, limit=limit
+    )
+    return np.atleast_2d(dist), np.atleast_2d(predecessors)
+
+
+def path_from_tree(topology, adjacency, dist_row, predecessor_row, source, target):
+    """
+    Route from a precomputed shortest-path tree (station indices in),
+    or None if target is unreachable.
+    """
+    if not np.isfinite(dist_row[target]):
+        return None
+    return describe_path(topology, adjacency, _walk_predecessors(predecessor_row, source, target))
+
+
+def endpoint_cover(edge_u, edge_v):
+    """
+    Greedy vertex cover of the given edges: a small set of stations such that
+    every edge has an endpoint in it. Failures sharing a station then share
+    one shortest-path tree.
+
+    Returns {edge position: covering station} over positions in edge_u/edge_v.
+    """
+    remaining = set(range(len(edge_u)))
+    incident = {}
+    for i, (u, v) in enumerate(zip(edge_u, edge_v)):
+        incident.setdefault(int(u), set()).add(i)
+        incident.setdefault(int(v), set()).add(i)
+
+    assignment = {}
+    while remaining:
+        station = max(incident, key=lambda s: len(incident[s]))
+        covered = incident.pop(station)
+        for i in covered:
+            assignment[i] = station
+            for other in (int(edge_u[i]), int(edge_v[i])):
+                if other != station and other in incident:
+                    incident[other].discard(i)
+        remaining -= covered
+    return assignment
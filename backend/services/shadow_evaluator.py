@@ -0,0 +1,192 @@
+"""
+Shadow evaluation of a candidate model on live prediction traffic.
+
+The primary path only flips a coin (sample_rate) and, for sampled batches,
+does a non-blocking put of references it already holds (inputs, primary
+labels, confidences, latency) onto a bounded queue. When the queue is
+full the batch is dropped and counted, never waited on. A background
+thread runs the candidate on the same inputs and folds the comparison into
+fixed-size accumulators: agreement, a primary x candidate label matrix,
+confidence deltas and latency histograms. Memory stays bounded however
+long shadowing runs.
+
+The candidate competes with request threads for CPU (and the GIL), so
+sample_rate sets how much extra work shadowing adds.
+"""
+
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from .metrics import LatencyHistogram
+
+QUEUE_SIZE = 64
+
+
+class ShadowEvaluator:
+    def __init__(self, candidate, classes, sample_rate=0.1, queue_size=QUEUE_SIZE,
+                 candidate_version=None, seed=None):
+        """
+        candidate: model with predict_proba and classes_
+        classes: the primary model's classes (label matrix axes)
+        sample_rate: share of inference batches copied to the candidate
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.candidate = candidate
+        self.candidate_version = candidate_version
+        self.sample_rate = sample_rate
+        self.classes = [str(c) for c in classes]
+        self._class_index = {c: i for i, c in enumerate(self.classes)}
+        self._candidate_classes = np.asarray([str(c) for c in candidate.classes_])
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._random = random.Random(seed)
+        self._counter_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.offered = self.sampled = self.dropped = 0
+        self.evaluated = self.rows = self.agreed = self.errors = 0
+        self.last_error = None
+        self._labels = np.zeros((len(self.classes), len(self.classes) + 1), dtype=np.int64)
+        self._delta_sum = self._delta_abs_sum = 0.0
+        self._delta_min, self._delta_max = np.inf, -np.inf
+        self._primary_latency = LatencyHistogram()
+        self._candidate_latency = LatencyHistogram()
+        self.started_at = time.time()
+
+        self._worker = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._worker.start()
+
+    def offer(self, X, labels, confidences, latency_ms):
+        """
+        Primary path: maybe queue a batch for the candidate. Never blocks.
+
+        X: the inputs the primary model saw (not modified afterwards)
+        labels, confidences: primary predictions per row
+        latency_ms: primary inference time for the batch
+        """
+        sampled = self._random.random() < self.sample_rate
+        dropped = False
+        if sampled:
+            try:
+                self._queue.put_nowait((X, labels, confidences, latency_ms))
+            except queue.Full:
+                dropped = True
+        with self._counter_lock:
+            self.offered += 1
+            self.sampled += sampled
+            self.dropped += dropped
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            X, labels, confidences, primary_ms = item
+            try:
+                start = time.perf_counter()
+                probabilities = np.asarray(self.candidate.predict_proba(X))
+                candidate_ms = 1e3 * (time.perf_counter() - start)
+                self._record(labels, confidences, probabilities, primary_ms, candidate_ms)
+            except Exception as e:
+                with self._stats_lock:
+                    self.errors += 1
+                    self.last_error = str(e)
+            finally:
+                self._queue.task_done()
+
+    def _record(self, labels, confidences, probabilities, primary_ms, candidate_ms):
+        candidate_labels = self._candidate_classes[np.argmax(probabilities, axis=1)]
+        primary_labels = np.asarray([str(label) for label in labels])
+        delta = probabilities.max(axis=1) - np.asarray(confidences, dtype=np.float64)
+
+        rows = np.array([self._class_index[label] for label in primary_labels])
+        # Candidate labels the primary does not know go to the last column
+        cols = np.array([self._class_index.get(label, len(self.classes)) for label in candidate_labels])
+
+        with self._stats_lock:
+            self.evaluated += 1
+            self.rows += len(primary_labels)
+            self.agreed += int(np.sum(primary_labels == candidate_labels))
+            np.add.at(self._labels, (rows, cols), 1)
+            self._delta_sum += float(delta.sum())
+            self._delta_abs_sum += float(np.abs(delta).sum())
+            self._delta_min = min(self._delta_min, float(delta.min()))
+            self._delta_max = max(self._delta_max, float(delta.max()))
+            self._primary_latency.add(primary_ms)
+            self._candidate_latency.add(candidate_ms)
+
+    def drain(self, timeout=5.0):
+        """Wait until queued batches are evaluated; False on timeout."""
+        deadline = time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self):
+        """Stop the worker; queued batches are discarded."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self._queue.put(None)
+        self._worker.join(timeout=5.0)
+
+    def stats(self):
+        """
+        Returns:
+        {
+            "candidate_version", "sample_rate", "running_s",
+            "batches": {"offered", "sampled", "dropped", "evaluated", "errors"},
+            "rows": int,
+            "agreement_rate": float or None,
+            "label_matrix": {"classes": [...], "counts": primary x (candidate + other)},
+            "confidence_delta": {"mean", "mean_abs", "min", "max"},   # candidate - primary
+            "latency_ms": {"primary": {...}, "candidate": {...}},
+            "last_error": str or None
+        }
+        """
+        with self._counter_lock:
+            offered, sampled, dropped = self.offered, self.sampled, self.dropped
+        with self._stats_lock:
+            rows = self.rows
+            return {
+                "candidate_version": self.candidate_version,
+                "sample_rate": self.sample_rate,
+                "running_s": round(time.time() - self.started_at, 1),
+                "batches": {
+                    "offered": offered,
+                    "sampled": sampled,
+                    "dropped": dropped,
+                    "evaluated": self.evaluated,
+                    "errors": self.errors
+                },
+                "rows": rows,
+                "agreement_rate": self.agreed / rows if rows else None,
+                "label_matrix": {
+                    "classes": self.classes + ["other"],
+                    "counts": self._labels.tolist()
+                },
+                "confidence_delta": {
+                    "mean": self._delta_sum / rows if rows else None,
+                    "mean_abs": self._delta_abs_sum / rows if rows else None,
+                    "min": self._delta_min if rows else None,
+                    "max": self._delta_max if rows else None
+                },
+                "latency_ms": {
+                    "primary": self._primary_latency.summary(),
+                    "candidate": self._candidate_latency.summary()
+                },
+                "last_error": self.last_error
+            }
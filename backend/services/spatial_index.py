@@ -0,0 +1,346 @@
+"""
+Uniform-grid spatial index and level-of-detail map views of a network.
+
+GridIndex buckets points into square cells (one argsort, CSR over cell
+ids), so a bounding-box query only looks at the points in the cells it
+overlaps instead of the whole network.
+
+NetworkViewport answers map viewport queries at three levels of detail:
+- full:      every station and segment in the box
+- collapsed: chains of intermediate (degree-2) stations merged into one
+             edge between junctions and termini
+- clustered: stations snapped to a zoom-dependent grid and merged
+The level is picked from the zoom: the finest one whose typical edge is at
+least MIN_FEATURE_PIXELS long on screen. Zoom follows web-map convention:
+at zoom 0 the whole network spans one TILE_SIZE-pixel tile, and every zoom
+level doubles the scale.
+
+Positions and structure are shared by Topology.evolve snapshots, so one
+NetworkViewport serves every snapshot of a network; closures are read from
+the snapshot passed to query().
+"""
+
+import math
+
+import numpy as np
+
+TILE_SIZE = 256
+MAX_ZOOM = 24
+# Finest level whose median edge is at least this long on screen; also the
+# cluster cell size in pixels
+MIN_FEATURE_PIXELS = 8.0
+# Average points per grid cell when the cell size is chosen automatically
+POINTS_PER_CELL = 4
+
+
+class GridIndex:
+    """Points bucketed into square cells for bounding-box queries."""
+
+    def __init__(self, points, cell_size=None):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.points = points
+        if len(points) == 0:
+            self.origin = np.zeros(2)
+            self.cell_size = 1.0
+            self.shape = (0, 0)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.cell_start = np.zeros(1, dtype=np.int64)
+            return
+
+        self.origin = points.min(axis=0)
+        extent = points.max(axis=0) - self.origin
+        if cell_size is None:
+            area = max(extent[0], 1e-9) * max(extent[1], 1e-9)
+            cell_size = math.sqrt(area * POINTS_PER_CELL / len(points))
+            # Degenerate (collinear) layouts: size cells along the long side
+            cell_size = max(cell_size, float(extent.max()) / len(points), 1e-9)
+        self.cell_size = float(cell_size)
+
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        cols, rows = cells.max(axis=0) + 1
+        self.shape = (int(rows), int(cols))
+        keys = cells[:, 1] * cols + cells[:, 0]
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_start = np.zeros(rows * cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=rows * cols), out=self.cell_start[1:])
+
+    def query(self, bbox):
+        """Sorted indices of the points inside bbox (xmin, ymin, xmax, ymax)."""
+        rows, cols = self.shape
+        if rows == 0:
+            return np.zeros(0, dtype=np.int64)
+        xmin, ymin, xmax, ymax = bbox
+        lo = np.floor((np.array([xmin, ymin]) - self.origin) / self.cell_size).astype(np.int64)
+        hi = np.floor((np.array([xmax, ymax]) - self.origin) / self.cell_size).astype(np.int64)
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, [cols - 1, rows - 1])
+        if np.any(hi < lo):
+            return np.zeros(0, dtype=np.int64)
+
+        # Cell runs per grid row are contiguous in key order
+        row_ids = np.arange(lo[1], hi[1] + 1)
+        starts = self.cell_start[row_ids * cols + lo[0]]
+        ends = self.cell_start[row_ids * cols + hi[0] + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        candidates = self.order[offsets + np.arange(lengths.sum())]
+
+        xy = self.points[candidates]
+        inside = (xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) & (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax)
+        return np.sort(candidates[inside])
+
+
+class _Layer:
+    """
+    One level of detail: nodes with positions, edges between them, and for
+    every edge the topology segments (edge indices) it stands for, as CSR.
+    """
+
+    def __init__(self, labels, xy, edge_u, edge_v, segment_indptr, segment_edges, node_stations=None):
+        self.labels = labels
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        self.edge_u = np.asarray(edge_u, dtype=np.int64)
+        self.edge_v = np.asarray(edge_v, dtype=np.int64)
+        self.segment_indptr = np.asarray(segment_indptr, dtype=np.int64)
+        self.segment_edges = np.asarray(segment_edges, dtype=np.int64)
+        self.node_stations = node_stations
+
+        self.nodes = GridIndex(self.xy)
+        a, b = self.xy[self.edge_u], self.xy[self.edge_v]
+        self.edge_lo = np.minimum(a, b)
+        self.edge_hi = np.maximum(a, b)
+        # Edges indexed by midpoint; queries widen the box by the largest
+        # half-extent so edges reaching into the box are still found
+        self.edges = GridIndex((a + b) / 2, cell_size=self.nodes.cell_size)
+        self.half_extent = ((self.edge_hi - self.edge_lo) / 2).max(axis=0) if len(a) else np.zeros(2)
+
+        lengths = np.hypot(*(b - a).T)
+        self.median_edge = float(np.median(lengths)) if len(lengths) else 0.0
+
+    def query(self, bbox):
+        """(node rows, edge rows): nodes in the box, edges overlapping it."""
+        xmin, ymin, xmax, ymax = bbox
+        hx, hy = self.half_extent
+        candidates = self.edges.query((xmin - hx, ymin - hy, xmax + hx, ymax + hy))
+        lo, hi = self.edge_lo[candidates], self.edge_hi[candidates]
+        overlap = (lo[:, 0] <= xmax) & (hi[:, 0] >= xmin) & (lo[:, 1] <= ymax) & (hi[:, 1] >= ymin)
+        edges = candidates[overlap]
+
+        # Endpoints of edges leaving the box are included so they can be drawn
+        nodes = np.union1d(self.nodes.query(bbox), np.concatenate([self.edge_u[edges], self.edge_v[edges]]))
+        return nodes, edges
+
+    def closed(self, topology):
+        """Per layer edge: does any of its segments have a closure?"""
+        if len(self.edge_u) == 0:
+            return np.zeros(0, dtype=bool)
+        flags = topology.closed[self.segment_edges]
+        return np.logical_or.reduceat(flags, self.segment_indptr[:-1])
+
+
+def _incidence(num_nodes, edge_u, edge_v):
+    """CSR of incident edge indices per node."""
+    ends = np.concatenate([edge_u, edge_v]).astype(np.int64)
+    edge_ids = np.concatenate([np.arange(len(edge_u))] * 2)
+    order = np.argsort(ends, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=num_nodes), out=indptr[1:])
+    return indptr, edge_ids[order]
+
+
+def collapse_chains(topology):
+    """
+    Merge chains of degree-2 stations into single edges.
+
+    Returns (kept station indices, chain endpoints u, v as positions in the
+    kept list, chain segment CSR indptr, chain segment edge indices).
+    """
+    n = topology.num_stations
+    edge_u = topology.edge_u.astype(np.int64)
+    edge_v = topology.edge_v.astype(np.int64)
+    indptr, incident = _incidence(n, edge_u, edge_v)
+    degree = np.diff(indptr)
+
+    # A degree-2 station stays if both segments go to the same neighbour
+    keep = degree != 2
+    two = np.nonzero(degree == 2)[0]
+    first, second = incident[indptr[two]], incident[indptr[two] + 1]
+    other_first = np.where(edge_u[first] == two, edge_v[first], edge_u[first])
+    other_second = np.where(edge_u[second] == two, edge_v[second], edge_u[second])
+    keep[two[other_first == other_second]] = True
+
+    edge_u_list, edge_v_list = edge_u.tolist(), edge_v.tolist()
+    incident_list, indptr_list = incident.tolist(), indptr.tolist()
+    keep_list = keep.tolist()
+    visited = bytearray(topology.num_segments)
+    chains = []
+
+    def walk(start, edge):
+        segments = []
+        node = start
+        while True:
+            visited[edge] = 1
+            segments.append(edge)
+            node = edge_v_list[edge] if edge_u_list[edge] == node else edge_u_list[edge]
+            if keep_list[node]:
+                return node, segments
+            a, b = incident_list[indptr_list[node]], incident_list[indptr_list[node] + 1]
+            edge = b if a == edge else a
+
+    for start in np.nonzero(keep)[0].tolist():
+        for k in range(indptr_list[start], indptr_list[start + 1]):
+            edge = incident_list[k]
+            if not visited[edge]:
+                end, segments = walk(start, edge)
+                chains.append((start, end, segments))
+
+    # Loops made only of degree-2 stations: keep one station per loop
+    for edge in range(topology.num_segments):
+        if not visited[edge]:
+            start = edge_u_list[edge]
+            keep_list[start] = True
+            end, segments = walk(start, edge)
+            chains.append((start, end, segments))
+
+    kept = np.nonzero(np.asarray(keep_list, dtype=bool))[0]
+    position = np.full(n, -1, dtype=np.int64)
+    position[kept] = np.arange(len(kept))
+    lengths = [len(c[2]) for c in chains]
+    chain_indptr = np.zeros(len(chains) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=chain_indptr[1:])
+    return (
+        kept,
+        position[[c[0] for c in chains]] if chains else np.zeros(0, dtype=np.int64),
+        position[[c[1] for c in chains]] if chains else np.zeros(0, dtype=np.int64),
+        chain_indptr,
+        np.fromiter((e for c in chains for e in c[2]), dtype=np.int64, count=int(chain_indptr[-1]))
+    )
+
+
+class NetworkViewport:
+    """Viewport queries over one network layout; built once, read-only."""
+
+    def __init__(self, topology):
+        self.positions = topology.positions
+        self.edge_u = topology.edge_u
+        m = topology.num_segments
+        stations = topology.stations
+
+        self.full = _Layer(
+            stations, topology.positions, topology.edge_u, topology.edge_v,
+            np.arange(m + 1), np.arange(m)
+        )
+        kept, u, v, indptr, segments = collapse_chains(topology)
+        self.collapsed = _Layer([stations[i] for i in kept.tolist()], topology.positions[kept], u, v, indptr, segments)
+
+        extent = topology.positions.max(axis=0) - topology.positions.min(axis=0) if m else np.ones(2)
+        self.extent = max(float(extent.max()), 1e-9)
+        # Cluster layers, built per zoom on first use
+        self._clustered = {}
+
+    def serves(self, topology):
+        """True if topology is a snapshot of the network this index was built for."""
+        return topology.positions is self.positions and topology.edge_u is self.edge_u
+
+    def pixel_size(self, zoom):
+        """World units per screen pixel at a zoom level."""
+        return self.extent / (TILE_SIZE * 2.0 ** zoom)
+
+    def level_for_zoom(self, zoom):
+        pixel = self.pixel_size(zoom)
+        if self.full.median_edge >= MIN_FEATURE_PIXELS * pixel:
+            return "full"
+        if self.collapsed.median_edge >= MIN_FEATURE_PIXELS * pixel:
+            return "collapsed"
+        return "clustered"
+
+    def _clustered_layer(self, zoom):
+        layer = self._clustered.get(zoom)
+        if layer is not None:
+            return layer
+
+        full = self.full
+        cell = MIN_FEATURE_PIXELS * self.pixel_size(zoom)
+        cells = np.floor((full.xy - full.xy.min(axis=0)) / cell).astype(np.int64)
+        _, cluster = np.unique(cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1], return_inverse=True)
+        cluster = cluster.reshape(-1)
+        k = int(cluster.max()) + 1
+        counts = np.bincount(cluster, minlength=k)
+        xy = np.stack([np.bincount(cluster, weights=full.xy[:, d], minlength=k) for d in (0, 1)], axis=1)
+        xy /= counts[:, None]
+
+        # Segments between different clusters, grouped per cluster pair
+        cu, cv = cluster[full.edge_u], cluster[full.edge_v]
+        between = np.nonzero(cu != cv)[0]
+        lo, hi = np.minimum(cu, cv)[between], np.maximum(cu, cv)[between]
+        pairs, group = np.unique(lo * k + hi, return_inverse=True)
+        group = group.reshape(-1)
+        order = np.argsort(group, kind="stable")
+        indptr = np.zeros(len(pairs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(group, minlength=len(pairs)), out=indptr[1:])
+
+        layer = _Layer(
+            [f"cluster_{zoom}_{i}" for i in range(k)], xy, pairs // k, pairs % k,
+            indptr, between[order], node_stations=counts
+        )
+        self._clustered[zoom] = layer
+        return layer
+
+    def query(self, topology, bbox, zoom):
+        """
+        Nodes and edges of topology inside bbox at the zoom's level of detail.
+
+        Returns:
+        {
+            "topology_version": str,
+            "zoom": int,
+            "level": "full" | "collapsed" | "clustered",
+            "bbox": [xmin, ymin, xmax, ymax],
+            "nodes": [{"id", "x", "y"}],       # clustered: + "stations"
+            "edges": [{"source", "target", "segment_id"}]
+                # collapsed: "segment_ids" + "via" (stations merged away);
+                # clustered: "segments" (count); "closed": true if any closed
+        }
+        """
+        xmin, ymin, xmax, ymax = bbox
+        if not (xmin <= xmax and ymin <= ymax):
+            raise ValueError("bbox must be xmin,ymin,xmax,ymax with min <= max")
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}")
+
+        level = self.level_for_zoom(zoom)
+        layer = {"full": self.full, "collapsed": self.collapsed}.get(level) or self._clustered_layer(zoom)
+        node_rows, edge_rows = layer.query(bbox)
+        closed = layer.closed(topology)[edge_rows]
+
+        xs, ys = layer.xy[node_rows, 0].tolist(), layer.xy[node_rows, 1].tolist()
+        nodes = [{"id": layer.labels[i], "x": x, "y": y} for i, x, y in zip(node_rows.tolist(), xs, ys)]
+        if layer.node_stations is not None:
+            for node, count in zip(nodes, layer.node_stations[node_rows].tolist()):
+                node["stations"] = count
+
+        segment_ids = topology.segment_ids
+        indptr = layer.segment_indptr
+        edges = []
+        for e, is_closed in zip(edge_rows.tolist(), closed.tolist()):
+            edge = {"source": layer.labels[layer.edge_u[e]], "target": layer.labels[layer.edge_v[e]]}
+            members = layer.segment_edges[indptr[e]:indptr[e + 1]]
+            if level == "full":
+                edge["segment_id"] = int(segment_ids[members[0]])
+            elif level == "collapsed":
+                edge["segment_ids"] = segment_ids[members].tolist()
+                edge["via"] = len(members) - 1
+            else:
+                edge["segments"] = len(members)
+            if is_closed:
+                edge["closed"] = True
+            edges.append(edge)
+
+        return {
+            "topology_version": topology.version,
+            "zoom": zoom,
+            "level": level,
+            "bbox": [xmin, ymin, xmax, ymax],
+            "nodes": nodes,
+            "edges": edges
+        }
@@ -0,0 +1,561 @@
+"""
+Array-backed railway network topology.
+
+Stations are indexed 0..n-1 and segments (undirected edges) 0..m-1. Routing
+runs on a CSR adjacency with float32 weights rather than per-edge Python
+dicts, so networks with thousands of stations load and route quickly.
+
+Supported input formats (see load_topology):
+- CSV:     one row per segment
+           source,target,segment_id,length_km,time_min[,line][,capacity_tph]
+           plus an optional stations CSV: station_id,x,y
+- GraphML: nodes with optional x/y, edges with segment_id/length_km/time_min
+- JSON:    {"nodes": [{"id", "x", "y"}], "edges": [{"source", "target",
+           "segment_id", "length_km", "time_min", "line", "capacity_tph"}],
+           "origin": str, "destination": str}
+"""
+
+import copy
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .delay_impact import changed_sources
+from .routing import all_pairs_times
+
+# Full all-pairs baseline matrix is precomputed on load up to this many
+# stations (3000^2 float32 = 36 MB). Larger networks cache rows per origin.
+ALL_PAIRS_LIMIT = 3000
+BASELINE_ROW_CACHE_SIZE = 256
+
+
+class Adjacency:
+    """
+    Symmetric CSR adjacency over station indices. edge_ids maps every CSR
+    entry back to the segment (edge index) it came from.
+    """
+
+    def __init__(self, indptr, indices, weights, edge_ids):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.edge_ids = edge_ids
+        n = len(indptr) - 1
+        self.matrix = csr_matrix((weights, indices, indptr), shape=(n, n))
+
+    def edge_between(self, u, v):
+        """Edge index of the fastest segment joining station indices u and v."""
+        start, end = self.indptr[u], self.indptr[u + 1]
+        hits = np.nonzero(self.indices[start:end] == v)[0]
+        if len(hits) == 0:
+            return None
+        return int(self.edge_ids[start + hits[0]])
+
+
+class Topology:
+    """
+    Immutable network snapshot. Treat all arrays as read-only; use evolve()
+    to derive a snapshot with different running times or closures.
+    """
+
+    def __init__(self, stations, edge_u, edge_v, segment_ids, length_km, time_min,
+                 positions=None, lines=None, origin=None, destination=None, capacity_tph=None,
+                 closed=None):
+        self.stations = list(stations)
+        self.station_index = {name: i for i, name in enumerate(self.stations)}
+        n = len(self.stations)
+
+        self.edge_u = np.asarray(edge_u, dtype=np.int32)
+        self.edge_v = np.asarray(edge_v, dtype=np.int32)
+        self.segment_ids = np.asarray(segment_ids, dtype=np.int64)
+        self.length_km = np.asarray(length_km, dtype=np.float32)
+        self.time_min = np.asarray(time_min, dtype=np.float32)
+
+        if positions is None:
+            positions = np.zeros((n, 2), dtype=np.float32)
+        self.positions = np.asarray(positions, dtype=np.float32).reshape(n, 2)
+
+        m = len(self.edge_u)
+        self.lines = list(lines) if lines is not None else [""] * m
+        # Trains per hour each segment can carry (nan = not specified)
+        if capacity_tph is None:
+            capacity_tph = np.full(m, np.nan)
+        self.capacity_tph = np.asarray(capacity_tph, dtype=np.float32)
+        # Closed segments stay in the network but are left out of routing
+        self.closed = np.zeros(m, dtype=bool) if closed is None else np.asarray(closed, dtype=bool)
+
+        if np.any(self.time_min <= 0):
+            raise ValueError("time_min must be positive for every segment")
+
+        # segment_id -> edge index via sorted lookup (no per-edge dict)
+        self._segment_order = np.argsort(self.segment_ids, kind="stable")
+        self._segment_sorted = self.segment_ids[self._segment_order]
+
+        self.origin = origin if origin is not None else (self.stations[0] if n else None)
+        self.destination = destination if destination is not None else (self.stations[-1] if n else None)
+
+        self._adjacency = self._build_adjacency()
+        self._index_adjacency_entries()
+        self._version = None
+        self._payload = None
+
+        # Baseline (unblocked) optimal times, computed on load
+        self._baseline_matrix = None
+        self._baseline_rows = OrderedDict()
+        self._precompute_baseline()
+
+    def __getstate__(self):
+        # Pickled copies (worker processes) rebuild baseline times on demand;
+        # the all-pairs matrix alone can be tens of MB
+        state = self.__dict__.copy()
+        state["_baseline_matrix"] = None
+        state["_baseline_rows"] = OrderedDict()
+        state["_payload"] = None
+        return state
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @property
+    def num_stations(self):
+        return len(self.stations)
+
+    @property
+    def num_segments(self):
+        return len(self.edge_u)
+
+    def _build_adjacency(self, active=None, edge_costs=None):
+        """
+        Build the symmetric CSR adjacency, keeping the cheapest edge when
+        several segments join the same pair of stations.
+
+        active: optional boolean mask over segments; inactive ones are left out.
+        edge_costs: optional per-segment weights instead of time_min.
+        Closed segments are always left out.
+        """
+        if self.closed.any():
+            active = ~self.closed if active is None else active & ~self.closed
+        edge_ids = np.arange(self.num_segments, dtype=np.int32)
+        if active is not None:
+            edge_ids = edge_ids[active]
+
+        rows = np.concatenate([self.edge_u[edge_ids], self.edge_v[edge_ids]])
+        cols = np.concatenate([self.edge_v[edge_ids], self.edge_u[edge_ids]])
+        ids = np.concatenate([edge_ids, edge_ids])
+        weights = (self.time_min if edge_costs is None else edge_costs)[ids]
+
+        order = np.lexsort((weights, cols, rows))
+        rows, cols, ids, weights = rows[order], cols[order], ids[order], weights[order]
+
+        # Drop parallel edges (same row/col); lexsort put the fastest first
+        if len(rows):
+            keep = np.ones(len(rows), dtype=bool)
+            keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            rows, cols, ids, weights = rows[keep], cols[keep], ids[keep], weights[keep]
+
+        indptr = np.zeros(self.num_stations + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=self.num_stations), out=indptr[1:])
+
+        return Adjacency(indptr, cols.astype(np.int32), weights.astype(np.float32), ids.astype(np.int32))
+
+    def _index_adjacency_entries(self):
+        """
+        Record where each segment sits in the unblocked CSR (two entries, one
+        per direction) and which segments have a parallel twin, so blocked
+        views can usually be made by masking instead of rebuilding.
+        """
+        m = self.num_segments
+        adj = self._adjacency
+
+        lo = np.minimum(self.edge_u, self.edge_v).astype(np.int64)
+        hi = np.maximum(self.edge_u, self.edge_v).astype(np.int64)
+        _, inverse, counts = np.unique(lo * self.num_stations + hi, return_inverse=True, return_counts=True)
+        self._has_parallel = counts[inverse] > 1
+
+        order = np.argsort(adj.edge_ids, kind="stable")
+        self._entry_positions = np.full((m, 2), -1, dtype=np.int64)
+        first = np.ones(len(order), dtype=bool)
+        sorted_ids = adj.edge_ids[order]
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        self._entry_positions[sorted_ids[first], 0] = order[first]
+        self._entry_positions[sorted_ids[~first], 1] = order[~first]
+
+    def adjacency(self, blocked_edges=None):
+        """
+        CSR adjacency of travel times, optionally without blocked segments
+        (given as edge indices). The unblocked adjacency is shared.
+        """
+        if not blocked_edges:
+            return self._adjacency
+
+        blocked = np.unique(np.fromiter(blocked_edges, dtype=np.int64))
+        if self._has_parallel[blocked].any():
+            # A parallel twin may take over; rebuild to pick it up
+            active = np.ones(self.num_segments, dtype=bool)
+            active[blocked] = False
+            return self._build_adjacency(active)
+
+        # Fast path: drop the blocked entries from the shared CSR
+        adj = self._adjacency
+        positions = self._entry_positions[blocked].ravel()
+        positions = positions[positions >= 0]
+        keep = np.ones(len(adj.indices), dtype=bool)
+        keep[positions] = False
+
+        rows = np.searchsorted(adj.indptr, positions, side="right") - 1
+        removed = np.bincount(rows, minlength=self.num_stations)
+        indptr = adj.indptr.copy()
+        indptr[1:] -= np.cumsum(removed).astype(indptr.dtype)
+
+        return Adjacency(indptr, adj.indices[keep], adj.weights[keep], adj.edge_ids[keep])
+
+    def weighted_adjacency(self, edge_costs):
+        """
+        Adjacency with per-segment costs (e.g. congestion-adjusted times)
+        instead of time_min; segments with infinite cost are left out.
+        """
+        edge_costs = np.asarray(edge_costs, dtype=np.float64)
+        return self._build_adjacency(np.isfinite(edge_costs), edge_costs)
+
+    def evolve(self, time_min=None, closed=None):
+        """
+        Copy-on-write successor snapshot with new running times and/or
+        closures (full per-segment arrays). Stations, segment lookups and all
+        other arrays are shared with this snapshot; only the adjacency is
+        rebuilt, and a precomputed baseline matrix is updated by re-running
+        just the sources whose distances the change can affect.
+        """
+        successor = copy.copy(self)
+        if time_min is not None:
+            time_min = np.asarray(time_min, dtype=np.float32)
+            if time_min.shape != self.time_min.shape:
+                raise ValueError("time_min must have one entry per segment")
+            if np.any(time_min <= 0):
+                raise ValueError("time_min must be positive for every segment")
+            successor.time_min = time_min
+        if closed is not None:
+            closed = np.asarray(closed, dtype=bool)
+            if closed.shape != self.closed.shape:
+                raise ValueError("closed must have one entry per segment")
+            successor.closed = closed
+
+        successor._adjacency = successor._build_adjacency()
+        successor._index_adjacency_entries()
+        successor._version = None
+        successor._payload = None
+        successor._baseline_rows = OrderedDict()
+        successor._baseline_matrix = None
+
+        if self._baseline_matrix is not None:
+            successor._baseline_matrix = successor._updated_baseline(self)
+        elif successor.origin is not None and self.num_stations:
+            successor.baseline_row(successor.origin)
+        return successor
+
+    def effective_times(self):
+        """Per-segment routing weights, inf for closed segments."""
+        return np.where(self.closed, np.inf, self.time_min.astype(np.float64))
+
+    def _updated_baseline(self, previous):
+        """previous's baseline matrix with only the affected rows recomputed."""
+        old = previous.effective_times()
+        new = self.effective_times()
+        changed = np.nonzero(old != new)[0]
+        baseline = previous._baseline_matrix
+        if len(changed) == 0:
+            return baseline
+
+        sources = changed_sources(
+            baseline, self.edge_u[changed], self.edge_v[changed], old[changed], new[changed]
+        )
+        if len(sources) == 0:
+            return baseline
+        matrix = baseline.copy()
+        matrix[sources] = all_pairs_times(self._adjacency, sources)
+        return matrix
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def edge_for_segment(self, segment_id):
+        """Edge index for a segment_id, or None if unknown."""
+        pos = np.searchsorted(self._segment_sorted, segment_id)
+        if pos < len(self._segment_sorted) and self._segment_sorted[pos] == segment_id:
+            return int(self._segment_order[pos])
+        return None
+
+    def edges_for_segments(self, segment_ids):
+        """Edge indices for the known segment_ids (unknown and repeated ones are skipped)."""
+        edges = []
+        for segment_id in dict.fromkeys(segment_ids):
+            edge = self.edge_for_segment(segment_id)
+            if edge is not None:
+                edges.append(edge)
+        return edges
+
+    def edge_endpoints(self, edge):
+        return self.stations[self.edge_u[edge]], self.stations[self.edge_v[edge]]
+
+    def position(self, station):
+        x, y = self.positions[self.station_index[station]]
+        return {"x": float(x), "y": float(y)}
+
+    # ------------------------------------------------------------------
+    # Baseline optimal times
+    # ------------------------------------------------------------------
+
+    def _precompute_baseline(self):
+        n = self.num_stations
+        if n == 0:
+            return
+        if n <= ALL_PAIRS_LIMIT:
+            self._baseline_matrix = all_pairs_times(self._adjacency)
+        elif self.origin is not None:
+            self.baseline_row(self.origin)
+
+    def baseline_row(self, origin):
+        """Unblocked optimal times from origin to every station (float32)."""
+        o = self.station_index[origin]
+        if self._baseline_matrix is not None:
+            return self._baseline_matrix[o]
+
+        row = self._baseline_rows.get(o)
+        if row is None:
+            row = dijkstra(self._adjacency.matrix, directed=True, indices=o).astype(np.float32)
+            self._baseline_rows[o] = row
+            if len(self._baseline_rows) > BASELINE_ROW_CACHE_SIZE:
+                self._baseline_rows.popitem(last=False)
+        else:
+            self._baseline_rows.move_to_end(o)
+        return row
+
+    def baseline_matrix(self, cache=False):
+        """
+        Unblocked all-pairs times (float32). Precomputed on load up to
+        ALL_PAIRS_LIMIT stations; for larger networks it is computed on
+        demand and kept only if cache=True.
+        """
+        if self._baseline_matrix is not None:
+            return self._baseline_matrix
+        matrix = all_pairs_times(self._adjacency)
+        if cache:
+            self._baseline_matrix = matrix
+            self._baseline_rows.clear()
+        return matrix
+
+    def baseline_time(self, origin, destination):
+        """Unblocked optimal travel time (minutes), inf if disconnected."""
+        return float(self.baseline_row(origin)[self.station_index[destination]])
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self):
+        """Content hash; identical networks share a version."""
+        if self._version is None:
+            digest = hashlib.sha256()
+            digest.update("\x00".join(self.stations).encode("utf-8"))
+            digest.update("\x00".join(self.lines).encode("utf-8"))
+            for array in (self.positions, self.edge_u, self.edge_v,
+                          self.segment_ids, self.length_km, self.time_min, self.capacity_tph, self.closed):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    def payload(self):
+        """
+        Node/edge payload shared by diversion responses, encoded once:
+        {"version", "etag", "payload", "body"}
+        """
+        if self._payload is None:
+            xs = self.positions[:, 0].tolist()
+            ys = self.positions[:, 1].tolist()
+            nodes = [{"id": s, "x": x, "y": y} for s, x, y in zip(self.stations, xs, ys)]
+
+            edges = [
+                {"source": self.stations[u], "target": self.stations[v], "segment_id": seg}
+                for u, v, seg in zip(self.edge_u.tolist(), self.edge_v.tolist(), self.segment_ids.tolist())
+            ]
+            # Only closed segments carry the flag
+            for e in np.nonzero(self.closed)[0].tolist():
+                edges[e]["closed"] = True
+
+            payload = {"topology_version": self.version, "nodes": nodes, "edges": edges}
+            self._payload = {
+                "version": self.version,
+                "etag": f'"{self.version}"',
+                "payload": payload,
+                "body": json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            }
+        return self._payload
+
+    def nbytes(self):
+        """Approximate memory held by the numeric arrays."""
+        adj = self._adjacency
+        arrays = [self.edge_u, self.edge_v, self.segment_ids, self.length_km, self.time_min,
+                  self.capacity_tph, self.closed, self.positions, adj.indptr, adj.indices, adj.weights, adj.edge_ids,
+                  self._segment_order, self._segment_sorted]
+        total = sum(a.nbytes for a in arrays)
+        if self._baseline_matrix is not None:
+            total += self._baseline_matrix.nbytes
+        total += sum(row.nbytes for row in self._baseline_rows.values())
+        return total
+
+    # ------------------------------------------------------------------
+    # Builders
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, nodes, edges, origin=None, destination=None):
+        """
+        Build from node dicts ({"id", "x", "y"}) and edge dicts
+        ({"source", "target", "segment_id", "length_km", "time_min", "line",
+        "capacity_tph"}).
+        Stations referenced only by edges are added without a position.
+        """
+        stations = [str(n["id"]) for n in nodes]
+        index = {name: i for i, name in enumerate(stations)}
+        positions = [[float(n.get("x", 0.0)), float(n.get("y", 0.0))] for n in nodes]
+
+        edge_u, edge_v = [], []
+        for e in edges:
+            for key, side in (("source", edge_u), ("target", edge_v)):
+                name = str(e[key])
+                if name not in index:
+                    index[name] = len(stations)
+                    stations.append(name)
+                    positions.append([0.0, 0.0])
+                side.append(index[name])
+
+        return cls(
+            stations,
+            edge_u,
+            edge_v,
+            [int(e["segment_id"]) for e in edges],
+            [float(e.get("length_km", 0.0)) for e in edges],
+            [float(e["time_min"]) for e in edges],
+            positions=np.array(positions, dtype=np.float32).reshape(-1, 2),
+            lines=[str(e.get("line", "")) for e in edges],
+            origin=origin,
+            destination=destination,
+            capacity_tph=[
+                float(e["capacity_tph"]) if e.get("capacity_tph") is not None else np.nan
+                for e in edges
+            ]
+        )
+
+    @classmethod
+    def from_networkx(cls, graph, origin=None, destination=None):
+        nodes = []
+        for n, data in graph.nodes(data=True):
+            pos = data.get("pos") or {}
+            nodes.append({"id": n, "x": data.get("x", pos.get("x", 0.0)), "y": data.get("y", pos.get("y", 0.0))})
+
+        edges = []
+        for i, (u, v, data) in enumerate(graph.edges(data=True)):
+            edges.append({
+                "source": u,
+                "target": v,
+                "segment_id": data.get("segment_id", i),
+                "length_km": data.get("length_km", 0.0),
+                "time_min": data["time_min"],
+                "line": data.get("line", ""),
+                "capacity_tph": data.get("capacity_tph")
+            })
+
+        origin = origin or graph.graph.get("origin")
+        destination = destination or graph.graph.get("destination")
+        return cls.from_records(nodes, edges, origin=origin, destination=destination)
+
+
+# ----------------------------------------------------------------------
+# File loaders
+# ----------------------------------------------------------------------
+
+def _load_csv(path, stations_path=None, origin=None, destination=None):
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype={"source": str, "target": str})
+    missing = {"source", "target", "segment_id", "time_min"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path}: missing columns {sorted(missing)}")
+
+    if stations_path is not None:
+        st = pd.read_csv(stations_path, dtype={"station_id": str})
+        stations = st["station_id"].tolist()
+        positions = st[["x", "y"]].to_numpy(dtype=np.float32)
+    else:
+        stations, positions = [], None
+
+    # Vectorized name -> index mapping; unseen stations appended in order
+    known = pd.Index(stations)
+    endpoints = pd.concat([df["source"], df["target"]], ignore_index=True)
+    extra = pd.Index(endpoints.unique()).difference(known, sort=False)
+    all_stations = known.append(extra)
+    if positions is not None:
+        positions = np.vstack([positions, np.zeros((len(extra), 2), dtype=np.float32)])
+
+    codes = all_stations.get_indexer(endpoints)
+    m = len(df)
+
+    length = df["length_km"].to_numpy(dtype=np.float32) if "length_km" in df else np.zeros(m, dtype=np.float32)
+    lines = df["line"].astype(str).tolist() if "line" in df else None
+    capacity = df["capacity_tph"].to_numpy(dtype=np.float32) if "capacity_tph" in df else None
+
+    return Topology(
+        all_stations.tolist(),
+        codes[:m],
+        codes[m:],
+        df["segment_id"].to_numpy(dtype=np.int64),
+        length,
+        df["time_min"].to_numpy(dtype=np.float32),
+        positions=positions,
+        lines=lines,
+        origin=origin,
+        destination=destination,
+        capacity_tph=capacity
+    )
+
+
+def _load_json(path, origin=None, destination=None):
+    with open(path) as f:
+        data = json.load(f)
+    return Topology.from_records(
+        data.get("nodes", []),
+        data["edges"],
+        origin=origin or data.get("origin"),
+        destination=destination or data.get("destination")
+    )
+
+
+def _load_graphml(path, origin=None, destination=None):
+    import networkx as nx
+
+    graph = nx.read_graphml(path)
+    return Topology.from_networkx(graph, origin=origin, destination=destination)
+
+
+def load_topology(path, stations_path=None, origin=None, destination=None):
+    """
+    Load a network from CSV, GraphML or JSON (chosen by file extension).
+
+    origin / destination set the default corridor used by network-path
+    assessments; they default to the file's values or the first/last station.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _load_csv(path, stations_path, origin, destination)
+    if ext == ".json":
+        return _load_json(path, origin, destination)
+    if ext in (".graphml", ".xml"):
+        return _load_graphml(path, origin, destination)
+    raise ValueError(f"Unsupported topology format: {ext}")
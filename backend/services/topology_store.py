@@ -0,0 +1,118 @@
+"""
+Live network state: segment closures and running-time changes published as
+immutable, versioned topology snapshots.
+
+Writers (block / unblock / set_time / replace) are serialized by a lock;
+each derives a new Topology from the current one with Topology.evolve
+(copy-on-write: unchanged arrays are shared, the baseline matrix is updated
+only for affected sources) and publishes it with a single reference swap.
+Readers call current() once per request and use that snapshot throughout,
+without taking any lock; a published snapshot never changes.
+
+Caches keyed by Topology.version (topology payload, baseline times) follow
+automatically. The revision counter increases on every write, while the
+content version returns to an earlier value when a change is undone.
+"""
+
+import threading
+
+import numpy as np
+
+
+class TopologyStore:
+    def __init__(self, topology):
+        """topology: the network as loaded (all segments open)."""
+        self._lock = threading.Lock()
+        # (revision, topology, loaded base topology), swapped as a whole
+        self._snapshot = (0, topology, topology)
+
+    def current(self):
+        """The latest published Topology snapshot."""
+        return self._snapshot[1]
+
+    @property
+    def revision(self):
+        return self._snapshot[0]
+
+    def state(self):
+        """
+        Returns:
+        {
+            "revision": int,
+            "topology_version": str,
+            "closed_segments": [int],
+            "time_overrides": [{"segment_id", "time_min", "base_time_min"}]
+        }
+        """
+        revision, topology, base = self._snapshot
+        overridden = np.nonzero(topology.time_min != base.time_min)[0]
+        return {
+            "revision": revision,
+            "topology_version": topology.version,
+            "closed_segments": topology.segment_ids[topology.closed].tolist(),
+            "time_overrides": [
+                {
+                    "segment_id": int(topology.segment_ids[e]),
+                    "time_min": float(topology.time_min[e]),
+                    "base_time_min": float(base.time_min[e])
+                }
+                for e in overridden
+            ]
+        }
+
+    def _edges(self, topology, segment_ids):
+        edges = [topology.edge_for_segment(sid) for sid in segment_ids]
+        unknown = [sid for sid, edge in zip(segment_ids, edges) if edge is None]
+        if unknown:
+            raise ValueError(f"Unknown segments: {unknown}")
+        return np.asarray(edges, dtype=np.int64)
+
+    def _publish(self, topology, base=None):
+        revision, _, current_base = self._snapshot
+        self._snapshot = (revision + 1, topology, current_base if base is None else base)
+        return self.state()
+
+    def block(self, segment_ids):
+        """Close segments; returns state()."""
+        with self._lock:
+            topology = self.current()
+            edges = self._edges(topology, segment_ids)
+            if topology.closed[edges].all():
+                return self.state()
+            closed = topology.closed.copy()
+            closed[edges] = True
+            return self._publish(topology.evolve(closed=closed))
+
+    def unblock(self, segment_ids):
+        """Reopen segments; returns state()."""
+        with self._lock:
+            topology = self.current()
+            edges = self._edges(topology, segment_ids)
+            if not topology.closed[edges].any():
+                return self.state()
+            closed = topology.closed.copy()
+            closed[edges] = False
+            return self._publish(topology.evolve(closed=closed))
+
+    def set_time(self, segment_id, time_min=None):
+        """
+        Change a segment's running time (e.g. a speed restriction);
+        time_min=None restores the time it was loaded with. Returns state().
+        """
+        if time_min is not None and not time_min > 0:
+            raise ValueError("time_min must be positive")
+        with self._lock:
+            topology = self.current()
+            edge = self._edges(topology, [segment_id])[0]
+            if time_min is None:
+                time_min = self._snapshot[2].time_min[edge]
+            if topology.time_min[edge] == np.float32(time_min):
+                return self.state()
+            times = topology.time_min.copy()
+            times[edge] = time_min
+            return self._publish(topology.evolve(time_min=times))
+
+    def replace(self, topology):
+        """Publish a new network (e.g. reloaded from file) as the new base."""
+        with self._lock:
+            return self._publish(topology, base=topology)
@@ -0,0 +1,271 @@
+"""
+Request-scoped tracing: nested spans per request, exported as JSONL.
+
+Tracer.trace() opens the root span of a request. Any code running inside
+it, including sync endpoints in the threadpool (the context is copied),
+opens child spans with span("name", key=value). The current span lives in
+a ContextVar, so nothing is passed around. Outside a recorded trace, span()
+only does a ContextVar lookup. metrics.timed() opens a span per stage, so
+timed stages show up in traces too.
+
+Sampling:
+- sample_rate: share of requests recorded and exported (head sampling)
+- slow_ms: when set, every request is recorded and the ones at least this
+  slow are exported whatever the sample rate (tail sampling). This keeps
+  the slow requests you want to explain.
+
+A finished trace is one JSON line:
+{"trace_id", "timestamp", "name", "duration_ms",
+ "spans": [{"span_id", "parent_id", "name", "start_ms", "duration_ms",
+            "attributes", "error"?}, ...]}
+The request thread only does a non-blocking put onto a bounded queue.
+A background thread writes the lines; a full queue drops traces and
+counts them. View with python -m backend.tools.trace_view.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+QUEUE_SIZE = 1024
+TRACE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "outputs", "traces.jsonl")
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+class _Trace:
+    __slots__ = ("trace_id", "timestamp", "t0", "spans", "ids")
+
+    def __init__(self, trace_id, t0):
+        self.trace_id = trace_id
+        self.timestamp = time.time()
+        self.t0 = t0
+        self.spans = []
+        self.ids = itertools.count(1)
+
+
+class span:
+    """Child span of the current one; does nothing outside a recorded trace."""
+
+    __slots__ = ("name", "attributes", "trace", "span_id", "parent_id", "_start", "_token")
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.trace = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is not None:
+            self._open(parent.trace, parent.span_id)
+        return self
+
+    def _open(self, trace, parent_id, start=None):
+        self.trace = trace
+        self.span_id = next(trace.ids)
+        self.parent_id = parent_id
+        self._start = time.perf_counter() if start is None else start
+        self._token = _current.set(self)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is not None:
+            self._close(exc_type)
+        return False
+
+    def _close(self, exc_type):
+        end = time.perf_counter()
+        _current.reset(self._token)
+        record = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round(1e3 * (self._start - self.trace.t0), 3),
+            "duration_ms": round(1e3 * (end - self._start), 3),
+            "attributes": self.attributes
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        # list.append is atomic; spans may end on threadpool threads
+        self.trace.spans.append(record)
+        return record
+
+
+def current_trace_id():
+    """Trace id of the request being handled, or None if not recorded."""
+    current = _current.get()
+    return None if current is None else current.trace.trace_id
+
+
+class JsonlExporter:
+    def __init__(self, path=TRACE_FILE, queue_size=QUEUE_SIZE):
+        self.path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.exported = self.dropped = self.errors = 0
+        self.last_error = None
+        self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, record):
+        """Queue one finished trace. Never blocks."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                record = self._queue.get()
+                try:
+                    if record is None:
+                        return
+                    f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+                    if self._queue.empty():
+                        f.flush()
+                    with self._lock:
+                        self.exported += 1
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                        self.last_error = str(e)
+                finally:
+                    self._queue.task_done()
+
+    def flush(self, timeout=5.0):
+        """Wait until queued traces are written; False on timeout."""
+        deadline = time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self):
+        """Write what is queued, then stop the worker."""
+        self._queue.put(None)
+        self._worker.join(timeout=5.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "exported": self.exported,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+                "errors": self.errors,
+                "last_error": self.last_error
+            }
+
+
+class _RootSpan(span):
+    __slots__ = ("tracer", "trace_id", "sampled")
+
+    def __init__(self, tracer, name, trace_id, attributes):
+        super().__init__(name, **attributes)
+        self.tracer = tracer
+        self.trace_id = trace_id
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is not None:
+            # Already inside a trace: just a child span
+            self.sampled = False
+            self._open(parent.trace, parent.span_id)
+            return self
+        tracer = self.tracer
+        self.sampled = tracer.sample_rate > 0 and tracer._random.random() < tracer.sample_rate
+        if self.sampled or tracer.slow_ms is not None:
+            start = time.perf_counter()
+            self._open(_Trace(self.trace_id or os.urandom(8).hex(), start), None, start)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        if trace is None:
+            return False
+        duration_ms = self._close(exc_type)["duration_ms"]
+        if self.parent_id is not None:
+            return False
+        slow_ms = self.tracer.slow_ms
+        if self.sampled or (slow_ms is not None and duration_ms >= slow_ms):
+            self.tracer._export({
+                "trace_id": trace.trace_id,
+                "timestamp": trace.timestamp,
+                "name": self.name,
+                "duration_ms": duration_ms,
+                "spans": sorted(trace.spans, key=lambda s: s["span_id"])
+            })
+        return False
+
+
+class Tracer:
+    def __init__(self, sample_rate=0.0, slow_ms=None, path=TRACE_FILE, seed=None):
+        self.path = path
+        self.exporter = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sample_rate = 0.0
+        self.slow_ms = None
+        self.configure(sample_rate, slow_ms)
+
+    def configure(self, sample_rate=None, slow_ms=None, clear_slow=False):
+        """Change sampling at runtime; clear_slow turns tail sampling off."""
+        if sample_rate is not None:
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = float(sample_rate)
+        if slow_ms is not None:
+            if slow_ms < 0:
+                raise ValueError("slow_ms must be >= 0")
+            self.slow_ms = float(slow_ms)
+        elif clear_slow:
+            self.slow_ms = None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.slow_ms is not None
+
+    def trace(self, name, trace_id=None, **attributes):
+        """Root span of one request (context manager)."""
+        return _RootSpan(self, name, trace_id, attributes)
+
+    def _export(self, record):
+        exporter = self.exporter
+        if exporter is None:
+            with self._lock:
+                if self.exporter is None:
+                    self.exporter = JsonlExporter(self.path)
+                exporter = self.exporter
+        exporter.export(record)
+
+    def stats(self):
+        """
+        Returns:
+        {
+            "sample_rate": float,
+            "slow_ms": float or None,
+            "exporter": {"path", "exported", "dropped", "queued", "errors", "last_error"} or None
+        }
+        """
+        exporter = self.exporter
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "exporter": None if exporter is None else exporter.stats()
+        }
+
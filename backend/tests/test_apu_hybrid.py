@@ -0,0 +1,88 @@
+"""
+Tests for rule-first hybrid APU inference.
+"""
+
+import threading
+
+import numpy as np
+
+from backend.services.apu_hybrid import HybridAPUEstimator
+
+
+def _rule(window):
+    # The test windows carry their rule RUL in the first cell
+    return float(window[0][0])
+
+
+def _window(rul):
+    window = np.zeros((180, 15))
+    window[0, 0] = rul
+    return window
+
+
+class _Model:
+    def __init__(self, rul=100.0, fail=False):
+        self.rul = rul
+        self.fail = fail
+        self.batch_sizes = []
+
+    def predict(self, model, windows):
+        self.batch_sizes.append(len(windows))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return np.full(len(windows), self.rul)
+
+
+def test_only_windows_near_a_boundary_reach_the_model():
+    model = _Model(rul=100.0)
+    estimator = HybridAPUEstimator(_rule, model.predict, margin=10, gru_weight=0.5, max_wait_ms=0)
+    try:
+        assert estimator.estimate(model, _window(200)) == (200.0, "rule")
+        assert estimator.estimate(model, _window(30)) == (30.0, "rule")
+        assert estimator.estimate(model, _window(90)) == (90.0, "rule")
+        assert estimator.estimate(model, _window(55)) == (77.5, "hybrid")
+        assert estimator.estimate(model, _window(130)) == (115.0, "hybrid")
+        # No model loaded: rule only
+        assert estimator.estimate(None, _window(60)) == (60.0, "rule")
+        stats = estimator.stats()
+    finally:
+        estimator.stop()
+
+    assert model.batch_sizes == [1, 1]
+    assert stats["requests"] == 6 and stats["escalated"] == 2
+    assert abs(stats["escalation_rate"] - 1 / 3) < 1e-9
+    assert stats["added_latency_ms"]["count"] == 2
+
+
+def test_concurrent_requests_share_model_calls():
+    model = _Model()
+    estimator = HybridAPUEstimator(_rule, model.predict, max_batch=8, max_wait_ms=200)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(estimator.estimate(model, _window(118))))
+        for _ in range(8)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = estimator.stats()
+    finally:
+        estimator.stop()
+
+    assert len(results) == 8 and all(source == "hybrid" for _, source in results)
+    assert sum(model.batch_sizes) == 8 and len(model.batch_sizes) < 8
+    assert stats["batches"] == len(model.batch_sizes)
+
+
+def test_model_failure_falls_back_to_rule():
+    model = _Model(fail=True)
+    estimator = HybridAPUEstimator(_rule, model.predict, max_wait_ms=0)
+    try:
+        assert estimator.estimate(model, _window(62)) == (62.0, "rule_fallback")
+        stats = estimator.stats()
+    finally:
+        estimator.stop()
+    assert stats["fallbacks"] == 1
+    assert "model unavailable" in stats["last_error"]
@@ -0,0 +1,105 @@
+"""
+Tests for capacity-aware bulk rerouting.
+"""
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.bulk_rerouting import independent_load, reroute_trains
+from backend.services.diversion_service import DiversionService
+from backend.services.topology import Topology
+
+
+def _two_detours():
+    # A-B direct (blocked); fast detour via C (5 tph), slow detour via D (10 tph)
+    return Topology(
+        ["A", "B", "C", "D"],
+        [0, 0, 2, 0, 3],
+        [1, 2, 1, 3, 1],
+        [1, 2, 3, 4, 5],
+        [1, 1, 1, 1, 1],
+        [5, 4, 4, 8, 8],
+        capacity_tph=[20, 5, 5, 10, 10]
+    )
+
+
+def test_overflow_spills_to_slower_detour():
+    """The fastest detour fills to capacity, the rest take the next one"""
+    topology = _two_detours()
+    result = reroute_trains(topology, [0] * 12, [1] * 12, blocked_edges=[0])
+
+    routes = [tuple(p) for p in result["paths"]]
+    assert routes.count((1, 2)) == 5
+    assert routes.count((3, 4)) == 7
+    assert result["held"] == 0
+
+
+def test_trains_beyond_capacity_are_held():
+    """Total demand above detour capacity is held, never overloaded"""
+    topology = _two_detours()
+    result = reroute_trains(topology, [0] * 20, [1] * 20, blocked_edges=[0])
+
+    assert result["held"] == 5
+    assert sum(p is None for p in result["paths"]) == 5
+    assert np.all(result["load"] <= result["capacity"])
+
+    # A two-hour window doubles the capacity
+    assert reroute_trains(topology, [0] * 20, [1] * 20, blocked_edges=[0], window_hours=2)["held"] == 0
+
+
+def test_grid_loads_respect_capacity():
+    """Independent routing overloads segments; the solver does not"""
+    topology = grid_network(15, 15, seed=2)
+    rng = np.random.default_rng(1)
+    origins = rng.integers(0, topology.num_stations, 600)
+    destinations = rng.integers(0, topology.num_stations, 600)
+    blocked = rng.choice(topology.num_segments, 10, replace=False).tolist()
+
+    result = reroute_trains(topology, origins, destinations, blocked, window_hours=4)
+    capacity = result["capacity"]
+    assert np.all(result["load"] <= capacity)
+    assert np.any(independent_load(topology, origins, destinations, blocked) > capacity)
+
+    # Every assigned path joins its endpoints and avoids blocked segments
+    for o, d, path in zip(origins, destinations, result["paths"]):
+        if path:
+            assert not set(path) & set(blocked)
+            ends = np.concatenate([topology.edge_u[path], topology.edge_v[path]])
+            counts = np.bincount(ends, minlength=topology.num_stations)
+            assert o == d or (counts[o] % 2 == 1 and counts[d] % 2 == 1)
+
+
+def test_capacity_attribute_from_records():
+    """capacity_tph is optional per segment"""
+    topology = Topology.from_records(
+        [{"id": "A"}, {"id": "B"}, {"id": "C"}],
+        [
+            {"source": "A", "target": "B", "segment_id": 1, "time_min": 3, "capacity_tph": 6},
+            {"source": "B", "target": "C", "segment_id": 2, "time_min": 3},
+        ]
+    )
+    assert topology.capacity_tph[0] == 6
+    assert np.isnan(topology.capacity_tph[1])
+
+
+def test_service_reports_held_trains_and_load():
+    """All Station_A -> Station_E trains funnel through segment 4"""
+    service = DiversionService()
+    trains = [{"train_id": f"T{i}", "origin": "Station_A", "destination": "Station_E"} for i in range(20)]
+    result = service.reroute_trains(trains, [2])
+
+    assert result["summary"]["assigned"] == 12
+    assert result["summary"]["held"] == 8
+    assert result["trains"][0]["path"][:3] == ["Station_A", "Station_B", "Station_F"]
+    assert result["trains"][0]["delay_min"] == 3
+    assert result["segment_load"][0]["utilization"] == 1.0
+
+
+def test_service_rejects_unknown_segments():
+    trains = [{"train_id": "T1", "origin": "Station_A", "destination": "Station_E"}]
+    try:
+        DiversionService().reroute_trains(trains, [999])
+    except ValueError as e:
+        assert "999" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
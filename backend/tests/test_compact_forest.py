@@ -0,0 +1,57 @@
+"""
+Tests for the compact (flattened, quantized) Random Forest.
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.services.compact_forest import CompactForest
+
+LABELS = np.array(["Misalignment", "Normal", "Severe_Degradation", "Surface_Crack"])
+
+
+def _forest(n_rows=3000, seed=0, **kwargs):
+    rng = np.random.default_rng(seed)
+    # 3-decimal values, like the dataset: ties one float32 ulp apart are common
+    X = np.round(rng.uniform(0, 1, (n_rows, 5)), 3).astype(np.float32)
+    score = X[:, 0] + 0.5 * X[:, 2] + 0.1 * rng.normal(size=n_rows)
+    y = LABELS[np.digitize(score, [0.4, 0.8, 1.2])]
+    forest = RandomForestClassifier(random_state=seed, **kwargs).fit(X, y)
+    return forest, X
+
+
+def test_float32_matches_sklearn():
+    forest, X = _forest(n_estimators=20, max_depth=10)
+    compact = CompactForest(forest)
+    assert np.allclose(compact.predict_proba(X), forest.predict_proba(X), atol=1e-6)
+    assert (compact.predict(X) == forest.predict(X)).all()
+    assert compact.n_nodes == sum(est.tree_.node_count for est in forest.estimators_)
+
+
+def test_uint8_is_exact_with_few_thresholds():
+    """Under 256 thresholds per feature, binning keeps every decision"""
+    forest, X = _forest(n_rows=400, n_estimators=5, max_depth=4)
+    compact = CompactForest(forest, precision="uint8")
+    assert max(len(edges) for edges in compact.bin_edges) <= 255
+    assert np.abs(compact.predict_proba(X) - forest.predict_proba(X)).max() <= 1 / 255
+    assert compact.nbytes < CompactForest(forest).nbytes
+
+
+def test_depth_cut_and_tree_selection():
+    forest, X = _forest(n_estimators=10, max_depth=10)
+
+    cut = CompactForest(forest, max_depth=0)
+    # Every tree is its root: the bootstrap class shares, averaged
+    roots = np.mean([est.tree_.value[0, 0] / est.tree_.value[0, 0].sum() for est in forest.estimators_], axis=0)
+    assert cut.max_depth == 0 and cut.n_nodes == 10
+    assert np.allclose(cut.predict_proba(X[:3]), roots)
+
+    single = CompactForest(forest, trees=[3])
+    assert np.allclose(single.predict_proba(X), forest.estimators_[3].predict_proba(X), atol=1e-6)
+
+    try:
+        CompactForest(forest, trees=[])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
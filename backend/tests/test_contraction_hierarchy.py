@@ -0,0 +1,52 @@
+"""
+Tests for the contraction-hierarchy routing engine.
+"""
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.contraction_hierarchy import ContractionHierarchy
+from backend.services.diversion_service import DiversionService
+from backend.services.routing import shortest_path
+
+
+def test_matches_dijkstra_on_random_queries():
+    """Hierarchy queries return the same optimal times as Dijkstra"""
+    topology = grid_network(15, 15, seed=4)
+    hierarchy = ContractionHierarchy(topology)
+    rng = np.random.default_rng(1)
+
+    for _ in range(100):
+        a, b = rng.integers(0, topology.num_stations, 2)
+        source, target = topology.stations[a], topology.stations[b]
+        fast = hierarchy.shortest_path(source, target)
+        reference = shortest_path(topology, source, target)
+        assert abs(fast["time_min"] - reference["time_min"]) < 1e-3
+        assert fast["stations"][0] == source and fast["stations"][-1] == target
+        # Unpacked edges chain the stations
+        for (u, v), e in zip(zip(fast["stations"][:-1], fast["stations"][1:]), fast["edges"]):
+            assert {u, v} == set(topology.edge_endpoints(e))
+
+
+def test_blocked_segments_fall_back_when_on_path():
+    """Blocked segments on the unblocked optimum trigger the Dijkstra fallback"""
+    topology = grid_network(10, 10, seed=5)
+    hierarchy = ContractionHierarchy(topology)
+    source, target = topology.stations[0], topology.stations[-1]
+
+    unblocked = hierarchy.shortest_path(source, target)
+    blocked = unblocked["edges"][:2]
+    route = hierarchy.shortest_path(source, target, blocked_edges=blocked)
+
+    assert hierarchy.stats["fallbacks"] == 1
+    assert not set(blocked) & set(route["edges"])
+    assert abs(route["time_min"] - shortest_path(topology, source, target, blocked)["time_min"]) < 1e-3
+
+
+def test_service_uses_hierarchy_engine():
+    """DiversionService answers network paths with the hierarchy when asked"""
+    default = DiversionService()
+    ch = DiversionService(routing_engine="ch")
+    for blocked in ([], [2], [2, 3], [1, 301]):
+        assert ch.get_network_path(blocked) == default.get_network_path(blocked)
+        assert ch.plan_network_diversions(blocked) == default.plan_network_diversions(blocked)
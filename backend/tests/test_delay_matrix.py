@@ -0,0 +1,61 @@
+"""
+Tests for the all-pairs delay impact matrix.
+"""
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.delay_impact import delay_impact
+from backend.services.diversion_service import DiversionService
+from backend.services.routing import all_pairs_times
+
+
+def test_incremental_matrix_matches_full_recompute():
+    """Re-running only affected sources gives the full blocked matrix"""
+    topology = grid_network(12, 12, seed=6)
+    rng = np.random.default_rng(2)
+    blocked = rng.choice(topology.num_segments, size=8, replace=False).tolist()
+
+    impact = delay_impact(topology, blocked)
+    expected = all_pairs_times(topology.adjacency(blocked))
+
+    assert np.allclose(impact["blocked"], expected, rtol=1e-5)
+
+    # A single closure only touches sources whose shortest paths use it
+    single = delay_impact(topology, blocked[:1])
+    assert 0 < single["recomputed_sources"] < topology.num_stations
+    assert impact["aggregates"]["station_pairs"] == topology.num_stations * (topology.num_stations - 1) // 2
+
+
+def test_service_reports_weighted_delay_and_disconnections():
+    """Passenger weights split into delayed and stranded totals"""
+    service = DiversionService()
+    result = service.get_delay_matrix(
+        [2, 1, 301],
+        od_weights=[
+            {"origin": "Station_A", "destination": "Station_E", "weight": 1000},
+            {"origin": "Station_B", "destination": "Station_D", "weight": 500},
+        ]
+    )
+    aggregates = result["aggregates"]
+
+    # Station_A is cut off; B -> D detours via F (+3 min)
+    assert aggregates["passengers_stranded"] == 1000
+    assert aggregates["passengers_delayed"] == 500
+    assert aggregates["passenger_weighted_delay_min"] == 1500
+    assert aggregates["pairs_disconnected"] == 7
+
+    a = result["stations"].index("Station_A")
+    d = result["stations"].index("Station_D")
+    b = result["stations"].index("Station_B")
+    assert result["delta_matrix"][a][d] is None
+    assert result["delta_matrix"][b][d] == 3
+
+
+def test_unknown_segments_are_rejected():
+    try:
+        DiversionService().get_delay_matrix([2, 999])
+    except ValueError as e:
+        assert "999" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,105 @@
+"""
+Tests for the Monte Carlo disruption simulator.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.agents.prediction_agent import PredictionAgent
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.disruption_simulator import simulate_disruption
+from backend.services.diversion_service import DiversionService
+from backend.services.routing import shortest_path
+
+
+def test_demo_network_ranking():
+    """A bypassed segment costs its detour; off-route segments cost nothing"""
+    service = DiversionService()
+    result = service.simulate_disruption([2, 302, 999], [0.5, 0.9, 0.5], n_scenarios=400, seed=1)
+
+    by_id = {s["segment_id"]: s for s in result["segments"]}
+    assert result["unknown_segments"] == [999]
+    assert [s["segment_id"] for s in result["segments"]] == [2, 302]
+
+    # Segment 2 detours via Station_F (+3 min)
+    assert by_id[2]["delay_if_failed_min"] == 3
+    assert by_id[2]["delay_if_ok_min"] == 0
+    assert by_id[2]["expected_disruption_min"] == 1.5
+    # Unrelated to the delay; non-zero only through sampling noise
+    assert abs(by_id[302]["expected_disruption_min"]) < 0.1
+
+    # Segment 302 is off the corridor, so only scenarios closing 2 are routed
+    assert result["routed_scenarios"] == 2
+    assert 0.4 < result["delay_distribution"]["prob_delayed"] < 0.6
+
+
+def test_seeded_and_worker_independent():
+    """Same seed gives identical results in-process and across processes"""
+    topology = grid_network(8, 8, seed=3)
+    rng = np.random.default_rng(0)
+    edges = rng.choice(topology.num_segments, size=30, replace=False)
+    probs = rng.uniform(0.05, 0.4, size=30)
+    od_pairs = ([0, 5, 9], [63, 40, 54], [1.0, 2.0, 0.5])
+
+    serial = simulate_disruption(topology, edges, probs, od_pairs, n_scenarios=300, seed=7, workers=1)
+    parallel = simulate_disruption(topology, edges, probs, od_pairs, n_scenarios=300, seed=7, workers=2)
+    assert serial["routed_scenarios"] > 64
+    assert np.array_equal(serial["failed"], parallel["failed"])
+    assert np.allclose(serial["delays"], parallel["delays"])
+
+    # Spot-check a few scenarios against direct routing
+    for k in range(5):
+        blocked = edges[serial["failed"][k]].tolist()
+        expected = 0.0
+        for o, d, w in zip(*od_pairs):
+            base = shortest_path(topology, topology.stations[o], topology.stations[d])
+            route = shortest_path(topology, topology.stations[o], topology.stations[d], blocked_edges=blocked)
+            expected += w * (route["time_min"] - base["time_min"] if route else 120.0)
+        assert np.isclose(serial["delays"][k], expected, atol=1e-3)
+
+
+def test_concurrent_in_process_calls_do_not_share_state():
+    """Threadpool requests on different networks get their own results"""
+    cases = []
+    for seed in (3, 4):
+        topology = grid_network(6, 6, seed=seed)
+        edges = np.arange(0, topology.num_segments, 2)
+        probs = np.full(len(edges), 0.3)
+        cases.append((topology, edges, probs, ([0], [35], [1.0])))
+    expected = [simulate_disruption(*case, n_scenarios=50, seed=1, workers=1)["delays"] for case in cases]
+
+    results = {}
+
+    def run(i):
+        for _ in range(5):
+            delays = simulate_disruption(*cases[i], n_scenarios=50, seed=1, workers=1)["delays"]
+            results.setdefault(i, []).append(np.allclose(delays, expected[i]))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in (0, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {0: [True] * 5, 1: [True] * 5}
+
+
+def test_batch_probabilities_match_single_predictions():
+    """predict_proba_batch agrees with per-segment predict"""
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, size=(200, 5))
+    y = np.where(X[:, 0] > 0.7, "Severe_Degradation", np.where(X[:, 2] > 0.5, "Surface_Crack", "Normal"))
+
+    agent = PredictionAgent.__new__(PredictionAgent)
+    agent.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        pd.DataFrame(X, columns=PredictionAgent.feature_names), y
+    )
+
+    classes, probabilities = agent.predict_proba_batch(X[:20].tolist())
+    assert probabilities.shape == (20, len(classes))
+    for row, features in zip(probabilities, X[:20].tolist()):
+        label, confidence = agent.predict(features)
+        assert classes[int(np.argmax(row))] == label
+        assert round(float(row.max()), 3) == confidence
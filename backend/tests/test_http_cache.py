@@ -0,0 +1,93 @@
+"""
+Tests for pre-encoded payload serving (ETag, If-None-Match, gzip).
+"""
+
+import functools
+import gzip
+import json
+import os
+import tempfile
+
+import joblib
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.tree import DecisionTreeClassifier
+from starlette.requests import Request
+
+from backend.agents.prediction_agent import PredictionAgent
+from backend.http_cache import accepts_gzip
+
+
+@functools.lru_cache(maxsize=None)
+def _api():
+    """backend.api with a small stand-in for the (unshipped) serving model."""
+    if not os.getenv("RF_MODEL_PATH"):
+        X = pd.DataFrame([[0.1, 0.5, 10, 1, 300], [0.9, 8, 90, 1.2, 950]],
+                         columns=PredictionAgent.feature_names)
+        model = DecisionTreeClassifier().fit(X, ["Normal", "Severe_Degradation"])
+        path = os.path.join(tempfile.mkdtemp(), "rf_fault_predictor.pkl")
+        joblib.dump(model, path)
+        os.environ["RF_MODEL_PATH"] = path
+    import backend.api
+    return backend.api
+
+
+def _client():
+    return TestClient(_api().app)
+
+
+def _request(accept_encoding):
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+
+def test_case_study_payload_is_memoized():
+    """The case study is encoded once and matches the dict builder"""
+    diversion_service = _api().service.diversion_service
+    payload = diversion_service.get_mumbai_case_study_payload()
+
+    assert diversion_service.get_mumbai_case_study_payload() is payload
+    assert json.loads(payload["body"]) == diversion_service.get_mumbai_case_study()
+    assert gzip.decompress(payload["gzip_body"]) == payload["body"]
+
+
+def test_conditional_get_and_gzip():
+    """Repeat loads with the ETag return 304; gzip clients get compressed bytes"""
+    client = _client()
+    first = client.get("/case-study/mumbai", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.json()["scenario"].startswith("Mumbai Local")
+
+    plain = client.get("/case-study/mumbai", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == first.json()
+    assert plain.headers["etag"] == first.headers["etag"]
+
+    refused = client.get("/case-study/mumbai", headers={"Accept-Encoding": "gzip;q=0.000, identity"})
+    assert "content-encoding" not in refused.headers
+
+    repeat = client.get("/case-study/mumbai", headers={"If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    stale = client.get("/case-study/mumbai", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+
+
+def test_topology_conditional_get():
+    client = _client()
+    first = client.get("/network/topology")
+    assert first.status_code == 200
+    assert first.json()["topology_version"]
+
+    repeat = client.get("/network/topology", headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+    assert repeat.status_code == 304
+
+
+def test_gzip_quality_values():
+    assert accepts_gzip(_request("gzip"))
+    assert accepts_gzip(_request("deflate, GZIP;q=0.5"))
+    assert accepts_gzip(_request("gzip; q=1.0"))
+    for refusal in ("gzip;q=0", "gzip;q=0.0", "gzip; q=0.000", "gzip;Q=0.00", "identity"):
+        assert not accepts_gzip(_request(refusal)), refusal
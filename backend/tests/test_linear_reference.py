@@ -0,0 +1,64 @@
+"""
+Tests for linear referencing of chainage readings.
+"""
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+from backend.services.linear_reference import LinearReference
+
+
+def test_demo_network_chainage():
+    """Main line runs A (km 0) -> E; boundaries belong to the next segment"""
+    reference = DiversionService().get_linear_reference()
+    assert reference.skipped_lines == []
+
+    # Main: seg 1 (10 km), 2 (15 km), 3 (12 km), 4 (20 km)
+    assert reference.locate("Main", 0.0) == 1
+    assert reference.locate("Main", 9.99) == 1
+    assert reference.locate("Main", 10.0) == 2
+    assert reference.locate("Main", 57.0) == 4
+    assert reference.locate("Main", 57.5) is None
+    assert reference.locate("Bypass_1", 8.5) == 102
+    assert reference.locate("Unknown", 1.0) is None
+
+    edges = reference.locate_many(["Main", "Main", "Bypass_2", "Nope", "Main"], [24.9, 25.0, 3.0, 1.0, -1.0])
+    topology = DiversionService().topology
+    assert [int(topology.segment_ids[e]) if e >= 0 else None for e in edges] == [2, 3, 201, None, None]
+
+
+def test_bulk_lookup_matches_bisect_and_aggregates():
+    topology = grid_network(15, 15, seed=5)
+    reference = LinearReference(topology)
+    rng = np.random.default_rng(0)
+
+    n = 20000
+    lines = np.array(reference.lines)[rng.integers(0, len(reference.lines), n)]
+    km = rng.uniform(-1.0, 80.0, n)
+    edges = reference.locate_many(lines, km)
+    expected = [reference.locate(line, k) for line, k in zip(lines.tolist(), km.tolist())]
+    assert [int(topology.segment_ids[e]) if e >= 0 else None for e in edges] == expected
+
+    features = rng.uniform(0, 1, (n, 5))
+    result = reference.aggregate_features(lines, km, features)
+    assert result["readings"].sum() + result["unmatched"] == n
+
+    # Spot-check one segment against a direct mask
+    sid = int(result["segment_ids"][3])
+    mask = edges == topology.edge_for_segment(sid)
+    assert result["readings"][3] == mask.sum()
+    assert np.allclose(result["features"][3, [0, 1, 2, 4]], features[mask][:, [0, 1, 2, 4]].max(axis=0))
+    assert np.isclose(result["features"][3, 3], features[mask][:, 3].mean())
+
+
+def test_branched_line_is_skipped():
+    service = DiversionService()
+    topology = service.topology
+    # Relabel Bypass_2 as Main: Main then branches at C and D
+    lines = ["Main" if line == "Bypass_2" else line for line in topology.lines]
+    branched = type(topology)(
+        topology.stations, topology.edge_u, topology.edge_v, topology.segment_ids,
+        topology.length_km, topology.time_min, positions=topology.positions, lines=lines
+    )
+    assert LinearReference(branched).skipped_lines == ["Main"]
@@ -0,0 +1,63 @@
+"""
+Tests for the Prometheus metrics registry.
+"""
+
+from backend.services.metrics import Counter, Histogram, LatencyHistogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.01, 0.1, 1)))
+    for value in (0.005, 0.05, 0.05, 2.0):
+        histogram.labels("inference").observe(value)
+    histogram.labels("llm").observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP stage_seconds Stage time.", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="inference",le="0.01"} 1' in lines
+    assert 'stage_seconds_bucket{stage="inference",le="0.1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="inference",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="inference",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="inference"} 4' in lines
+    assert 'stage_seconds_sum{stage="inference"} 2.105000' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 1' in lines
+
+
+def test_counters_and_label_escaping():
+    registry = Registry()
+    total = registry.register(Counter("segments_total", "Segments."))
+    hits = registry.register(Counter("hits_total", "Hits.", ["cache"]))
+    total.inc()
+    total.inc(4)
+    hits.labels('say "hi"\n').inc()
+
+    text = registry.render()
+    assert "# TYPE segments_total counter\nsegments_total 5\n" in text
+    assert 'hits_total{cache="say \\"hi\\"\\n"} 1' in text
+
+
+def test_label_count_and_duplicate_names_are_checked():
+    registry = Registry()
+    hits = registry.register(Counter("hits_total", "Hits.", ["cache"]))
+    for call in (lambda: hits.labels(), lambda: registry.register(Counter("hits_total", "Again."))):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+def test_latency_histogram_summary():
+    histogram = LatencyHistogram()
+    assert histogram.summary()["p50"] is None
+    for ms in [1.0] * 90 + [50.0] * 9 + [20000.0]:
+        histogram.add(ms)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert abs(summary["mean"] - 205.4) < 1e-9
+    # Upper bounds of the buckets holding each quantile
+    assert abs(summary["p50"] - 1.0) < 1e-9
+    assert abs(summary["p95"] - 10 ** 1.7) < 1e-9
+    assert abs(summary["p99"] - 10 ** 1.7) < 1e-9
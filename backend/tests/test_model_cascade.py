@@ -0,0 +1,86 @@
+"""
+Tests for the confidence-gated model cascade.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.agents.prediction_agent import PredictionAgent
+
+LABELS = np.array(["Normal", "Surface_Crack", "Misalignment", "Severe_Degradation"])
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.uniform(0, 1, (n, 5)), columns=PredictionAgent.feature_names)
+    y = LABELS[np.digitize(X["wear_level"] + 0.1 * X["vibration_index"], [0.3, 0.55, 0.8])]
+    return X, y
+
+
+def _agent():
+    X, y = _data()
+    agent = PredictionAgent.__new__(PredictionAgent)
+    agent.model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    fast = DecisionTreeClassifier(max_depth=2, random_state=0).fit(X, y)
+    return agent, fast
+
+
+def test_threshold_bounds():
+    agent, fast = _agent()
+    X, _ = _data(200, seed=1)
+
+    # threshold 0: every row is answered by the fast model
+    agent.enable_cascade(fast, 0.0)
+    _, probabilities = agent.predict_proba_batch(X.values.tolist())
+    stats = agent.disable_cascade()
+    assert stats["rows"] == 200 and stats["escalated"] == 0
+    assert np.array_equal(probabilities.argmax(axis=1), np.argmax(fast.predict_proba(X), axis=1))
+
+    # threshold 1: everything not fully certain goes to the full model
+    agent.enable_cascade(fast, 1.0)
+    _, probabilities = agent.predict_proba_batch(X.values.tolist())
+    stats = agent.disable_cascade()
+    confident = fast.predict_proba(X).max(axis=1) >= 1.0
+    assert stats["escalated"] == int((~confident).sum())
+    assert np.allclose(probabilities[~confident], agent.model.predict_proba(X[~confident]))
+
+
+def test_fast_columns_follow_full_model_classes():
+    agent, _ = _agent()
+    X, y = _data()
+    # Same classes, different order
+    order = np.array(["Severe_Degradation", "Normal", "Misalignment", "Surface_Crack"])
+
+    class Reordered:
+        classes_ = order
+
+        def predict_proba(self, X):
+            index = [list(agent.model.classes_).index(c) for c in order]
+            return agent.model.predict_proba(X)[:, index]
+
+    agent.enable_cascade(Reordered(), 0.0)
+    label, confidence = agent.predict(X.iloc[0].tolist())
+    agent.disable_cascade()
+    assert (label, confidence) == agent.predict(X.iloc[0].tolist())
+
+
+def test_mismatched_classes_are_rejected():
+    agent, _ = _agent()
+    X, y = _data()
+    other = DecisionTreeClassifier(max_depth=2).fit(X, np.where(y == "Normal", "Normal", "Fault"))
+    try:
+        agent.enable_cascade(other, 0.9)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert agent.cascade is None
+
+    try:
+        agent.enable_cascade(_agent()[1], 1.5)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
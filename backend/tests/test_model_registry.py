@@ -0,0 +1,128 @@
+"""
+Tests for the versioned model registry and hot swapping.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.agents.prediction_agent import PredictionAgent
+from backend.services.model_registry import ModelSlot, list_versions, publish, version_dir
+
+
+def _model(path, label_shift):
+    """A small tree whose predictions tell the versions apart."""
+    rng = np.random.default_rng(label_shift)
+    X = pd.DataFrame(rng.uniform(0, 1, (200, 5)), columns=PredictionAgent.feature_names)
+    labels = np.array(["Normal", "Surface_Crack", "Misalignment", "Severe_Degradation"])
+    y = labels[(np.digitize(X["wear_level"], [0.25, 0.5, 0.75]) + label_shift) % 4]
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+    joblib.dump(model, path)
+    return model
+
+
+def _agent_and_slot(root):
+    agent = PredictionAgent.__new__(PredictionAgent)
+    agent.model = None
+    slot = ModelSlot(
+        "rf",
+        loader=lambda paths: joblib.load(paths["model"]),
+        feature_names=PredictionAgent.feature_names,
+        warmup=lambda model, metadata: PredictionAgent.warm_up(model, metadata.get("sample_inputs")),
+        on_swap=lambda model, metadata: setattr(agent, "model", model),
+        root=root
+    )
+    return agent, slot
+
+
+def test_publish_load_and_swap():
+    with tempfile.TemporaryDirectory() as root:
+        first = _model(os.path.join(root, "a.pkl"), 0)
+        second = _model(os.path.join(root, "b.pkl"), 1)
+        publish("rf", {"model": os.path.join(root, "a.pkl")}, PredictionAgent.feature_names,
+                first.classes_, root=root)
+        publish("rf", {"model": os.path.join(root, "b.pkl")}, PredictionAgent.feature_names,
+                second.classes_, root=root)
+        assert list_versions("rf", root) == [1, 2]
+
+        agent, slot = _agent_and_slot(root)
+        features = [0.1, 0.5, 10.0, 1.0, 300]
+        assert slot.load(1)["active_version"] == 1
+        assert agent.predict(features)[0] == first.predict(pd.DataFrame([features], columns=agent.feature_names))[0]
+
+        status = slot.load()
+        assert status["active_version"] == 2 and status["last_error"] is None
+        assert agent.predict(features)[0] == second.predict(pd.DataFrame([features], columns=agent.feature_names))[0]
+
+
+def test_bad_versions_keep_the_active_model():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "a.pkl")
+        _model(path, 0)
+        publish("rf", {"model": path}, PredictionAgent.feature_names, root=root)
+        # Wrong feature order, then a file modified after publishing
+        publish("rf", {"model": path}, list(reversed(PredictionAgent.feature_names)), root=root)
+        publish("rf", {"model": path}, PredictionAgent.feature_names, root=root)
+        with open(os.path.join(version_dir("rf", 3, root), "a.pkl"), "ab") as f:
+            f.write(b"tampered")
+
+        agent, slot = _agent_and_slot(root)
+        slot.load(1)
+        active = agent.model
+        for version in (2, 3, 9):
+            try:
+                slot.load(version)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("expected ValueError")
+            assert agent.model is active
+        assert slot.status()["active_version"] == 1
+        assert slot.status()["last_error"]["version"] == 3
+
+
+def test_background_reload_does_not_block_readers():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "a.pkl")
+        _model(path, 0)
+        publish("rf", {"model": path}, PredictionAgent.feature_names, root=root)
+
+        agent, slot = _agent_and_slot(root)
+        slot.load()
+        old = agent.model
+        loaded = threading.Event()
+        release = threading.Event()
+
+        def slow_loader(paths):
+            loaded.set()
+            release.wait(5)
+            return joblib.load(paths["model"])
+
+        _model(path, 1)
+        publish("rf", {"model": path}, PredictionAgent.feature_names, root=root)
+        slot.loader = slow_loader
+        slot.reload()
+        loaded.wait(5)
+
+        # Readers keep being served while the new version loads
+        assert agent.model is old
+        assert agent.predict([0.1, 0.5, 10.0, 1.0, 300])[0]
+        try:
+            slot.reload()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError while loading")
+
+        release.set()
+        deadline = time.time() + 5
+        while slot.status()["active_version"] != 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert slot.status()["active_version"] == 2
+        assert agent.model is not old
@@ -0,0 +1,109 @@
+"""
+Tests for single-pass multi-failure diversion planning.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.agents.decision_agent import DecisionAgent
+from backend.agents.explanation_agent import ExplanationAgent
+from backend.agents.prediction_agent import PredictionAgent
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+from backend.services.maintenance_service import MaintenanceService
+from backend.services.notification_service import NotificationService
+from backend.services.topology import Topology
+
+
+def test_matches_independent_plans_for_separate_failures():
+    """Non-adjacent failures get the same detours as one-at-a-time planning"""
+    service = DiversionService(topology=grid_network(12, 12, seed=3))
+    rng = np.random.default_rng(0)
+    segment_ids = rng.choice(service.topology.segment_ids, size=6, replace=False).tolist()
+
+    result = service.plan_network_diversions(segment_ids)
+
+    assert result["network_path"] == service.get_network_path(segment_ids)
+    for sid in segment_ids:
+        shared = result["diversion_plans"][sid]
+        alone = service.get_diversion_plan(sid)
+        assert shared["original_segment"] == sid
+        assert shared["stations_involved"][0] == alone["stations_involved"][0]
+        assert shared["stations_involved"][-1] == alone["stations_involved"][-1]
+        # The shared view also closes the other failures, so never faster
+        assert shared["estimated_time_min"] >= alone["estimated_time_min"] - 1e-3
+
+
+def test_adjacent_failures_avoid_each_other():
+    """Detours in the shared blocked view never use another failed segment"""
+    nodes = [{"id": "A"}, {"id": "B"}, {"id": "C"}, {"id": "D"}]
+    edges = [
+        {"source": "A", "target": "B", "segment_id": 1, "length_km": 1, "time_min": 1},
+        {"source": "B", "target": "C", "segment_id": 2, "length_km": 1, "time_min": 1},
+        {"source": "A", "target": "C", "segment_id": 3, "length_km": 3, "time_min": 3},
+        {"source": "A", "target": "D", "segment_id": 4, "length_km": 1, "time_min": 1},
+        {"source": "D", "target": "B", "segment_id": 5, "length_km": 5, "time_min": 5},
+    ]
+    service = DiversionService(topology=Topology.from_records(nodes, edges, origin="A", destination="C"))
+
+    # Alone, segment 1 detours over segment 3
+    assert service.get_diversion_plan(1)["stations_involved"] == ["A", "C", "B"]
+
+    result = service.plan_network_diversions([1, 3, 999])
+    assert result["diversion_plans"][999] is None
+    assert result["diversion_plans"][1]["stations_involved"] == ["A", "D", "B"]
+    assert result["diversion_plans"][3]["stations_involved"] == ["A", "D", "B", "C"]
+    assert result["network_path"]["stations_involved"] == ["A", "D", "B", "C"]
+
+
+class _CountingDiversionService(DiversionService):
+    def __init__(self):
+        super().__init__()
+        self.planner_calls = []
+
+    def plan_network_diversions(self, blocked_segment_ids, *args, **kwargs):
+        self.planner_calls.append((list(blocked_segment_ids), kwargs.get("network_path", True)))
+        return super().plan_network_diversions(blocked_segment_ids, *args, **kwargs)
+
+
+def _maintenance_service():
+    X = [[0.1, 0.5, 10, 1, 300], [0.9, 8, 90, 1.2, 950]]
+    service = MaintenanceService.__new__(MaintenanceService)
+    service.predictor = PredictionAgent.__new__(PredictionAgent)
+    service.predictor.model = DecisionTreeClassifier().fit(
+        pd.DataFrame(X, columns=PredictionAgent.feature_names), ["Normal", "Severe_Degradation"]
+    )
+    service.decision = DecisionAgent()
+    service.explainer = ExplanationAgent()
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.notifier = NotificationService()
+        service.diversion_service = _CountingDiversionService()
+    return service, X
+
+
+def test_batch_skips_planner_without_failures_and_network_path():
+    service, (healthy, severe) = _maintenance_service()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = service.assess_segments_batch(
+            [{"segment_id": 1, "features": healthy}, {"segment_id": 2, "features": healthy}], {}
+        )
+        assert service.diversion_service.planner_calls == []
+        assert all(r["diversion_plan"] is None for r in results)
+
+        # A healthy duplicate row of a critical segment gets no plan
+        results = service.assess_segments_batch([
+            {"segment_id": 2, "features": severe},
+            {"segment_id": 2, "features": healthy},
+            {"segment_id": 2, "features": severe},
+        ], {})
+    assert service.diversion_service.planner_calls == [([2], False)]
+    assert results[0]["diversion_plan"] is not None
+    assert results[1]["diversion_plan"] is None
+    assert results[2]["diversion_plan"] == results[0]["diversion_plan"]
+
+    plan = service.diversion_service.plan_network_diversions([2], network_path=False)
+    assert plan["network_path"] is None
@@ -0,0 +1,83 @@
+"""
+Tests for on-demand request profiling.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from backend.services.profiler import Profiler
+
+
+def _busy_endpoint(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(i * i for i in range(1000))
+    return total
+
+
+def _other_endpoint(stop):
+    stop.wait()
+
+
+def test_profiles_only_the_target_endpoint_until_n_requests():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = Profiler(tmp)
+        stop = threading.Event()
+        threads = [threading.Thread(target=f, args=(stop,)) for f in (_busy_endpoint, _other_endpoint)]
+        for thread in threads:
+            thread.start()
+
+        status = profiler.start([_busy_endpoint.__code__], route="/busy", requests=2,
+                                interval_ms=1, memory=True)
+        try:
+            profiler.start([_busy_endpoint.__code__], seconds=1)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected RuntimeError")
+
+        time.sleep(0.2)
+        session = profiler.session
+        session.request_finished("/other")
+        session.request_finished("/busy")
+        assert profiler.session is session
+        session.request_finished("/busy")
+        session.stop()
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert profiler.session is None and not tracemalloc.is_tracing()
+        last = profiler.status()["last"]
+        assert last["requests"] == 2 and last["samples"] > 0 and last["error"] is None
+        assert set(os.listdir(status["path"])) == {
+            "cpu_folded.txt", "cpu_top.txt", "memory_top.txt",
+            "memory_start.snapshot", "memory_end.snapshot", "session.json"
+        }
+        with open(os.path.join(status["path"], "cpu_folded.txt")) as f:
+            stacks = f.read().splitlines()
+        assert stacks and all(line.startswith("_busy_endpoint (test_profiler.py") for line in stacks)
+
+
+def test_time_window_and_validation():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = Profiler(tmp)
+        for options in ({}, {"requests": 0}, {"seconds": 0}, {"seconds": 1, "interval_ms": 0.01}):
+            try:
+                profiler.start([_busy_endpoint.__code__], **options)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"expected ValueError for {options}")
+        assert profiler.session is None
+
+        profiler.start([_busy_endpoint.__code__], seconds=0.05, memory=False)
+        deadline = time.time() + 5
+        while profiler.session is not None and time.time() < deadline:
+            time.sleep(0.01)
+        assert profiler.session is None
+        assert profiler.status()["last"]["samples"] == 0
+        assert "memory_top.txt" not in os.listdir(profiler.status()["last"]["path"])
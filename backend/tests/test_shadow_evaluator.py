@@ -0,0 +1,91 @@
+"""
+Tests for shadow evaluation of candidate models.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.agents.prediction_agent import PredictionAgent
+
+LABELS = np.array(["Normal", "Surface_Crack", "Misalignment", "Severe_Degradation"])
+
+
+def _model(shift, depth=None):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 1, (400, 5)), columns=PredictionAgent.feature_names)
+    y = LABELS[(np.digitize(X["wear_level"], [0.25, 0.5, 0.75]) + shift) % 4]
+    return DecisionTreeClassifier(max_depth=depth, random_state=0).fit(X, y)
+
+
+def _agent(model):
+    agent = PredictionAgent.__new__(PredictionAgent)
+    agent.model = model
+    return agent
+
+
+def test_identical_candidate_agrees():
+    model = _model(0)
+    agent = _agent(model)
+    agent.enable_shadow(_model(0), sample_rate=1.0, candidate_version=2)
+
+    rng = np.random.default_rng(1)
+    for row in rng.uniform(0, 1, (20, 5)):
+        agent.predict(row.tolist())
+    agent.predict_proba_batch(rng.uniform(0, 1, (50, 5)).tolist())
+    assert agent.shadow.drain()
+
+    stats = agent.disable_shadow()
+    assert agent.shadow is None
+    assert stats["candidate_version"] == 2
+    assert stats["batches"]["evaluated"] == 21 and stats["rows"] == 70
+    assert stats["agreement_rate"] == 1.0
+    assert stats["confidence_delta"]["mean_abs"] == 0.0
+    assert sum(map(sum, stats["label_matrix"]["counts"])) == 70
+    assert stats["latency_ms"]["candidate"]["count"] == 21
+
+
+def test_disagreement_is_counted_by_label():
+    agent = _agent(_model(0))
+    agent.enable_shadow(_model(1), sample_rate=1.0)
+    X = np.random.default_rng(2).uniform(0, 1, (200, 5)).tolist()
+    classes, _ = agent.predict_proba_batch(X)
+    assert agent.shadow.drain()
+    stats = agent.shadow.stats()
+    agent.disable_shadow()
+
+    # Every label is shifted by one class
+    assert stats["agreement_rate"] == 0.0
+    counts = np.array(stats["label_matrix"]["counts"])
+    assert counts.shape == (4, 5) and counts.trace() == 0 and counts.sum() == 200
+
+
+def test_slow_candidate_never_blocks_the_primary():
+    """A full queue drops batches instead of waiting"""
+    release = threading.Event()
+
+    class SlowCandidate:
+        classes_ = _model(0).classes_
+
+        def predict_proba(self, X):
+            release.wait(5)
+            return np.full((len(X), 4), 0.25)
+
+    agent = _agent(_model(0))
+    agent.enable_shadow(SlowCandidate(), sample_rate=1.0)
+    agent.shadow._queue.maxsize = 2
+
+    start = time.perf_counter()
+    for _ in range(50):
+        agent.predict([0.2, 0.5, 0.5, 0.5, 0.5])
+    elapsed = time.perf_counter() - start
+    stats = agent.shadow.stats()["batches"]
+    release.set()
+    agent.disable_shadow()
+
+    assert elapsed < 2.0
+    assert stats["offered"] == 50 and stats["sampled"] == 50
+    assert stats["dropped"] >= 47
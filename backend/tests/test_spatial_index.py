@@ -0,0 +1,73 @@
+"""
+Tests for the grid spatial index and map viewport queries.
+"""
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network, line_grid_network
+from backend.services.diversion_service import DiversionService
+from backend.services.spatial_index import GridIndex, NetworkViewport
+
+
+def test_grid_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.normal(0, 100, (3000, 2))
+    index = GridIndex(points)
+
+    for _ in range(50):
+        lo = rng.normal(0, 100, 2)
+        hi = lo + rng.uniform(0, 150, 2)
+        inside = np.all((points >= lo) & (points <= hi), axis=1)
+        assert np.array_equal(index.query((*lo, *hi)), np.nonzero(inside)[0])
+    assert len(index.query((1e6, 1e6, 2e6, 2e6))) == 0
+
+
+def test_viewport_levels_of_detail():
+    """Intermediate stations collapse at low zoom; every segment is kept once"""
+    topology = line_grid_network(20, 20, 5, seed=2)
+    viewport = NetworkViewport(topology)
+    everything = (-1e4, -1e4, 1e4, 1e4)
+
+    collapsed = viewport.query(topology, everything, 0)
+    assert collapsed["level"] == "collapsed"
+    assert len(collapsed["nodes"]) == 396  # 400 junctions minus 4 degree-2 corners
+    segment_ids = [sid for e in collapsed["edges"] for sid in e["segment_ids"]]
+    assert sorted(segment_ids) == topology.segment_ids.tolist()
+    assert {e["via"] for e in collapsed["edges"]} >= {5}
+
+    full = viewport.query(topology, everything, 6)
+    assert full["level"] == "full"
+    assert len(full["nodes"]) == topology.num_stations
+    assert len(full["edges"]) == topology.num_segments
+
+
+def test_viewport_box_and_closures():
+    """Edges leaving the box come with their endpoints; closures are flagged"""
+    service = DiversionService(topology=grid_network(20, 20, seed=1))
+    service.block_segments([1])
+    result = service.get_viewport((150, 150, 450, 450), 8)
+    assert result["level"] == "full"
+    assert result["topology_version"] == service.topology_version
+
+    ids = {n["id"] for n in result["nodes"]}
+    for edge in result["edges"]:
+        assert edge["source"] in ids and edge["target"] in ids
+    inside = [n for n in result["nodes"] if 150 <= n["x"] <= 450 and 150 <= n["y"] <= 450]
+    assert 0 < len(inside) < len(result["nodes"])
+
+    corner = service.get_viewport((-50, -50, 60, 60), 8)
+    assert [e["segment_id"] for e in corner["edges"] if e.get("closed")] == [1]
+
+    service.set_topology(grid_network(60, 60, seed=1))
+    service.block_segments(list(range(1, 60)))  # first grid row
+    clustered = service.get_viewport((-1e4, -1e4, 1e4, 1e4), 0)
+    assert clustered["level"] == "clustered"
+    assert sum(n["stations"] for n in clustered["nodes"]) == 3600
+    assert any(e.get("closed") for e in clustered["edges"])
+
+    try:
+        service.get_viewport((10, 0, 0, 10), 3)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,99 @@
+"""
+Tests for the file-based, array-backed topology loader.
+"""
+
+import json
+
+import networkx as nx
+import numpy as np
+
+from backend.services.diversion_service import DEFAULT_NETWORK, DiversionService
+from backend.services.routing import shortest_path
+from backend.services.topology import Topology, load_topology
+
+
+def write_csv(tmp_path):
+    edges = tmp_path / "edges.csv"
+    stations = tmp_path / "stations.csv"
+    with open(edges, "w") as f:
+        f.write("source,target,segment_id,length_km,time_min,line\n")
+        for e in DEFAULT_NETWORK["edges"]:
+            f.write(f"{e['source']},{e['target']},{e['segment_id']},{e['length_km']},{e['time_min']},{e['line']}\n")
+    with open(stations, "w") as f:
+        f.write("station_id,x,y\n")
+        for n in DEFAULT_NETWORK["nodes"]:
+            f.write(f"{n['id']},{n['x']},{n['y']}\n")
+    return edges, stations
+
+
+def test_loaders_agree(tmp_path):
+    """CSV, JSON and GraphML inputs produce the same network"""
+    reference = Topology.from_records(DEFAULT_NETWORK["nodes"], DEFAULT_NETWORK["edges"])
+
+    edges_csv, stations_csv = write_csv(tmp_path)
+    from_csv = load_topology(str(edges_csv), stations_path=str(stations_csv))
+
+    json_path = tmp_path / "network.json"
+    json_path.write_text(json.dumps(DEFAULT_NETWORK))
+    from_json = load_topology(str(json_path))
+
+    graph = nx.Graph()
+    for n in DEFAULT_NETWORK["nodes"]:
+        graph.add_node(n["id"], x=float(n["x"]), y=float(n["y"]))
+    for e in DEFAULT_NETWORK["edges"]:
+        graph.add_edge(e["source"], e["target"], segment_id=e["segment_id"],
+                       length_km=float(e["length_km"]), time_min=float(e["time_min"]), line=e["line"])
+    graphml_path = tmp_path / "network.graphml"
+    nx.write_graphml(graph, graphml_path)
+    from_graphml = load_topology(str(graphml_path))
+
+    for topology in (from_csv, from_json):
+        assert topology.version == reference.version
+
+    # networkx iterates edges by adjacency, so compare GraphML by content
+    def segments(topology):
+        return sorted(
+            (int(seg), frozenset(topology.edge_endpoints(i)), float(t))
+            for i, (seg, t) in enumerate(zip(topology.segment_ids, topology.time_min))
+        )
+
+    assert segments(from_graphml) == segments(reference)
+    assert from_graphml.stations == reference.stations
+    assert from_graphml.adjacency().weights.dtype == np.float32
+
+
+def test_baseline_times_replace_hardcoded_values():
+    """Unblocked optimal times are computed on load for any station pair"""
+    topology = DiversionService().topology
+    assert topology.baseline_time("Station_A", "Station_E") == 69
+    assert topology.baseline_time("Station_H", "Station_G") == 15 + 18 + 12
+
+
+def test_route_avoids_blocked_parallel_edge():
+    """Blocking the faster of two parallel segments falls back to the slower one"""
+    nodes = [{"id": "A"}, {"id": "B"}]
+    edges = [
+        {"source": "A", "target": "B", "segment_id": 1, "length_km": 1, "time_min": 5},
+        {"source": "A", "target": "B", "segment_id": 2, "length_km": 2, "time_min": 9},
+    ]
+    topology = Topology.from_records(nodes, edges)
+
+    assert shortest_path(topology, "A", "B")["time_min"] == 5
+    route = shortest_path(topology, "A", "B", blocked_edges=[topology.edge_for_segment(1)])
+    assert route["time_min"] == 9
+    assert route["edges"] == [topology.edge_for_segment(2)]
+
+
+def test_masked_blocked_view_matches_rebuild():
+    """Dropping blocked entries from the shared CSR equals a full rebuild"""
+    from backend.benchmarks.synthetic_network import grid_network
+
+    topology = grid_network(8, 8, seed=2)
+    blocked = [0, 5, 17, 40]
+    active = np.ones(topology.num_segments, dtype=bool)
+    active[blocked] = False
+
+    masked = topology.adjacency(blocked)
+    rebuilt = topology._build_adjacency(active)
+    assert (masked.matrix != rebuilt.matrix).nnz == 0
+    assert np.array_equal(masked.edge_ids, rebuilt.edge_ids)
@@ -0,0 +1,41 @@
+"""
+Tests for the shared, versioned topology payload used by diversion responses.
+"""
+
+import json
+
+from backend.services.diversion_service import DEFAULT_NETWORK, DiversionService
+from backend.services.topology import Topology
+
+
+def test_diversion_plan_references_topology_version():
+    """Diversion plans carry the topology version instead of a graph copy"""
+    service = DiversionService()
+    plan = service.get_diversion_plan(2)
+
+    graph_data = plan["graph_data"]
+    assert "nodes" not in graph_data and "edges" not in graph_data
+    assert graph_data["topology_version"] == service.topology_version
+    assert graph_data["blocked_edge"] == {"source": "Station_B", "target": "Station_C"}
+
+
+def test_topology_payload_is_cached_and_versioned():
+    """Payload is encoded once and its version only changes with the graph"""
+    service = DiversionService()
+    first = service.get_topology()
+    assert service.get_topology() is first
+
+    payload = json.loads(first["body"])
+    assert payload["topology_version"] == first["version"]
+    assert len(payload["nodes"]) == service.topology.num_stations
+    assert len(payload["edges"]) == service.topology.num_segments
+    assert first["etag"] == f'"{first["version"]}"'
+
+    # Same topology -> same version across instances
+    assert DiversionService().topology_version == first["version"]
+
+    edges = DEFAULT_NETWORK["edges"] + [
+        {"source": "Station_E", "target": "Station_H", "segment_id": 999, "length_km": 5, "time_min": 6}
+    ]
+    service.set_topology(Topology.from_records(DEFAULT_NETWORK["nodes"], edges))
+    assert service.topology_version != first["version"]
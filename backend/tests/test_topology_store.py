@@ -0,0 +1,126 @@
+"""
+Tests for live topology updates (versioned copy-on-write snapshots).
+"""
+
+import threading
+
+import numpy as np
+
+from backend.benchmarks.synthetic_network import grid_network
+from backend.services.diversion_service import DiversionService
+from backend.services.routing import all_pairs_times, shortest_path
+from backend.services.topology_store import TopologyStore
+
+
+def test_evolved_baseline_matches_full_recompute():
+    """Incrementally updated baseline equals a fresh all-pairs run"""
+    topology = grid_network(10, 10, seed=4)
+    rng = np.random.default_rng(1)
+
+    closed = np.zeros(topology.num_segments, dtype=bool)
+    closed[rng.choice(topology.num_segments, size=5, replace=False)] = True
+    times = topology.time_min.copy()
+    changed = rng.choice(topology.num_segments, size=10, replace=False)
+    times[changed[:5]] *= 3.0
+    times[changed[5:]] *= 0.2
+
+    evolved = topology.evolve(time_min=times, closed=closed)
+    assert np.allclose(evolved.baseline_matrix(), all_pairs_times(evolved.adjacency()), rtol=1e-5)
+    # Shared, untouched arrays and an unchanged parent
+    assert evolved.edge_u is topology.edge_u
+    assert not topology.closed.any()
+    assert evolved.version != topology.version
+
+    # Reopening everything restores the original content version
+    reopened = evolved.evolve(time_min=topology.time_min, closed=np.zeros_like(closed))
+    assert reopened.version == topology.version
+    assert np.allclose(reopened.baseline_matrix(), topology.baseline_matrix(), rtol=1e-5)
+
+
+def test_store_block_unblock_and_snapshot_isolation():
+    """Readers keep their snapshot while writers publish new ones"""
+    service = DiversionService()
+    before = service.topology
+
+    state = service.block_segments([2])
+    assert state == {
+        "revision": 1,
+        "topology_version": service.topology.version,
+        "closed_segments": [2],
+        "time_overrides": []
+    }
+    # The old snapshot still routes over segment 2
+    assert before.baseline_time("Station_A", "Station_E") == 69
+    assert service.topology.baseline_time("Station_A", "Station_E") == 72
+    assert "Station_F" in service.get_network_path([])["stations_involved"]
+
+    payload = service.get_topology()["payload"]
+    assert [e["segment_id"] for e in payload["edges"] if e.get("closed")] == [2]
+
+    state = service.unblock_segments([2])
+    assert state["revision"] == 2
+    assert state["topology_version"] == before.version
+
+    state = service.set_segment_time(4, 40)
+    assert state["time_overrides"] == [{"segment_id": 4, "time_min": 40.0, "base_time_min": 25.0}]
+    assert service.get_network_path([])["total_time_min"] == 84
+    assert service.set_segment_time(4)["time_overrides"] == []
+
+
+def test_store_rejects_unknown_segments():
+    store = TopologyStore(grid_network(3, 3, seed=0))
+    for call in (lambda: store.block([999999]), lambda: store.set_time(0, -1.0)):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+    assert store.revision == 0
+
+
+def test_contraction_hierarchy_reused_across_closures():
+    """The hierarchy serves closures and is rebuilt once a segment speeds up"""
+    service = DiversionService(topology=grid_network(8, 8, seed=2), routing_engine="ch")
+    topology = service.topology
+    source, target = topology.stations[0], topology.stations[-1]
+    hierarchy = service.get_contraction_hierarchy()
+
+    # Close a segment on the optimal route: answered by the same hierarchy
+    first_edge = service.get_contraction_hierarchy().shortest_path(source, target)["edges"][0]
+    service.block_segments([int(topology.segment_ids[first_edge])])
+    route = service.get_network_path([], source, target)
+    assert route["path_found"]
+    assert route["total_time_min"] == round(service.topology.baseline_time(source, target), 3)
+    assert service.get_contraction_hierarchy() is hierarchy
+
+    service.set_segment_time(int(topology.segment_ids[0]), float(topology.time_min[0]) * 0.5)
+    assert service.get_contraction_hierarchy() is not hierarchy
+
+
+def test_contraction_hierarchy_built_once_and_stale_snapshots_fall_back():
+    service = DiversionService(topology=grid_network(8, 8, seed=2), routing_engine="ch")
+    base = service.topology
+    source, target = base.stations[0], base.stations[-1]
+    # Built with the service, not inside the first request
+    assert service._hierarchy is not None
+
+    service._hierarchy = None
+    built = []
+    threads = [threading.Thread(target=lambda: built.append(service.get_contraction_hierarchy())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(hierarchy is built[0] for hierarchy in built)
+
+    # Slow one segment, speed up another: rebuilt on a network the original
+    # snapshot is faster than, so a request on that snapshot uses Dijkstra
+    service.set_segment_time(int(base.segment_ids[0]), float(base.time_min[0]) * 2)
+    service.set_segment_time(int(base.segment_ids[1]), float(base.time_min[1]) * 0.5)
+    hierarchy = service.get_contraction_hierarchy()
+    assert hierarchy is not built[0]
+    assert hierarchy.degraded_edges(base) is None
+    route = service._route(base, source, target, [])
+    assert route["time_min"] == shortest_path(base, source, target)["time_min"]
+    assert service.get_contraction_hierarchy() is hierarchy
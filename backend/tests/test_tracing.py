@@ -0,0 +1,88 @@
+"""
+Tests for request tracing and the JSONL exporter.
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+
+from backend.services.metrics import timed
+from backend.services.tracing import Tracer, current_trace_id, span
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_nested_spans_are_exported_with_parents():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        tracer = Tracer(sample_rate=1.0, path=path)
+
+        with tracer.trace("POST /assess/network", trace_id="t1") as root:
+            assert current_trace_id() == "t1"
+            for segment_id in (1, 2):
+                with span("segment", segment_id=segment_id) as segment_span:
+                    with timed("inference"):
+                        pass
+                    segment_span.set(fault="Normal")
+            # A threadpool thread runs with a copy of the request's context
+            context = contextvars.copy_context()
+            worker = threading.Thread(target=context.run, args=(lambda: span("llm").__enter__().__exit__(None, None, None),))
+            worker.start()
+            worker.join()
+            try:
+                with span("diversion"):
+                    raise ValueError("no detour")
+            except ValueError:
+                pass
+        assert current_trace_id() is None
+        assert tracer.exporter.flush()
+        tracer.exporter.stop()
+
+        [trace] = _read(path)
+        assert trace["trace_id"] == "t1" and trace["name"] == "POST /assess/network"
+        spans = {s["span_id"]: s for s in trace["spans"]}
+        names = [s["name"] for s in trace["spans"]]
+        assert names == ["POST /assess/network", "segment", "inference", "segment", "inference", "llm", "diversion"]
+        root_id = root.span_id
+        for s in trace["spans"]:
+            if s["name"] == "inference":
+                assert spans[s["parent_id"]]["name"] == "segment"
+            elif s["name"] != "POST /assess/network":
+                assert s["parent_id"] == root_id
+        assert spans[2]["attributes"] == {"segment_id": 1, "fault": "Normal"}
+        assert trace["spans"][-1]["error"] == "ValueError"
+
+
+def test_sampling_and_slow_requests():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        tracer = Tracer(sample_rate=0.0, path=path)
+        with tracer.trace("GET /health") as root:
+            with span("child") as child:
+                pass
+        # Not recording: nothing opened, no exporter thread started
+        assert root.trace is None and child.trace is None and tracer.exporter is None
+
+        tracer.configure(slow_ms=5.0)
+        with tracer.trace("fast"):
+            pass
+        with tracer.trace("slow"):
+            threading.Event().wait(0.01)
+        tracer.exporter.flush()
+        tracer.exporter.stop()
+        assert [t["name"] for t in _read(path)] == ["slow"]
+        assert tracer.stats()["exporter"]["exported"] == 1
+
+        tracer.configure(clear_slow=True)
+        assert not tracer.enabled
+        try:
+            tracer.configure(sample_rate=2)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
@@ -0,0 +1,81 @@
+"""
+Tests for the train cascade simulator.
+"""
+
+import json
+
+import numpy as np
+
+from backend.services.diversion_service import DiversionService
+from backend.services.topology import Topology
+from backend.services.train_simulator import simulate_trains, timetable_from_records
+
+
+def _line_topology():
+    stations = ["A", "B", "C", "D"]
+    return Topology(stations, [0, 1, 2], [1, 2, 3], [1, 2, 3], [5, 5, 5], [10, 10, 10])
+
+
+def test_headway_conflicts_cascade():
+    """Trains dispatched together are spaced by the headway, in timetable order"""
+    topology = _line_topology()
+    records = [{"path": ["A", "B", "C", "D"], "departure_min": 0, "speed": 1.0} for _ in range(3)]
+    result = simulate_trains(topology, timetable_from_records(topology, records), headway_min=3, dwell_min=0)
+
+    assert np.allclose(result["delay_min"], [0, 3, 6])
+    assert result["status"] == ["normal", "congested", "delayed"]
+    assert np.allclose(result["wait_min"][:, 0], [0, 3, 6])
+
+
+def test_fast_train_does_not_overtake():
+    """A faster follower is held so it arrives a headway behind the leader"""
+    topology = _line_topology()
+    records = [
+        {"path": ["A", "B", "C", "D"], "departure_min": 0, "speed": 0.5},
+        {"path": ["A", "B", "C", "D"], "departure_min": 1, "speed": 2.0},
+    ]
+    result = simulate_trains(topology, timetable_from_records(topology, records), headway_min=2, dwell_min=0)
+    entry = result["entry_min"]
+
+    assert np.all(entry[1] + 5 >= entry[0] + 20 + 2 - 1e-9)
+    assert result["arrival_min"][1] >= result["arrival_min"][0] + 2
+
+
+def test_blocked_segment_diverts_or_cancels():
+    """Trains detour around a bypassed block and stop when there is none"""
+    topology = DiversionService().topology
+    records = [{"origin": "Station_A", "destination": "Station_E", "departure_min": 5}]
+    timetable = timetable_from_records(topology, records)
+
+    detour = simulate_trains(topology, timetable, blocked_edges=topology.edges_for_segments([2]))
+    assert detour["status"] == ["diverted"]
+    assert [topology.stations[i] for i in detour["routes"][0]] == [
+        "Station_A", "Station_B", "Station_F", "Station_C", "Station_D", "Station_E"
+    ]
+    assert detour["diversion_step"][0] == 1
+    # +3 min running via Station_F, plus one extra dwell
+    assert np.isclose(detour["delay_min"][0], 3.5)
+
+    stuck = simulate_trains(topology, timetable, blocked_edges=topology.edges_for_segments([4]))
+    assert stuck["status"] == ["cancelled"]
+    assert np.isnan(stuck["arrival_min"][0])
+
+
+def test_case_study_trains_come_from_simulation():
+    """The Mumbai diversion and fast-line knock-on delays are simulated"""
+    case_study = DiversionService().get_mumbai_case_study()
+    simulation = case_study["train_simulation"]
+    trains = {t["id"]: t for t in simulation["trains"]}
+
+    assert trains["S1"]["status"] == "diverted"
+    assert trains["S1"]["path"] == case_study["emergency_diversion"]
+    assert trains["F1"]["status"] in ("congested", "delayed")
+    assert simulation["cascade_timeline"][0]["time"] == "07:32"
+    json.dumps(simulation)
+
+    # Headline figures agree with the simulated trains
+    delays = [t["delay_min"] for t in simulation["trains"] if t["delay_min"] is not None]
+    assert case_study["actual_delay_min"] == max(delays) == case_study["impact_metrics"]["max_delay_min"]
+    assert case_study["emergency_time_min"] - case_study["optimal_time_min"] >= max(delays)
+    assert "Govandi" in case_study["skipped_stations"]
+    assert f"up to {max(delays):.0f} min" in case_study["incident_description"]
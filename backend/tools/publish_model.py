@@ -0,0 +1,51 @@
+"""
+Publish a model file as a new registry version.
+
+Run from the repository root:
+    python -m backend.tools.publish_model rf_fault_predictor --file model=railway_fault_rf_model.pkl
+    python -m backend.tools.publish_model apu_gru --file model=gru_model.keras --file scaler=scaler.pkl
+
+For rf_fault_predictor and rf_fault_fast (the cascade's first stage) the
+feature order is PredictionAgent.feature_names and the classes are read
+from the pickled model. Running servers pick the version up through
+POST /admin/models/{name}/reload or MODEL_WATCH_INTERVAL.
+"""
+
+import argparse
+import json
+
+import joblib
+
+from backend.agents.prediction_agent import PredictionAgent
+from backend.services.model_registry import REGISTRY_DIR, publish
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a model version to the registry")
+    parser.add_argument("name")
+    parser.add_argument("--file", action="append", required=True, metavar="ROLE=PATH")
+    parser.add_argument("--features", nargs="+", default=None,
+                        help="feature order (default for the fault models: PredictionAgent's)")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    files = dict(entry.split("=", 1) for entry in args.file)
+    features = args.features
+    classes = None
+    sample_inputs = None
+    if args.name in ("rf_fault_predictor", "rf_fault_fast"):
+        features = features or PredictionAgent.feature_names
+        model = joblib.load(files["model"])
+        classes = list(model.classes_)
+        sample_inputs = PredictionAgent.warmup_inputs
+        # Refuse to publish something that cannot serve
+        PredictionAgent.warm_up(model)
+    if features is None:
+        parser.error("--features is required for this model")
+
+    metadata = publish(args.name, files, features, classes, sample_inputs, root=args.root)
+    print(json.dumps(metadata, indent=2))
+
+
+if __name__ == "__main__":
+    main()
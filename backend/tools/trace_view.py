@@ -0,0 +1,200 @@
+"""
+Read the JSONL traces written by the API (TRACE_SAMPLE_RATE / TRACE_SLOW_MS).
+
+Run from the repository root:
+    python -m backend.tools.trace_view list --slowest 10
+    python -m backend.tools.trace_view show 3f2a9c      # id or prefix
+    python -m backend.tools.trace_view summary --name "POST /assess/network"
+    python -m backend.tools.trace_view folded > stacks.txt
+
+show prints the span tree of one request with a bar for each span at its
+offset in the request. Sibling spans with the same name (one "segment"
+span per segment) are merged unless --expand is given. summary adds up
+self time (a span's time minus its children's) by span name over many
+traces. folded writes collapsed stacks with self time in microseconds,
+for flamegraph.pl or speedscope.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from backend.services.tracing import TRACE_FILE
+
+BAR_WIDTH = 40
+
+
+def read_traces(path, name=None):
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            if name is None or name in trace["name"]:
+                traces.append(trace)
+    return traces
+
+
+def build_tree(trace):
+    """Root span dict with a "children" list on every span, ordered by start."""
+    spans = {s["span_id"]: {**s, "children": []} for s in trace["spans"]}
+    root = None
+    for s in sorted(spans.values(), key=lambda s: s["start_ms"]):
+        parent = spans.get(s["parent_id"])
+        if parent is None:
+            root = root or s
+        else:
+            parent["children"].append(s)
+    return root
+
+
+def self_ms(node):
+    return max(0.0, node["duration_ms"] - sum(c["duration_ms"] for c in node["children"]))
+
+
+def merge_siblings(node):
+    """Same-name children folded into one node (count, summed duration)."""
+    merged = {}
+    for child in node["children"]:
+        child = merge_siblings(child)
+        same = merged.get(child["name"])
+        if same is None:
+            merged[child["name"]] = {**child, "count": child.get("count", 1)}
+        else:
+            same["count"] += child.get("count", 1)
+            same["duration_ms"] += child["duration_ms"]
+            same["start_ms"] = min(same["start_ms"], child["start_ms"])
+            same["children"] = same["children"] + child["children"]
+    for child in merged.values():
+        if child["count"] > 1:
+            child.update(merge_siblings(child))
+    return {**node, "children": list(merged.values())}
+
+
+def _bar(node, total_ms):
+    scale = BAR_WIDTH / total_ms if total_ms > 0 else 0
+    offset = min(BAR_WIDTH - 1, int(node["start_ms"] * scale))
+    width = max(1, min(BAR_WIDTH - offset, round(node["duration_ms"] * scale)))
+    return " " * offset + "█" * width + " " * (BAR_WIDTH - offset - width)
+
+
+def _attributes(node):
+    if node.get("count", 1) > 1:
+        return f"x{node['count']}"
+    text = " ".join(f"{k}={v}" for k, v in node.get("attributes", {}).items())
+    if "error" in node:
+        text += f" error={node['error']}"
+    return text
+
+
+def show(trace, expand=False, out=sys.stdout):
+    root = build_tree(trace)
+    if not expand:
+        root = merge_siblings(root)
+    total = root["duration_ms"]
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trace["timestamp"]))
+    print(f"trace {trace['trace_id']}  {trace['name']}  {total:.2f} ms  at {stamp}", file=out)
+    print(f"{'span':<36}{'ms':>10}{'self ms':>10}{'%':>7}  |{'':<{BAR_WIDTH}}|", file=out)
+
+    def walk(node, depth):
+        label = ("  " * depth + node["name"])[:35]
+        share = 100 * node["duration_ms"] / total if total else 0
+        print(f"{label:<36}{node['duration_ms']:>10.2f}{self_ms(node):>10.2f}{share:>6.1f}%  "
+              f"|{_bar(node, total)}| {_attributes(node)}", file=out)
+        for child in node["children"]:
+            walk(child, depth + 1)
+
+    walk(root, 0)
+
+
+def summary(traces, out=sys.stdout):
+    durations = [t["duration_ms"] for t in traces]
+    print(f"{len(traces)} traces, request ms p50 {np.percentile(durations, 50):.2f}  "
+          f"p95 {np.percentile(durations, 95):.2f}  max {max(durations):.2f}", file=out)
+
+    self_time = defaultdict(float)
+    counts = defaultdict(int)
+
+    def walk(node):
+        self_time[node["name"]] += self_ms(node)
+        counts[node["name"]] += 1
+        for child in node["children"]:
+            walk(child)
+
+    for trace in traces:
+        walk(build_tree(trace))
+    total = sum(self_time.values())
+    print(f"{'span':<32}{'count':>8}{'self ms':>12}{'share':>8}", file=out)
+    for name, ms in sorted(self_time.items(), key=lambda item: -item[1]):
+        print(f"{name:<32}{counts[name]:>8}{ms:>12.2f}{100 * ms / total:>7.1f}%", file=out)
+
+
+def folded(traces, out=sys.stdout):
+    stacks = defaultdict(float)
+
+    def walk(node, prefix):
+        stack = f"{prefix};{node['name']}" if prefix else node["name"]
+        stacks[stack] += self_ms(node)
+        for child in node["children"]:
+            walk(child, stack)
+
+    for trace in traces:
+        walk(build_tree(trace), "")
+    for stack, ms in sorted(stacks.items()):
+        print(f"{stack} {round(ms * 1e3)}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect request traces")
+    parser.add_argument("--file", default=TRACE_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="recent or slowest traces")
+    list_parser.add_argument("--slowest", type=int, default=None, metavar="N")
+    list_parser.add_argument("--limit", type=int, default=20)
+    list_parser.add_argument("--name", default=None, help="substring of the request name")
+
+    show_parser = commands.add_parser("show", help="span tree of one trace")
+    show_parser.add_argument("trace_id", help="trace id or a unique prefix")
+    show_parser.add_argument("--expand", action="store_true", help="do not merge same-name siblings")
+
+    for command in ("summary", "folded"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--name", default=None, help="substring of the request name")
+
+    args = parser.parse_args()
+    traces = read_traces(args.file, getattr(args, "name", None))
+    if not traces:
+        parser.exit(1, "no traces\n")
+
+    if args.command == "list":
+        if args.slowest:
+            traces = sorted(traces, key=lambda t: -t["duration_ms"])[:args.slowest]
+        else:
+            traces = traces[-args.limit:]
+        print(f"{'trace_id':<18}{'time':<21}{'ms':>10}{'spans':>7}  name")
+        for t in traces:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t["timestamp"]))
+            print(f"{t['trace_id']:<18}{stamp:<21}{t['duration_ms']:>10.2f}{len(t['spans']):>7}  {t['name']}")
+    elif args.command == "show":
+        matches = [t for t in traces if t["trace_id"].startswith(args.trace_id)]
+        if len(matches) != 1:
+            parser.exit(1, f"{len(matches)} traces match {args.trace_id!r}\n")
+        show(matches[0], expand=args.expand)
+    elif args.command == "summary":
+        summary(traces)
+    else:
+        folded(traces)
+
+
+if __name__ == "__main__":
+    main()
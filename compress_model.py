@@ -0,0 +1,228 @@
+"""
+Compress the railway Random Forest and compare the variants.
+
+Starting from the serving model (backend/models/rf_fault_predictor.pkl,
+200 trees of depth 12; a reference forest with RF.py's settings is trained
+if the file is missing), this builds smaller variants:
+
+- tree selection: greedy forward selection of the trees that most reduce
+  the ensemble's log-loss on a validation half of RF.py's test split
+- depth: every tree cut at a shallower depth
+- precision: float16 or uint8 thresholds and leaf probabilities
+  (backend.services.compact_forest.CompactForest)
+- distillation: a single decision tree and a small gradient-boosted model
+  fitted to the forest's predictions on the training rows plus jittered
+  copies of them
+
+Each variant is scored on the other half of the test split:
+accuracy, macro-F1, agreement with the original, batch latency per row,
+single-row latency (a one-row DataFrame, as in PredictionAgent.predict),
+node count and pickled size.
+
+    python compress_model.py
+    python compress_model.py --save "select25 depth8 uint8" --save-path backend/models/rf_fault_predictor_compact.pkl
+
+Saved CompactForest variants load with joblib and expose predict /
+predict_proba / classes_, so PredictionAgent(model_path=...) serves them.
+"""
+
+import argparse
+import os
+import pickle
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.services.compact_forest import CompactForest
+from dataset_store import load
+
+MODEL_PATH = os.path.join("backend", "models", "rf_fault_predictor.pkl")
+
+FEATURES = [
+    "wear_level",
+    "alignment_deviation",
+    "vibration_index",
+    "environment_factor",
+    "load_cycles"
+]
+CLASS_WEIGHTS = {
+    "Normal": 1.0,
+    "Surface_Crack": 2.5,
+    "Misalignment": 1.5,
+    "Severe_Degradation": 0.7
+}
+
+SELECTED_TREES = [10, 25, 50]
+DEPTHS = [6, 8]
+JITTER = 0.05          # distillation noise, as a share of each feature's std
+SINGLE_ROW_CALLS = 200
+
+
+def split():
+    """RF.py's train/test split; the test part halved into (validation, report)."""
+    df = load(FEATURES + ["fault_label"])
+    X, y = df[FEATURES], df["fault_label"].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.25, random_state=42, stratify=y
+    )
+    X_val, X_report, y_val, y_report = train_test_split(
+        X_test, y_test, test_size=0.5, random_state=0, stratify=y_test
+    )
+    return (X_train, y_train), (X_val, y_val), (X_report, y_report)
+
+
+def reference_forest(X_train, y_train):
+    """The forest RF.py trains."""
+    return RandomForestClassifier(
+        n_estimators=200, max_depth=12, class_weight=CLASS_WEIGHTS, random_state=42, n_jobs=-1
+    ).fit(X_train, y_train)
+
+
+def select_trees(forest, X_val, y_val, counts):
+    """
+    Greedy forward selection by validation log-loss.
+
+    Returns {count: [tree index]} for each requested count (prefixes of one
+    selection order).
+    """
+    X_val = np.asarray(X_val, dtype=np.float32)
+    truth = np.searchsorted(forest.classes_, np.asarray(y_val))
+    # (trees, rows): each tree's probability for the true class
+    tree_proba = np.stack([
+        est.predict_proba(X_val)[np.arange(len(truth)), truth] for est in forest.estimators_
+    ])
+
+    chosen, total = [], np.zeros(len(truth))
+    available = np.ones(len(tree_proba), dtype=bool)
+    for k in range(1, max(counts) + 1):
+        mean = (total + tree_proba) / k
+        loss = -np.log(np.clip(mean, 1e-6, None)).mean(axis=1)
+        loss[~available] = np.inf
+        best = int(np.argmin(loss))
+        chosen.append(best)
+        available[best] = False
+        total += tree_proba[best]
+    return {count: chosen[:count] for count in counts}
+
+
+def distill(forest, X_train, seed=0):
+    """Teacher-labelled training rows plus jittered copies."""
+    rng = np.random.default_rng(seed)
+    X = X_train.to_numpy(dtype=np.float32)
+    noisy = X + rng.normal(0, 1, X.shape) * (JITTER * X.std(axis=0))
+    X_distill = pd.DataFrame(np.vstack([X, noisy]), columns=FEATURES)
+    return X_distill, forest.predict(X_distill)
+
+
+def build_variants(forest, train, val):
+    """[(name, model)] from the original to the smallest."""
+    X_train, _ = train
+    variants = [("original", forest), ("compact float32", CompactForest(forest))]
+
+    for precision in ("float16", "uint8"):
+        variants.append((f"compact {precision}", CompactForest(forest, precision=precision)))
+    for depth in DEPTHS:
+        variants.append((f"depth{depth}", CompactForest(forest, max_depth=depth)))
+
+    selections = select_trees(forest, *val, SELECTED_TREES)
+    for count, trees in selections.items():
+        variants.append((f"select{count}", CompactForest(forest, trees=trees)))
+    variants.append(("select25 depth8 uint8", CompactForest(
+        forest, trees=selections[25], max_depth=8, precision="uint8"
+    )))
+
+    X_distill, y_distill = distill(forest, X_train)
+    variants.append(("distilled tree depth8", DecisionTreeClassifier(
+        max_depth=8, random_state=42
+    ).fit(X_distill, y_distill)))
+    variants.append(("distilled gbm 30x depth3", HistGradientBoostingClassifier(
+        max_iter=30, max_depth=3, random_state=42
+    ).fit(X_distill, y_distill)))
+    return variants
+
+
+def _nodes(model):
+    if isinstance(model, CompactForest):
+        return model.n_nodes
+    if isinstance(model, RandomForestClassifier):
+        return sum(est.tree_.node_count for est in model.estimators_)
+    if isinstance(model, DecisionTreeClassifier):
+        return model.tree_.node_count
+    return sum(p.nodes.shape[0] for iteration in model._predictors for p in iteration)
+
+
+def _trees_and_depth(model):
+    if isinstance(model, CompactForest):
+        return model.n_trees, model.max_depth
+    if isinstance(model, RandomForestClassifier):
+        return len(model.estimators_), max(est.get_depth() for est in model.estimators_)
+    if isinstance(model, DecisionTreeClassifier):
+        return 1, model.get_depth()
+    return sum(len(iteration) for iteration in model._predictors), model.max_depth
+
+
+def evaluate(name, model, original, report):
+    X, y = report
+    start = time.perf_counter()
+    y_pred = model.predict(X)
+    batch_s = time.perf_counter() - start
+
+    row = X.iloc[:1]
+    single = []
+    for _ in range(SINGLE_ROW_CALLS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - start)
+
+    trees, depth = _trees_and_depth(model)
+    return {
+        "variant": name,
+        "trees": trees,
+        "max_depth": depth,
+        "nodes": _nodes(model),
+        "size_kb": len(pickle.dumps(model)) / 1024,
+        "accuracy": accuracy_score(y, y_pred),
+        "macro_f1": f1_score(y, y_pred, average="macro"),
+        "agreement": float(np.mean(y_pred == original)),
+        "batch_us_per_row": 1e6 * batch_s / len(y),
+        "single_row_ms": 1e3 * float(np.median(single))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress the railway Random Forest")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default="compression_results.csv")
+    parser.add_argument("--save", default=None, help="variant name to save")
+    parser.add_argument("--save-path", default=None)
+    args = parser.parse_args()
+
+    train, val, report = split()
+    if os.path.exists(args.model):
+        forest = joblib.load(args.model)
+    else:
+        print(f"{args.model} not found; training a reference forest with RF.py's settings")
+        forest = reference_forest(*train)
+
+    variants = build_variants(forest, train, val)
+    original = forest.predict(report[0])
+    results = pd.DataFrame(
+        [evaluate(name, model, original, report) for name, model in variants]
+    ).set_index("variant")
+    results.to_csv(args.output)
+
+    pd.set_option("display.width", 200)
+    print(results.round(4).to_string())
+
+    if args.save:
+        models = dict(variants)
+        if args.save not in models or not args.save_path:
+            raise SystemExit(f"--save needs --save-path and one of: {list(models)}")
+        joblib.dump(models[args.save], args.save_path)
+        print(f"Saved {args.save} to {args.save_path}")
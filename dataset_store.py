@@ -0,0 +1,214 @@
+"""
+Columnar store for the simulated track dataset.
+
+The CSVs are parsed in full on every run, into float64 / int64 / object
+columns. This module converts them once into an uncompressed Feather (Arrow
+IPC) file under data/cache/ with compact dtypes (int32 ids, int16 load
+cycles, float32 measures, categorical fault_label) and loads it
+memory-mapped, reading only the columns a script asks for.
+
+    from dataset_store import load
+    df = load(["wear_level", "fault_label"])
+
+load() converts the CSV on first use and again whenever the CSV is newer
+than its store. A Parquet directory written by railway_dataset.py
+(--output <dir>) can be passed as source too; it is read column-pruned.
+iter_batches() streams either kind in bounded batches for datasets that
+do not fit in memory.
+
+Compare against pd.read_csv (load time and peak RSS, each in a fresh
+process):
+
+    python dataset_store.py convert railway_track_simulated_dataset*.csv
+    python dataset_store.py bench --columns wear_level fault_label
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from railway_dataset import COLUMNS, FAULT_LABELS
+
+DEFAULT_SOURCE = "railway_track_simulated_dataset_final.csv"
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cache")
+STORE_SUFFIX = ".feather"
+BATCH_ROWS = 1_000_000
+
+DTYPES = {
+    "segment_id": "int32",
+    "time_step": "int32",
+    "load_cycles": "int16",
+    "wear_level": "float32",
+    "alignment_deviation": "float32",
+    "vibration_index": "float32",
+    "environment_factor": "float32",
+    "degradation_rate": "float32",
+    "risk_score": "float32",
+    "fault_label": pd.CategoricalDtype(FAULT_LABELS)
+}
+
+
+def store_path(csv_path):
+    """Feather file in CACHE_DIR that stores csv_path."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, name + STORE_SUFFIX)
+
+
+def convert(csv_path, path=None):
+    """
+    Convert a dataset CSV to a Feather store with compact dtypes.
+    Returns the store path.
+    """
+    import pyarrow.feather as feather
+
+    path = path or store_path(csv_path)
+    df = pd.read_csv(csv_path, dtype=DTYPES)
+    unknown = df["fault_label"].isna().sum()
+    if unknown:
+        raise ValueError(f"{csv_path}: {unknown} rows with a label not in {FAULT_LABELS}")
+
+    # Uncompressed, so it can be memory-mapped; write then rename so a
+    # concurrent reader never sees a partial file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    feather.write_feather(df[COLUMNS], tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return path
+
+
+def _is_stale(source, path):
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source)
+
+
+def _file_store(source):
+    """Feather file for source, converting a CSV if its store is stale."""
+    if not source.endswith(".csv"):
+        return source
+    path = store_path(source)
+    if _is_stale(source, path):
+        convert(source, path)
+    return path
+
+
+def load(columns=None, source=DEFAULT_SOURCE):
+    """
+    Load the dataset (all columns if columns is None) with compact dtypes.
+
+    source: a dataset CSV (read through its Feather store, converted on
+    demand), a Feather file, or a Parquet dataset directory.
+    """
+    import pyarrow.feather as feather
+
+    if os.path.isdir(source):
+        # Hive partitions add a segment_range column; only asked-for columns come back
+        df = pd.read_parquet(source, columns=columns or COLUMNS)
+        return df.reset_index(drop=True)
+
+    path = _file_store(source)
+    # Memory-mapped: only the pages of the selected columns are read
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def iter_batches(columns=None, source=DEFAULT_SOURCE, batch_rows=BATCH_ROWS):
+    """
+    Yield the dataset as DataFrames of at most batch_rows rows, in storage
+    order (segment-major). Only one batch (plus Arrow's read-ahead) is in
+    memory at a time.
+    """
+    import pyarrow.dataset as ds
+
+    if os.path.isdir(source):
+        dataset = ds.dataset(source, format="parquet", partitioning="hive")
+    else:
+        dataset = ds.dataset(_file_store(source), format="feather")
+    batches = dataset.to_batches(
+        columns=columns or COLUMNS, batch_size=batch_rows, fragment_readahead=1
+    )
+    for batch in batches:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB."""
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _measure(task):
+    """Worker (fresh process): time one load and report its peak RSS."""
+    how, source, columns = task
+    # Both loaders start from the same imports, so peak RSS compares fairly
+    import pyarrow.feather  # noqa: F401
+
+    start = time.perf_counter()
+    if how == "csv":
+        df = pd.read_csv(source, usecols=columns)
+    else:
+        df = load(columns, source)
+    elapsed = time.perf_counter() - start
+    # Touch every value, as training would
+    df.select_dtypes("number").sum()
+    return {
+        "loader": how,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def bench(source=DEFAULT_SOURCE, columns=None, repeat=3):
+    """
+    Best-of-repeat load time and process peak RSS for pd.read_csv versus
+    load(), each measured in a fresh process so allocations do not mix.
+    """
+    if _is_stale(source, store_path(source)):
+        convert(source)
+
+    ctx = get_context("spawn")
+    rows = []
+    for how in ("csv", "store"):
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                runs.append(pool.submit(_measure, (how, source, columns)).result())
+        rows.append(min(runs, key=lambda r: r["seconds"]))
+    return pd.DataFrame(rows).set_index("loader")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar store for the track dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = sub.add_parser("convert", help="CSV -> Feather store")
+    convert_parser.add_argument("csv", nargs="+")
+
+    bench_parser = sub.add_parser("bench", help="load time and RSS versus pd.read_csv")
+    bench_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    bench_parser.add_argument("--columns", nargs="*", default=None)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        for csv_path in args.csv:
+            path = convert(csv_path)
+            print(f"{csv_path} ({os.path.getsize(csv_path) / 1e6:.1f} MB) -> "
+                  f"{path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    else:
+        result = bench(args.source, args.columns, args.repeat)
+        print(f"source: {args.source}, columns: {args.columns or 'all'}")
+        print(result.round(3).to_string())
+        csv, store = result.loc["csv"], result.loc["store"]
+        print(f"speed-up: {csv['seconds'] / store['seconds']:.1f}x, "
+              f"frame memory: {csv['frame_mb'] / store['frame_mb']:.1f}x smaller")
@@ -2,7 +2,17 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-df = pd.read_csv("railway_track_simulated_dataset_final.csv")
+from dataset_store import load
+
+df = load([
+    "segment_id",
+    "time_step",
+    "wear_level",
+    "alignment_deviation",
+    "vibration_index",
+    "risk_score",
+    "fault_label"
+])
 print(df.head())
 print(df.info())
 plt.figure(figsize=(7,5))
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { BatchRequest, NetworkAssessmentResponse, APUPredictRequest, APUPredictResponse } from '../types';
+import { BatchRequest, NetworkAssessmentResponse, APUPredictRequest, APUPredictResponse, Topology, ViewportGraph } from '../types';
 
 // In development: use /api proxy
 // In production: use full URL or relative path
@@ -17,6 +17,28 @@ const api = axios.create({
   },
 });
 
+// Topology is shared by every diversion response; fetch it once per version
+const topologyCache: { [version: string]: Topology } = {};
+
+const getTopology = async (version: string): Promise<Topology> => {
+  if (!topologyCache[version]) {
+    const response = await api.get<Topology>('/network/topology');
+    topologyCache[response.data.topology_version] = response.data;
+  }
+  // The server only serves its current topology: a response computed on
+  // another version cannot be drawn on it
+  const topology = topologyCache[version];
+  if (!topology) {
+    throw new Error(`Network topology changed (response uses ${version}); re-run the assessment`);
+  }
+  return topology;
+};
+
+const hydrateGraphData = async <T extends { topology_version: string }>(graphData: T) => {
+  const topology = await getTopology(graphData.topology_version);
+  return { ...graphData, nodes: topology.nodes, edges: topology.edges };
+};
+
 export const maintenanceApi = {
   // Health check
   healthCheck: async () => {
@@ -27,7 +49,19 @@ export const maintenanceApi = {
   // Assess network
   assessNetwork: async (request: BatchRequest): Promise<NetworkAssessmentResponse> => {
     const response = await api.post<NetworkAssessmentResponse>('/assess/network', request);
-    return response.data;
+    const data = response.data;
+
+    // Attach the shared topology to every graph_data block
+    const networkPath = data.network_summary?.network_path;
+    if (networkPath?.graph_data) {
+      networkPath.graph_data = await hydrateGraphData(networkPath.graph_data);
+    }
+    for (const segment of data.segments) {
+      if (segment.diversion_plan?.graph_data) {
+        segment.diversion_plan.graph_data = await hydrateGraphData(segment.diversion_plan.graph_data);
+      }
+    }
+    return data;
   },
 
   // Assess batch
@@ -37,6 +71,18 @@ export const maintenanceApi = {
   },
 };
 
+export const networkApi = {
+  getTopology,
+
+  // Nodes/edges inside [xmin, ymin, xmax, ymax], simplified for the zoom level
+  getViewport: async (bbox: [number, number, number, number], zoom: number): Promise<ViewportGraph> => {
+    const response = await api.get<ViewportGraph>('/network/viewport', {
+      params: { bbox: bbox.join(','), zoom },
+    });
+    return response.data;
+  },
+};
+
 export const apuApi = {
   // Predict APU RUL
   predictAPU: async (request: APUPredictRequest): Promise<APUPredictResponse> => {
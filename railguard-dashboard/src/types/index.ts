@@ -23,11 +23,45 @@ export interface GraphEdge {
   source: string;
   target: string;
   segment_id: number;
+  closed?: boolean;
 }
 
-export interface GraphData {
+// Shared topology served by /network/topology (one copy per version)
+export interface Topology {
+  topology_version: string;
   nodes: GraphNode[];
   edges: GraphEdge[];
+}
+
+// Map viewport served by /network/viewport: at low zoom, chains of stations
+// are collapsed ("collapsed") or merged into clusters ("clustered")
+export interface ViewportNode extends GraphNode {
+  stations?: number; // clustered level only
+}
+
+export interface ViewportEdge {
+  source: string;
+  target: string;
+  segment_id?: number;    // full level
+  segment_ids?: number[]; // collapsed level
+  via?: number;
+  segments?: number;      // clustered level
+  closed?: boolean;
+}
+
+export interface ViewportGraph {
+  topology_version: string;
+  zoom: number;
+  level: 'full' | 'collapsed' | 'clustered';
+  bbox: [number, number, number, number];
+  nodes: ViewportNode[];
+  edges: ViewportEdge[];
+}
+
+export interface GraphData {
+  topology_version: string;
+  nodes?: GraphNode[]; // filled in client-side from the cached Topology
+  edges?: GraphEdge[];
   blocked_edge: { source: string; target: string };
 }
 
@@ -1,4 +1,7 @@
-import random
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
@@ -9,113 +12,22 @@ NUM_SEGMENTS = 10
 TIME_STEPS = 3000
 ALPHA = 0.00001
 BETA = 0.15
+SEED = 42
 
-data = []
+# Segments simulated together; bounds memory at
+# CHUNK_SEGMENTS * TIME_STEPS rows per column (per worker). Each chunk has
+# its own RNG stream, so output depends on the seed and chunk size only,
+# not on the number of workers.
+CHUNK_SEGMENTS = 1024
+PARQUET_ROW_GROUP = 1_000_000
 
-# -----------------------------
-# Fault labeling logic
-# -----------------------------
-def assign_fault_label(wear, alignment, vibration, t, severe_counter):
-    if severe_counter > 100 and t > 2000:
-        return "Severe_Degradation"
-    elif alignment >= 5:
-        return "Misalignment"
-    elif wear >= 0.30:
-        return "Surface_Crack"
-    else:
-        return "Normal"
+HIGH_RISK_PROB = 0.05      # share of risky segments
+STRESS_PROB = 0.01         # per-step episodic stress on risky segments
+FAST_DEGRADATION_PROB = 0.15
 
-# -----------------------------
-# Simulation Loop
-# -----------------------------
-for segment_id in range(1, NUM_SEGMENTS + 1):
-
-    wear = random.uniform(0.05, 0.15)
-    alignment = random.uniform(0.1, 0.5)
-
-    high_risk_segment = random.random() < 0.05  # 10% risky segments
-    severe_counter = 0
-    INSPECTION_INTERVAL = 50  # sample every 50 timesteps
-
-
-
-    for t in range(TIME_STEPS):
-
-        load_cycles = random.randint(100, 1000)
-        environment_factor = round(random.uniform(0.8, 1.2), 2)
-
-        if random.random() < 0.15:
-            degradation_rate = round(random.uniform(0.08, 0.15), 3)
-        else:
-            degradation_rate = round(random.uniform(0.01, 0.08), 3)
-
-        # -----------------------------
-        # Wear evolution
-        # -----------------------------
-        wear += ALPHA * load_cycles * degradation_rate * environment_factor
-
-        # Rare episodic stress (segment-level risk)
-        if high_risk_segment and random.random() < 0.01:
-            wear += random.uniform(0.02, 0.04)
-
-        wear = min(max(wear, 0), 0.9)
-
-        # -----------------------------
-        # Alignment evolution
-        # -----------------------------
-        noise = np.random.normal(0, 0.2)
-        if wear > 0.4:
-            alignment += BETA * wear + noise
-        else:
-            alignment += noise * 0.1
-
-        alignment = min(max(alignment, 0), 10)
-
-        # -----------------------------
-        # Vibration index
-        # -----------------------------
-        vibration = 100 * (0.6 * wear + 0.4 * (alignment / 10))
-        vibration = min(max(vibration, 0), 100)
-
-        # -----------------------------
-        # Severe persistence logic
-        # -----------------------------
-        if wear >= 0.65 and vibration >= 65:
-            severe_counter += 1
-        else:
-            severe_counter = max(severe_counter - 1, 0)
-
-        # -----------------------------
-        # Risk score
-        # -----------------------------
-        risk_score = (
-            0.4 * wear +
-            0.3 * (alignment / 10) +
-            0.3 * (vibration / 100)
-        )
-        fault_label = assign_fault_label(
-            wear, alignment, vibration, t, severe_counter
-        )
-        # if t % INSPECTION_INTERVAL != 0:
-        #     continue
-
-        data.append([
-            segment_id,
-            t,
-            load_cycles,
-            round(wear, 3),
-            round(alignment, 2),
-            round(vibration, 1),
-            environment_factor,
-            degradation_rate,
-            round(risk_score, 3),
-            fault_label
-        ])
+FAULT_LABELS = ["Normal", "Surface_Crack", "Misalignment", "Severe_Degradation"]
 
-# -----------------------------
-# Save Dataset
-# -----------------------------
-columns = [
+COLUMNS = [
     "segment_id",
     "time_step",
     "load_cycles",
@@ -128,9 +40,210 @@ columns = [
     "fault_label"
 ]
 
-df = pd.DataFrame(data, columns=columns)
-df.to_csv("railway_track_simulated_dataset_final.csv", index=False)
 
-print("Dataset generated successfully!")
-print(df.head())
-print(df['fault_label'].value_counts(normalize=True))
+# -----------------------------
+# Fault labeling logic
+# -----------------------------
+def assign_fault_label(wear, alignment, vibration, t, severe_counter):
+    """
+    Label codes (index into FAULT_LABELS) for arrays of states; t may be a
+    scalar or an array broadcasting against them.
+    """
+    return np.select(
+        [
+            (severe_counter > 100) & (t > 2000),
+            alignment >= 5,
+            wear >= 0.30
+        ],
+        [3, 2, 1],
+        default=0
+    ).astype(np.int8)
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+def simulate_segments(num_segments, rng, time_steps=TIME_STEPS, first_segment_id=1):
+    """
+    Simulate num_segments segments over time_steps steps at once.
+
+    Draws that do not depend on state (load cycles, environment factor,
+    degradation rate, episodic stress) are made for all steps in one go;
+    wear is their clipped running sum (increments are never negative).
+    Alignment clipping and the severe counter depend on the path, so they
+    advance step by step, each step updating every segment as an array.
+
+    Returns a DataFrame with COLUMNS, segment-major like the original
+    per-segment loop.
+    """
+    shape = (time_steps, num_segments)
+
+    wear0 = rng.uniform(0.05, 0.15, num_segments)
+    alignment = rng.uniform(0.1, 0.5, num_segments)
+    high_risk = rng.random(num_segments) < HIGH_RISK_PROB
+
+    load_cycles = rng.integers(100, 1001, shape, dtype=np.int16)
+    environment_factor = np.round(rng.uniform(0.8, 1.2, shape), 2)
+    # Fast range U(0.08, 0.15), normal U(0.01, 0.08): same width, one draw
+    fast = rng.random(shape) < FAST_DEGRADATION_PROB
+    degradation_rate = np.round(0.07 * rng.random(shape) + np.where(fast, 0.08, 0.01), 3)
+
+    # -----------------------------
+    # Wear evolution
+    # -----------------------------
+    increment = ALPHA * load_cycles * degradation_rate * environment_factor
+    stress = high_risk & (rng.random(shape) < STRESS_PROB)
+    increment[stress] += rng.uniform(0.02, 0.04, int(stress.sum()))
+    wear = np.minimum(wear0 + np.cumsum(increment, axis=0), 0.9)
+    del increment, stress, fast
+
+    # -----------------------------
+    # Alignment and severe persistence (path dependent)
+    # -----------------------------
+    noise = rng.normal(0, 0.2, shape)
+    alignment_path = np.empty(shape)
+    severe_counter = np.zeros(num_segments, dtype=np.int32)
+    severe_path = np.empty(shape, dtype=np.int32)
+
+    for t in range(time_steps):
+        w = wear[t]
+        alignment += np.where(w > 0.4, BETA * w + noise[t], noise[t] * 0.1)
+        np.clip(alignment, 0, 10, out=alignment)
+        alignment_path[t] = alignment
+
+        vibration = np.clip(100 * (0.6 * w + 0.4 * (alignment / 10)), 0, 100)
+        severe = (w >= 0.65) & (vibration >= 65)
+        severe_counter = np.where(severe, severe_counter + 1, np.maximum(severe_counter - 1, 0))
+        severe_path[t] = severe_counter
+    del noise
+
+    # -----------------------------
+    # Vibration index, risk score and labels
+    # -----------------------------
+    vibration = np.clip(100 * (0.6 * wear + 0.4 * (alignment_path / 10)), 0, 100)
+    risk_score = 0.4 * wear + 0.3 * (alignment_path / 10) + 0.3 * (vibration / 100)
+    steps = np.arange(time_steps)[:, None]
+    labels = assign_fault_label(wear, alignment_path, vibration, steps, severe_path)
+
+    # (time, segment) -> segment-major rows
+    def rows(a):
+        return a.T.ravel()
+
+    # Compact dtypes: int32 ids, float32 measures, categorical label
+    def measure(a, decimals):
+        return np.round(rows(a), decimals).astype(np.float32)
+
+    return pd.DataFrame({
+        "segment_id": np.repeat(
+            np.arange(first_segment_id, first_segment_id + num_segments, dtype=np.int32), time_steps
+        ),
+        "time_step": np.tile(np.arange(time_steps, dtype=np.int32), num_segments),
+        "load_cycles": rows(load_cycles),
+        "wear_level": measure(wear, 3),
+        "alignment_deviation": measure(alignment_path, 2),
+        "vibration_index": measure(vibration, 1),
+        "environment_factor": measure(environment_factor, 2),
+        "degradation_rate": measure(degradation_rate, 3),
+        "risk_score": measure(risk_score, 3),
+        "fault_label": pd.Categorical.from_codes(rows(labels), categories=FAULT_LABELS)
+    }, columns=COLUMNS)
+
+
+def chunk_ranges(num_segments, chunk_segments=CHUNK_SEGMENTS):
+    """(first segment_id, segment count) per chunk."""
+    return [
+        (first + 1, min(chunk_segments, num_segments - first))
+        for first in range(0, num_segments, chunk_segments)
+    ]
+
+
+def chunk_rngs(seed, num_chunks):
+    """Independent generators per chunk, spawned from one SeedSequence."""
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(num_chunks)]
+
+
+def generate(num_segments=NUM_SEGMENTS, time_steps=TIME_STEPS, seed=SEED, chunk_segments=CHUNK_SEGMENTS):
+    """Yield the dataset as DataFrames of up to chunk_segments segments each."""
+    chunks = chunk_ranges(num_segments, chunk_segments)
+    for (first, count), rng in zip(chunks, chunk_rngs(seed, len(chunks))):
+        yield simulate_segments(count, rng, time_steps=time_steps, first_segment_id=first)
+
+
+def partition_name(first, count):
+    """Parquet partition directory for a segment_id range."""
+    return f"segment_range={first:09d}-{first + count - 1:09d}"
+
+
+def _write_chunk(task):
+    """Worker: simulate one chunk and write it as its own partition."""
+    output_dir, first, count, time_steps, rng = task
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = simulate_segments(count, rng, time_steps=time_steps, first_segment_id=first)
+    path = os.path.join(output_dir, partition_name(first, count))
+    os.makedirs(path, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, os.path.join(path, "part-0.parquet"), row_group_size=PARQUET_ROW_GROUP)
+    return len(df), df["fault_label"].value_counts().reindex(FAULT_LABELS, fill_value=0)
+
+
+def write_parquet(output_dir, num_segments=NUM_SEGMENTS, time_steps=TIME_STEPS, seed=SEED,
+                  chunk_segments=CHUNK_SEGMENTS, workers=None):
+    """
+    Generate the dataset across a process pool straight into Parquet, one
+    partition per segment_id range. Each worker holds a single chunk at a
+    time and only row/label counts come back, so peak memory is about
+    workers x chunk size. Returns (rows written, label counts).
+    """
+    chunks = chunk_ranges(num_segments, chunk_segments)
+    tasks = [
+        (output_dir, first, count, time_steps, rng)
+        for (first, count), rng in zip(chunks, chunk_rngs(seed, len(chunks)))
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    os.makedirs(output_dir, exist_ok=True)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_write_chunk, tasks))
+    else:
+        results = [_write_chunk(task) for task in tasks]
+
+    rows = sum(r[0] for r in results)
+    label_counts = sum((r[1] for r in results), pd.Series(0, index=FAULT_LABELS))
+    return rows, label_counts
+
+
+# -----------------------------
+# Save Dataset
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate railway track degradation data")
+    parser.add_argument("--segments", type=int, default=NUM_SEGMENTS)
+    parser.add_argument("--time-steps", type=int, default=TIME_STEPS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument(
+        "--output", default="railway_track_simulated_dataset_final.csv",
+        help="CSV file, or a directory for partitioned Parquet (no .csv suffix)"
+    )
+    parser.add_argument("--chunk-segments", type=int, default=CHUNK_SEGMENTS)
+    parser.add_argument("--workers", type=int, default=None, help="Parquet only; default: CPU count")
+    args = parser.parse_args()
+
+    if args.output.endswith(".csv"):
+        label_counts = pd.Series(0, index=FAULT_LABELS)
+        chunks = generate(args.segments, args.time_steps, args.seed, args.chunk_segments)
+        for i, df in enumerate(chunks):
+            df.to_csv(args.output, index=False, mode="w" if i == 0 else "a", header=i == 0)
+            label_counts += df["fault_label"].value_counts().reindex(FAULT_LABELS, fill_value=0)
+            if i == 0:
+                print(df.head())
+    else:
+        rows, label_counts = write_parquet(
+            args.output, args.segments, args.time_steps, args.seed, args.chunk_segments, args.workers
+        )
+        print(f"{rows} rows written to {args.output}")
+
+    print("Dataset generated successfully!")
+    print(label_counts / label_counts.sum())
@@ -0,0 +1,201 @@
+"""
+Headless hyperparameter sweep for the fault models.
+
+The dataset is loaded once and written to .npy arrays in a cache
+directory (data/cache/sweep/): features (float32), label codes and time
+steps. Every worker in the process pool opens those arrays with
+np.load(mmap_mode="r"), so they all share one copy in the page cache
+instead of each parsing the CSV.
+
+Splits are time-aware and per segment (forward chaining): time steps are
+cut into --folds + 1 equal blocks, and fold k trains on every segment's
+steps before block k + 1 and tests on block k + 1. A model is never scored
+on history older than what it was trained on. Fold indices are cached next
+to the arrays, keyed by the source file and fold count, so reruns skip
+both the load and the split.
+
+Each (configuration, fold) pair is one task. Results are averaged per
+configuration and written to a CSV: training time, batch inference latency
+per row, single-row latency, accuracy and macro-F1.
+
+    python sweep.py --workers 4 --output sweep_results.csv
+    python sweep.py --configs my_configs.json   # [{"model": "rf", "params": {...}}, ...]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+from dataset_store import CACHE_DIR as DATA_CACHE_DIR
+from dataset_store import DEFAULT_SOURCE, load
+from train_streaming import CLASS_WEIGHTS, FEATURES, XGB_PARAMS
+
+CACHE_DIR = os.path.join(DATA_CACHE_DIR, "sweep")
+FOLDS = 3
+SINGLE_ROW_CALLS = 50
+
+DEFAULT_GRID = {
+    "rf": {"n_estimators": [100, 200], "max_depth": [8, 12]},
+    "xgb": {"max_depth": [4, 6], "eta": [0.05, 0.1], "num_boost_round": [200]}
+}
+
+
+def default_configs():
+    """Cartesian product of DEFAULT_GRID, as [{"model", "params"}]."""
+    configs = []
+    for model, grid in DEFAULT_GRID.items():
+        keys = list(grid)
+        for values in itertools.product(*grid.values()):
+            configs.append({"model": model, "params": dict(zip(keys, values))})
+    return configs
+
+
+def _cache_key(source, *extra):
+    stat = os.stat(source)
+    raw = json.dumps([os.path.abspath(source), stat.st_mtime_ns, stat.st_size, *extra])
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def prepare(source=DEFAULT_SOURCE, cache_dir=CACHE_DIR, folds=FOLDS):
+    """
+    Write the arrays and fold indices once; returns the cache directory
+    holding X.npy, y.npy, time.npy and fold_<k>_{train,test}.npy.
+    """
+    path = os.path.join(cache_dir, _cache_key(source, folds))
+    if os.path.exists(os.path.join(path, "done")):
+        return path
+    os.makedirs(path, exist_ok=True)
+
+    df = load(FEATURES + ["time_step", "fault_label"], source)
+    np.save(os.path.join(path, "X.npy"), df[FEATURES].to_numpy(dtype=np.float32))
+    np.save(os.path.join(path, "y.npy"), df["fault_label"].cat.codes.to_numpy())
+    time_step = df["time_step"].to_numpy()
+    np.save(os.path.join(path, "time.npy"), time_step)
+    del df
+
+    # Forward chaining over time blocks, the same cut for every segment
+    edges = np.linspace(0, time_step.max() + 1, folds + 2)
+    block = np.searchsorted(edges, time_step, side="right") - 1
+    for k in range(folds):
+        np.save(os.path.join(path, f"fold_{k}_train.npy"), np.nonzero(block <= k)[0])
+        np.save(os.path.join(path, f"fold_{k}_test.npy"), np.nonzero(block == k + 1)[0])
+
+    open(os.path.join(path, "done"), "w").close()
+    return path
+
+
+def _fit(model, params, X, y):
+    if model == "rf":
+        options = {"class_weight": CLASS_WEIGHTS, "random_state": 42, **params, "n_jobs": 1}
+        return RandomForestClassifier(**options).fit(X, y)
+    options = {**XGB_PARAMS, "nthread": 1, **params}
+    rounds = options.pop("num_boost_round", 200)
+    return xgb.train(options, xgb.DMatrix(X, label=y), num_boost_round=rounds)
+
+
+def _predict(model, fitted, X):
+    if model == "rf":
+        return fitted.predict(X)
+    return fitted.inplace_predict(X)
+
+
+def _evaluate(task):
+    """Worker: train one configuration on one fold (arrays memory-mapped)."""
+    path, config_id, model, params, fold = task
+
+    def array(name):
+        return np.load(os.path.join(path, name), mmap_mode="r")
+
+    X, y = array("X.npy"), array("y.npy")
+    train, test = array(f"fold_{fold}_train.npy"), array(f"fold_{fold}_test.npy")
+    X_train, y_train = X[train], y[train]
+    X_test, y_test = X[test], y[test]
+
+    start = time.perf_counter()
+    fitted = _fit(model, params, X_train, y_train)
+    train_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = _predict(model, fitted, X_test)
+    batch_s = time.perf_counter() - start
+
+    single = []
+    for row in X_test[:SINGLE_ROW_CALLS]:
+        start = time.perf_counter()
+        _predict(model, fitted, row[None, :])
+        single.append(time.perf_counter() - start)
+
+    return {
+        "config_id": config_id,
+        "fold": fold,
+        "train_rows": len(train),
+        "train_s": train_s,
+        "batch_us_per_row": 1e6 * batch_s / len(test),
+        "single_row_ms": 1e3 * float(np.median(single)),
+        "accuracy": accuracy_score(y_test, y_pred),
+        # Over the classes present in the fold (early blocks have no severe faults)
+        "macro_f1": f1_score(y_test, y_pred, average="macro", zero_division=0)
+    }
+
+
+def sweep(configs, source=DEFAULT_SOURCE, folds=FOLDS, workers=None, cache_dir=CACHE_DIR):
+    """
+    Run every configuration on every fold across a process pool.
+
+    Returns (per-configuration DataFrame sorted by macro-F1, per-fold DataFrame).
+    """
+    path = prepare(source, cache_dir, folds)
+    tasks = [
+        (path, i, config["model"], config["params"], fold)
+        for i, config in enumerate(configs)
+        for fold in range(folds)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        per_fold = pd.DataFrame(list(pool.map(_evaluate, tasks)))
+
+    metrics = ["train_s", "batch_us_per_row", "single_row_ms", "accuracy", "macro_f1"]
+    summary = per_fold.groupby("config_id")[metrics].mean()
+    summary["macro_f1_std"] = per_fold.groupby("config_id")["macro_f1"].std(ddof=0)
+    summary.insert(0, "model", [configs[i]["model"] for i in summary.index])
+    summary.insert(1, "params", [json.dumps(configs[i]["params"], sort_keys=True) for i in summary.index])
+    return summary.sort_values("macro_f1", ascending=False), per_fold
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for the fault models")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="dataset CSV, Feather store or Parquet directory")
+    parser.add_argument("--configs", default=None, help="JSON list of {model, params}")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    if args.configs:
+        with open(args.configs) as f:
+            configs = json.load(f)
+    else:
+        configs = default_configs()
+
+    start = time.perf_counter()
+    summary, per_fold = sweep(configs, args.source, args.folds, args.workers, args.cache_dir)
+    summary.to_csv(args.output)
+    per_fold.to_csv(os.path.splitext(args.output)[0] + "_folds.csv", index=False)
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_colwidth", 60)
+    print(summary.round(4).to_string())
+    print(f"\n{len(configs)} configurations x {args.folds} folds in "
+          f"{time.perf_counter() - start:.1f} s -> {args.output}")
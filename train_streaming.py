@@ -0,0 +1,317 @@
+"""
+Out-of-core training of the fault models.
+
+The dataset is streamed in chunks from the columnar store (dataset_store),
+either a Feather file or a Parquet directory written by railway_dataset.py,
+so memory is bounded by the chunk size rather than by the dataset:
+
+- Random forest: warm_start; every training chunk grows --trees-per-chunk
+  new trees on that chunk only. A chunk is extended until it holds every
+  fault class, so all trees share one class list.
+- XGBoost: a DataIter feeds the chunks into an external-memory DMatrix
+  (pages cached on disk under a temporary directory) trained with hist.
+
+Whole segments are held out for evaluation (segment_id % --test-every ==
+0, at most --max-test-rows rows), so no segment's history leaks between
+train and test. XGBoost early-stops on a separate validation split of the
+remaining segments (segment_id % --val-every == 1, at most --max-val-rows
+rows), so the test split is only used for reporting. With --baseline the
+same models are also trained in memory on the full training split for
+comparison. Each run happens in a fresh process and reports rows/sec,
+accuracy, macro-F1 and peak RSS.
+
+    python railway_dataset.py --segments 20000 --output data/parquet
+    python train_streaming.py --source data/parquet --chunk-rows 2000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+from dataset_store import DEFAULT_SOURCE, iter_batches, load, peak_rss_mb
+from railway_dataset import FAULT_LABELS
+
+FEATURES = [
+    "wear_level",
+    "alignment_deviation",
+    "vibration_index",
+    "environment_factor",
+    "load_cycles"
+]
+COLUMNS = FEATURES + ["segment_id", "fault_label"]
+
+# As in RF.py, keyed by label code (index into FAULT_LABELS)
+CLASS_WEIGHTS = {
+    FAULT_LABELS.index("Normal"): 1.0,
+    FAULT_LABELS.index("Surface_Crack"): 2.5,
+    FAULT_LABELS.index("Misalignment"): 1.5,
+    FAULT_LABELS.index("Severe_Degradation"): 0.7
+}
+
+# As in XGRF.py
+XGB_PARAMS = {
+    "max_depth": 4,
+    "eta": 0.05,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "objective": "multi:softmax",
+    "num_class": len(FAULT_LABELS),
+    "eval_metric": "mlogloss",
+    "tree_method": "hist"
+}
+
+CHUNK_ROWS = 1_000_000
+TREES_PER_CHUNK = 10
+TEST_EVERY = 5
+MAX_TEST_ROWS = 1_000_000
+VAL_EVERY = 10
+MAX_VAL_ROWS = 500_000
+NUM_BOOST_ROUND = 300
+EARLY_STOPPING_ROUNDS = 20
+
+
+def _arrays(df):
+    """(float32 feature matrix, int8 label codes)"""
+    return df[FEATURES].to_numpy(dtype=np.float32), df["fault_label"].cat.codes.to_numpy()
+
+
+def _is_test(df, test_every):
+    return (df["segment_id"].to_numpy() % test_every == 0)
+
+
+def _is_val(df, test_every, val_every):
+    segment_id = df["segment_id"].to_numpy()
+    return (segment_id % test_every != 0) & (segment_id % val_every == 1)
+
+
+def _is_train(df, test_every, val_every):
+    return ~(_is_test(df, test_every) | _is_val(df, test_every, val_every))
+
+
+def _first_rows(source, select, max_rows):
+    parts, rows = [], 0
+    for df in iter_batches(COLUMNS, source):
+        parts.append(df[select(df)].iloc[:max_rows - rows])
+        rows += len(parts[-1])
+        if rows >= max_rows:
+            break
+    return _arrays(pd.concat(parts))
+
+
+def holdout(source, test_every=TEST_EVERY, max_rows=MAX_TEST_ROWS):
+    """Held-out test segments' rows (the first max_rows of them) as (X, y)."""
+    return _first_rows(source, lambda df: _is_test(df, test_every), max_rows)
+
+
+def validation(source, test_every=TEST_EVERY, val_every=VAL_EVERY, max_rows=MAX_VAL_ROWS):
+    """Validation segments' rows for early stopping (the first max_rows) as (X, y)."""
+    return _first_rows(source, lambda df: _is_val(df, test_every, val_every), max_rows)
+
+
+def train_chunks(source, chunk_rows=CHUNK_ROWS, test_every=TEST_EVERY, val_every=VAL_EVERY,
+                 complete=True):
+    """
+    Yield (X, y) training chunks of at least chunk_rows rows (the last one
+    may be shorter). complete=True extends a chunk until it contains every
+    fault class; a trailing chunk that never does is still yielded.
+    """
+    pending, rows = [], 0
+    for df in iter_batches(COLUMNS, source, batch_rows=chunk_rows):
+        train = df[_is_train(df, test_every, val_every)]
+        pending.append(train)
+        rows += len(train)
+        if rows < chunk_rows:
+            continue
+        chunk = pd.concat(pending)
+        if complete and chunk["fault_label"].nunique() < len(FAULT_LABELS):
+            continue
+        yield _arrays(chunk)
+        pending, rows = [], 0
+    if rows:
+        yield _arrays(pd.concat(pending))
+
+
+def _scores(y_true, y_pred):
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "macro_f1": f1_score(y_true, y_pred, average="macro")
+    }
+
+
+def _forest(n_estimators=TREES_PER_CHUNK, warm_start=False):
+    return RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=12,
+        class_weight=CLASS_WEIGHTS,
+        random_state=42,
+        n_jobs=-1,
+        warm_start=warm_start
+    )
+
+
+def train_rf_streaming(source, chunk_rows=CHUNK_ROWS, trees_per_chunk=TREES_PER_CHUNK,
+                       test_every=TEST_EVERY, val_every=VAL_EVERY):
+    """Warm-started forest, trees_per_chunk new trees per chunk. Returns (model, rows)."""
+    model = _forest(warm_start=True)
+    rows = 0
+    for X, y in train_chunks(source, chunk_rows, test_every, val_every):
+        if len(np.unique(y)) < len(FAULT_LABELS):
+            print(f"Skipping final chunk of {len(y)} rows: not every class present")
+            continue
+        grown = len(getattr(model, "estimators_", []))
+        model.set_params(n_estimators=grown + trees_per_chunk)
+        model.fit(X, y)
+        rows += len(y)
+    return model, rows
+
+
+class ChunkIter(xgb.DataIter):
+    """Training chunks for XGBoost's iterator-based DMatrix."""
+
+    def __init__(self, source, chunk_rows, test_every, val_every, cache_prefix):
+        self._args = (source, chunk_rows, test_every, val_every)
+        self._chunks = None
+        self.rows = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+
+    def next(self, input_data):
+        if self._chunks is None:
+            # Classes need not all appear per chunk: labels are global codes
+            self._chunks = train_chunks(*self._args, complete=False)
+            self.rows = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        X, y = chunk
+        self.rows += len(y)
+        input_data(data=X, label=y)
+        return 1
+
+
+def _train_xgb(dtrain, val):
+    return xgb.train(
+        XGB_PARAMS, dtrain, num_boost_round=NUM_BOOST_ROUND,
+        evals=[(xgb.DMatrix(val[0], label=val[1]), "val")],
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False
+    )
+
+
+def train_xgb_streaming(source, val, chunk_rows=CHUNK_ROWS, test_every=TEST_EVERY,
+                        val_every=VAL_EVERY):
+    """External-memory XGBoost with early stopping on val. Returns (booster, rows)."""
+    with tempfile.TemporaryDirectory() as cache:
+        it = ChunkIter(source, chunk_rows, test_every, val_every, os.path.join(cache, "dtrain"))
+        return _train_xgb(xgb.DMatrix(it), val), it.rows
+
+
+def _run(task):
+    """Worker (fresh process): train one model and evaluate it on the hold-out."""
+    model, mode, source, options = task
+    test_every, val_every = options["test_every"], options["val_every"]
+    test = holdout(source, test_every, options["max_test_rows"])
+    if model == "xgb":
+        val = validation(source, test_every, val_every, options["max_val_rows"])
+    start = time.perf_counter()
+
+    if mode == "streaming" and model == "rf":
+        fitted, rows = train_rf_streaming(
+            source, options["chunk_rows"], options["trees_per_chunk"], test_every, val_every
+        )
+    elif mode == "streaming":
+        fitted, rows = train_xgb_streaming(source, val, options["chunk_rows"], test_every, val_every)
+    else:
+        df = load(COLUMNS, source)
+        X, y = _arrays(df[_is_train(df, test_every, val_every)])
+        del df
+        rows = len(y)
+        if model == "rf":
+            fitted = _forest(options["baseline_trees"]).fit(X, y)
+        else:
+            fitted = _train_xgb(xgb.DMatrix(X, label=y), val)
+    seconds = time.perf_counter() - start
+
+    if model == "rf":
+        y_pred = fitted.predict(test[0])
+        size = {"trees": len(fitted.estimators_)}
+    else:
+        y_pred = fitted.predict(xgb.DMatrix(test[0]), iteration_range=(0, fitted.best_iteration + 1))
+        size = {"trees": (fitted.best_iteration + 1) * len(FAULT_LABELS)}
+
+    output = options.get(f"{model}_out")
+    if mode == "streaming" and output:
+        if model == "rf":
+            joblib.dump(fitted, output)
+        else:
+            fitted.save_model(output)
+
+    return {
+        "model": model,
+        "mode": mode,
+        "train_rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds,
+        **size,
+        **_scores(test[1], y_pred),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run(source, models=("rf", "xgb"), baseline=False, **options):
+    """Train each model (streaming, and in memory with baseline) in its own process."""
+    modes = ["streaming", "in_memory"] if baseline else ["streaming"]
+    ctx = get_context("spawn")
+    rows = []
+    for model in models:
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(_run, (model, mode, source, options)).result()
+            # Same forest size in memory as the streamed one ended up with
+            if model == "rf" and mode == "streaming":
+                options["baseline_trees"] = result["trees"]
+            print(f"{model} {mode}: {result['seconds']:.1f} s")
+            rows.append(result)
+    return pd.DataFrame(rows).set_index(["model", "mode"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core training of the fault models")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="dataset CSV, Feather store or Parquet directory")
+    parser.add_argument("--models", nargs="+", choices=["rf", "xgb"], default=["rf", "xgb"])
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--trees-per-chunk", type=int, default=TREES_PER_CHUNK)
+    parser.add_argument("--test-every", type=int, default=TEST_EVERY)
+    parser.add_argument("--max-test-rows", type=int, default=MAX_TEST_ROWS)
+    parser.add_argument("--val-every", type=int, default=VAL_EVERY,
+                        help="XGBoost early-stopping segments (segment_id %% N == 1)")
+    parser.add_argument("--max-val-rows", type=int, default=MAX_VAL_ROWS)
+    parser.add_argument("--baseline", action="store_true",
+                        help="also train in memory (needs the training split to fit in RAM)")
+    parser.add_argument("--rf-out", default=None, help="save the streamed forest (joblib)")
+    parser.add_argument("--xgb-out", default=None, help="save the streamed booster (json)")
+    args = parser.parse_args()
+    if args.val_every < 2:
+        parser.error("--val-every must be at least 2")
+
+    results = run(
+        args.source, args.models, args.baseline,
+        chunk_rows=args.chunk_rows, trees_per_chunk=args.trees_per_chunk,
+        test_every=args.test_every, max_test_rows=args.max_test_rows,
+        val_every=args.val_every, max_val_rows=args.max_val_rows,
+        baseline_trees=None, rf_out=args.rf_out, xgb_out=args.xgb_out
+    )
+    pd.set_option("display.width", 160)
+    print(results.round(4).to_string())